@@ -1,8 +1,25 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import io
+import uuid
+from functools import partial
+
+from dashboard.cache import WorkbookCache, workbook_key
+from dashboard.charts import (
+    CHART_BACKENDS, DEFAULT_CHART_BACKEND, altair_chart, plotly_figure, render_many,
+)
+from dashboard.cleaning import CLEANING_VERSION, sheet_kind
+from dashboard.entities import entity_index
+from dashboard.explorer import PAGE_SIZES, date_columns, page, page_count, query_positions
+from dashboard.export import EXPORT_FORMATS, export_reports
+from dashboard.headers import SKIPROWS_OVERRIDES
+from dashboard.indexes import filter_sheet, sheet_index
+from dashboard.jobs import get_job, submit
+from dashboard.joins import JOIN_KINDS, link_sheets
+from dashboard.loader import ingest_job, load_sheets, workbook_sheet_names
+from dashboard.profiling import PROFILE_LOG, PROFILERS, ProfileCapture, Recorder, stage, write_log
+from dashboard.report import build_report, quote_to_cash_report
+from dashboard.store import FRAME_STORE, FrameHandle
+from dashboard.timeseries import GRANULARITIES
 
 # --- FIX: Move st.set_page_config to the very top ---
 st.set_page_config(layout="wide", page_title="Salahuddin Softech Solutions Dashboard")
@@ -312,400 +329,272 @@ st.markdown(
 
 # --- Helper Functions for Processing Each File Type (moved to top) ---
 
-def process_qt_register_2025(df: pd.DataFrame):
+# Server-rendered charts of this run: (placeholder, spec), filled by fill_chart_slots once the page is laid out
+chart_slots = []
+
+
+def show_chart(spec: dict):
     """
-    Processes the 'QT Register 2025' data, performs analysis, and generates visualizations.
-    Includes advanced visualizations.
+    Displays a chart spec with the selected backend. Altair and Plotly render in the browser from the
+    aggregated data in the spec; matplotlib charts get a placeholder here and are rendered on the
+    server as a batch (see fill_chart_slots).
     """
-    st.markdown("<h2 class='st-emotion-cache-10grg6x e10grg6x4'>Quotation Register 2025</h2>", unsafe_allow_html=True)
-
-    # Data Cleaning for QT Register 2025
-    df['Date'] = df['Date'].astype(str).str.replace('//', '/', regex=False)
-    df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-    df.dropna(subset=['Date'], inplace=True)
-
-    # Strip leading/trailing spaces from categorical columns
-    for col in ['Company  Name', 'Product', 'Sales Person']:
-        if col in df.columns:
-            df[col] = df[col].astype(str).str.strip()
-
-    # --- Key Metrics ---
-    st.markdown("<div class='key-metrics-container'>", unsafe_allow_html=True)
-    num_quotations = df['Quotation ID'].nunique() if 'Quotation ID' in df.columns else len(df)
-    top_salesperson = df['Sales Person'].value_counts().index[0] if 'Sales Person' in df.columns and not df['Sales Person'].empty else "N/A"
-
-    col1, col2, col3 = st.columns([1,1,1]) # Use 3 columns for metrics if needed
-
-    with col1:
-        st.markdown(f"""
-        <div class="metric-card">
-            <p>Number of Quotations</p>
-            <p class="metric-value">{num_quotations}</p>
-        </div>
-        """, unsafe_allow_html=True)
-    with col2:
-        st.markdown(f"""
-        <div class="metric-card">
-            <p>Top Salesperson</p>
-            <p class="metric-value">{top_salesperson}</p>
-        </div>
-        """, unsafe_allow_html=True)
-    # Adding a placeholder third metric or expanding if data allows
-    if 'Value' in df.columns:
-        total_value = df['Value'].sum() if pd.api.types.is_numeric_dtype(df['Value']) else 0
-        with col3:
-            st.markdown(f"""
-            <div class="metric-card">
-                <p>Total Quotation Value</p>
-                <p class="metric-value">BHD {total_value:,.0f}</p>
-            </div>
-            """, unsafe_allow_html=True)
-    st.markdown("</div>", unsafe_allow_html=True)
-
-    # Raw Data Preview (styled as a table container)
-    st.subheader("Raw Data Preview")
-    st.markdown("<div class='table-container-div'>", unsafe_allow_html=True)
-    st.dataframe(df.head())
-    st.markdown("</div>", unsafe_allow_html=True)
-
-
-    # Data Analysis & Visualizations
-    st.subheader("Key Metrics & Reports")
-
-    # 1. Quotations by Sales Person
-    if 'Sales Person' in df.columns:
-        quotations_by_sales_person = df['Sales Person'].value_counts().reset_index()
-        quotations_by_sales_person.columns = ['Sales Person', 'Number of Quotations']
-        st.write("#### Number of Quotations by Sales Person:")
-        st.markdown("<div class='table-container-div'>", unsafe_allow_html=True)
-        st.dataframe(quotations_by_sales_person)
-        st.markdown("</div>", unsafe_allow_html=True)
-
-    # 2. Quotations by Product
-    if 'Product' in df.columns:
-        quotations_by_product = df['Product'].value_counts().reset_index()
-        quotations_by_product.columns = ['Product', 'Number of Quotations']
-        st.write("#### Number of Quotations by Product:")
-        st.markdown("<div class='table-container-div'>", unsafe_allow_html=True)
-        st.dataframe(quotations_by_product.head(10)) # Display top 10 for brevity
-        st.markdown("</div>", unsafe_allow_html=True)
-
-    # 3. Monthly Quotation Trends
-    if 'Date' in df.columns:
-        df['Month'] = df['Date'].dt.to_period('M')
-        monthly_quotations = df['Month'].value_counts().sort_index().reset_index()
-        monthly_quotations.columns = ['Month', 'Number of Quotations']
-        monthly_quotations['Month'] = monthly_quotations['Month'].astype(str)
-        st.write("#### Monthly Quotation Trends:")
-        st.markdown("<div class='table-container-div'>", unsafe_allow_html=True)
-        st.dataframe(monthly_quotations)
-        st.markdown("</div>", unsafe_allow_html=True)
-
-    # --- Advanced Visualizations ---
-    st.subheader("Advanced Visualizations")
-
-    # Set Matplotlib style for dark theme
-    plt.style.use('dark_background')
-    plt.rcParams.update({
-        'axes.facecolor': '#294242', # secondary-bg
-        'figure.facecolor': '#294242', # secondary-bg
-        'text.color': 'white',
-        'axes.labelcolor': 'white',
-        'xtick.color': 'white',
-        'ytick.color': 'white',
-        'grid.color': '#3b5e5e', # border-color
-        'grid.linestyle': '--',
-        'grid.linewidth': 0.5,
-        'axes.edgecolor': '#3b5e5e',
-        'boxplot.boxprops.color': 'white',
-        'boxplot.whiskerprops.color': 'white',
-        'boxplot.capprops.color': 'white',
-        'boxplot.medianprops.color': 'white',
-        'patch.edgecolor': 'white',
-    })
-
-    st.markdown("<div class='chart-panel-container'>", unsafe_allow_html=True)
-    # Plot 1: Quotations by Sales Person
-    if 'Sales Person' in df.columns:
-        fig1, ax1 = plt.subplots(figsize=(10, 6))
-        sns.barplot(x='Number of Quotations', y='Sales Person', data=quotations_by_sales_person, palette='viridis', ax=ax1)
-        ax1.set_title('Number of Quotations by Sales Person (2025)')
-        ax1.set_xlabel('Number of Quotations')
-        ax1.set_ylabel('Sales Person')
-        st.pyplot(fig1)
-
-    # Plot 2: Top Products by Quotations
-    if 'Product' in df.columns:
-        fig2, ax2 = plt.subplots(figsize=(12, 7))
-        sns.barplot(x='Number of Quotations', y='Product', data=quotations_by_product.head(10), palette='magma', ax=ax2)
-        ax2.set_title('Top 10 Products by Number of Quotations (2025)')
-        ax2.set_xlabel('Number of Quotations')
-        ax2.set_ylabel('Product')
-        st.pyplot(fig2)
-
-    # Plot 3: Monthly Quotation Trends
-    if 'Date' in df.columns:
-        fig3, ax3 = plt.subplots(figsize=(10, 6))
-        sns.lineplot(x='Month', y='Number of Quotations', data=monthly_quotations, marker='o', color='purple', ax=ax3)
-        ax3.set_title('Monthly Quotation Trends (2025)')
-        ax3.set_xlabel('Month')
-        ax3.set_ylabel('Number of Quotations')
-        plt.xticks(rotation=45, ha='right')
-        st.pyplot(fig3)
-
-    # Advanced Visualization 1: Heatmap of Quotations by Product & Sales Person
-    if 'Sales Person' in df.columns and 'Product' in df.columns:
-        st.write("#### Heatmap: Quotations by Product and Sales Person")
-        heatmap_data = df.groupby(['Sales Person', 'Product']).size().unstack(fill_value=0)
-
-        if not heatmap_data.empty:
-            fig_heatmap, ax_heatmap = plt.subplots(figsize=(14, len(heatmap_data.index) * 0.7 + len(heatmap_data.columns) * 0.2)) # Dynamic sizing
-            sns.heatmap(heatmap_data, annot=True, fmt="d", cmap="YlGnBu", linewidths=.5, ax=ax_heatmap)
-            ax_heatmap.set_title('Number of Quotations per Product and Sales Person')
-            ax_heatmap.set_xlabel('Product')
-            ax_heatmap.set_ylabel('Sales Person')
-            plt.xticks(rotation=90)
-            plt.yticks(rotation=0)
-            plt.tight_layout() # Adjust layout to prevent labels overlapping
-            st.pyplot(fig_heatmap)
-        else:
-            st.info("No data available to generate Heatmap for Product and Sales Person.")
-
-
-    # Advanced Visualization 2: Cumulative Sum of Quotations Over Time
-    if 'Date' in df.columns:
-        st.write("#### Cumulative Sum of Quotations Over Time")
-        daily_quotations = df.groupby(df['Date'].dt.date).size().reset_index(name='Daily Quotations')
-        daily_quotations['Date'] = pd.to_datetime(daily_quotations['Date'])
-        daily_quotations = daily_quotations.sort_values('Date')
-        daily_quotations['Cumulative Quotations'] = daily_quotations['Daily Quotations'].cumsum()
-
-        if not daily_quotations.empty:
-            fig_cumulative, ax_cumulative = plt.subplots(figsize=(12, 6))
-            sns.lineplot(x='Date', y='Cumulative Quotations', data=daily_quotations, marker='o', color='green', ax=ax_cumulative)
-            ax_cumulative.set_title('Cumulative Number of Quotations (2025)')
-            ax_cumulative.set_xlabel('Date')
-            ax_cumulative.set_ylabel('Cumulative Quotations')
-            plt.xticks(rotation=45, ha='right')
-            st.pyplot(fig_cumulative)
-        else:
-            st.info("No date data available to generate Cumulative Sum of Quotations.")
-    st.markdown("</div>", unsafe_allow_html=True) # Close chart-panel-container
+    backend = st.session_state.get('chart_backend', DEFAULT_CHART_BACKEND)
+    if backend == "altair":
+        st.altair_chart(altair_chart(spec), use_container_width=True)
+    elif backend == "plotly":
+        st.plotly_chart(plotly_figure(spec), use_container_width=True)
+    else:
+        chart_slots.append((st.empty(), spec))
 
 
-def process_2025_inv(df: pd.DataFrame):
+def fill_chart_slots():
     """
-    Processes the '2025 INV' data.
+    Renders all pending matplotlib charts concurrently and shows each one as soon as it is ready.
     """
-    st.markdown("<h2 class='st-emotion-cache-10grg6x e10grg6x4'>Invoices 2025</h2>", unsafe_allow_html=True)
-
-    # Basic Data Cleaning
-    df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-    df.dropna(subset=['Date'], inplace=True)
-    df.columns = df.columns.str.strip() # Clean column names
-
-    # --- Key Metrics ---
-    st.markdown("<div class='key-metrics-container'>", unsafe_allow_html=True)
-    invoice_count = df['INV No.'].nunique() if 'INV No.' in df.columns else len(df)
-    salesperson_count = df['Sales Person'].nunique() if 'Sales Person' in df.columns else 0
-
-    col1, col2 = st.columns(2)
-    with col1:
-        st.markdown(f"""
-        <div class="metric-card">
-            <p>Invoice Count</p>
-            <p class="metric-value">{invoice_count}</p>
-        </div>
-        """, unsafe_allow_html=True)
-    with col2:
-        st.markdown(f"""
-        <div class="metric-card">
-            <p>Salespeople Count</p>
-            <p class="metric-value">{salesperson_count}</p>
-        </div>
-        """, unsafe_allow_html=True)
-    st.markdown("</div>", unsafe_allow_html=True)
-
-    st.subheader("Raw Data Preview")
-    st.markdown("<div class='table-container-div'>", unsafe_allow_html=True)
-    st.dataframe(df.head())
-    st.markdown("</div>", unsafe_allow_html=True)
-
-    st.subheader("Key Metrics & Reports (Example)")
-    st.write("Total Invoices:", invoice_count)
-    st.write("Unique Sales Persons:", salesperson_count)
-
-    st.markdown("""
-    **Further analysis could include:**
-    - Total invoice amount over time (if 'Amount' column exists and is numeric)
-    - Invoices by Reseller/End User
-    - Top Suppliers and Products in invoices
-    - Sales performance by Sales Person (based on invoice value)
-    """)
-    if 'Sales Person' in df.columns:
-        st.write("#### Invoices by Sales Person:")
-        plt.style.use('dark_background')
-        fig, ax = plt.subplots(figsize=(10, 6))
-        sns.countplot(y='Sales Person', data=df, palette='GnBu', ax=ax)
-        ax.set_title('Invoices by Sales Person')
-        ax.set_xlabel('Number of Invoices')
-        ax.set_ylabel('Sales Person')
-        st.pyplot(fig)
-
-
-def process_meeting_agenda(df: pd.DataFrame):
+    with stage("charts", count=len(chart_slots)):
+        for index, image in render_many([spec for _, spec in chart_slots]):
+            with stage("chart display", title=chart_slots[index][1]['params'].get('title')):
+                chart_slots[index][0].image(image)
+    chart_slots.clear()
+
+
+def render_explorer(sheet_name: str, frame_key: str, df: pd.DataFrame):
     """
-    Processes the 'Meeting Agenda' data.
+    Paged, sortable and filterable view of a whole sheet (or of its rows selected in the filter bar,
+    with `frame_key` naming that selection). Sorting and filtering run on the server (see
+    dashboard.explorer); only the rows of the current page are sent to the browser.
     """
-    st.markdown("<h2 class='st-emotion-cache-10grg6x e10grg6x4'>Meeting Agenda</h2>", unsafe_allow_html=True)
-
-    # Basic Data Cleaning for Meeting Agenda
-    df['Order Value Approx.'] = pd.to_numeric(
-        df['Order Value Approx.'].astype(str).str.replace(',', ''), errors='coerce'
-    )
-    df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-    df.dropna(subset=['Date', 'Order Value Approx.'], inplace=True)
-    df.columns = df.columns.str.strip()
-
-    # --- Key Metrics ---
-    st.markdown("<div class='key-metrics-container'>", unsafe_allow_html=True)
-    total_meeting_points = df['No:'].nunique() if 'No:' in df.columns else len(df)
-    total_approx_order_value = df['Order Value Approx.'].sum() if 'Order Value Approx.' in df.columns and pd.api.types.is_numeric_dtype(df['Order Value Approx.']) else 0
-
-    col1, col2 = st.columns(2)
-    with col1:
-        st.markdown(f"""
-        <div class="metric-card">
-            <p>Total Meeting Points</p>
-            <p class="metric-value">{total_meeting_points}</p>
-        </div>
-        """, unsafe_allow_html=True)
-    with col2:
-        st.markdown(f"""
-        <div class="metric-card">
-            <p>Total Approximate Order Value</p>
-            <p class="metric-value">BHD {total_approx_order_value:,.0f}</p>
-        </div>
-        """, unsafe_allow_html=True)
-    st.markdown("</div>", unsafe_allow_html=True)
-
-
-    st.subheader("Raw Data Preview")
-    st.markdown("<div class='table-container-div'>", unsafe_allow_html=True)
-    st.dataframe(df.head())
-    st.markdown("</div>", unsafe_allow_html=True)
-
-    st.subheader("Key Metrics & Reports (Example)")
-    st.write(f"Total Approximate Order Value: BHD {total_approx_order_value:,.2f}")
-
-    st.markdown("""
-    **Further analysis could include:**
-    - Average Order Value per meeting point
-    - Meeting points by Action By person
-    - Distribution of Margin
-    - Trends in meeting topics or order values over time
-    """)
-    if 'Action By' in df.columns:
-        st.write("#### Points by Action By:")
-        plt.style.use('dark_background')
-        fig, ax = plt.subplots(figsize=(10, 6))
-        sns.countplot(y='Action By', data=df, palette='Spectral', ax=ax)
-        ax.set_title('Meeting Points by Action By Person')
-        ax.set_xlabel('Number of Points')
-        ax.set_ylabel('Action By')
-        st.pyplot(fig)
-
-    if 'Margin' in df.columns and pd.api.types.is_numeric_dtype(df['Margin']):
-         st.write("#### Margin Distribution:")
-         plt.style.use('dark_background')
-         fig, ax = plt.subplots(figsize=(10, 6))
-         sns.histplot(df['Margin'].dropna(), kde=True, ax=ax, color='teal')
-         ax.set_title('Margin Distribution')
-         ax.set_xlabel('Margin')
-         ax.set_ylabel('Frequency')
-         st.pyplot(fig)
-
-
-def process_payment_pending(df: pd.DataFrame):
+    prefix = f"explorer:{sheet_name}"
+    columns = list(df.columns)
+    col_text, col_in, col_sort, col_order = st.columns([3, 2, 2, 1])
+    text = col_text.text_input("Search", key=f"{prefix}:text", placeholder="Contains...")
+    text_column = col_in.selectbox("In column", [None] + columns, key=f"{prefix}:text_column",
+                                   format_func=lambda c: "All columns" if c is None else str(c))
+    sort_by = col_sort.selectbox("Sort by", [None] + columns, key=f"{prefix}:sort_by",
+                                 format_func=lambda c: "Sheet order" if c is None else str(c))
+    descending = col_order.checkbox("Descending", key=f"{prefix}:descending")
+
+    date_column, date_range = None, None
+    dated = [c for c in date_columns(df) if df[c].notna().any()]
+    if dated:
+        col_date, col_range = st.columns([1, 2])
+        date_column = col_date.selectbox("Date filter", [None] + dated, key=f"{prefix}:date_column",
+                                         format_func=lambda c: "No date filter" if c is None else str(c))
+        if date_column is not None:
+            first, last = df[date_column].min().date(), df[date_column].max().date()
+            selected = col_range.date_input("Between", value=(first, last), min_value=first, max_value=last,
+                                            key=f"{prefix}:date_range:{date_column}")
+            if isinstance(selected, (tuple, list)) and len(selected) == 2:  # A range is still being picked otherwise
+                date_range = tuple(selected)
+
+    with stage("explorer query", sheet=sheet_name):
+        positions = query_positions(frame_key, df, sort_by, not descending, text, text_column, date_column, date_range)
+
+    col_size, col_page, col_info = st.columns([1, 1, 3])
+    size = col_size.selectbox("Rows per page", PAGE_SIZES, key=f"{prefix}:page_size")
+    pages = page_count(len(positions), size)
+    page_key = f"{prefix}:page"
+    if st.session_state.get(page_key, 1) > pages:
+        st.session_state[page_key] = pages  # The view shrank below the current page
+    number = col_page.number_input("Page", min_value=1, max_value=pages, step=1, key=page_key)
+    start = (number - 1) * size
+    if len(positions):
+        col_info.caption(
+            f"Rows {start + 1:,}-{min(start + size, len(positions)):,} of {len(positions):,}"
+            + (f" (filtered from {len(df):,})" if len(positions) != len(df) else "")
+        )
+    else:
+        col_info.caption(f"No rows match the filters ({len(df):,} rows in the sheet).")
+    with stage("table", title="explorer page", rows=min(size, max(len(positions) - start, 0))):
+        st.dataframe(page(df, positions, number, size))
+
+
+FILTER_LABELS = {"salesperson": "Sales Person", "party": "Company / Party"}
+FILTER_NAMES = {"day": "date", "salesperson": "sales person", "party": "company/party"}
+
+
+def filter_bar(sheets: dict) -> dict:
     """
-    Processes the 'Payment Pending' data.
+    Date range and label filters over the loaded sheets ({name: (frame key, frame, cube)}), with
+    options taken from the sheets' filter indexes. Returns the active filters
+    ({dimension: (start, end) or [labels]}); filters left at their full range are omitted.
     """
-    st.markdown("<h2 class='st-emotion-cache-10grg6x e10grg6x4'>Payment Pending</h2>", unsafe_allow_html=True)
-
-    # Basic Data Cleaning for Payment Pending
-    df['Amount'] = pd.to_numeric(df['Amount'], errors='coerce')
-    df.dropna(subset=['Amount', 'PARTY NAME'], inplace=True)
-    df.columns = df.columns.str.strip()
-
-    # --- Key Metrics ---
-    st.markdown("<div class='key-metrics-container'>", unsafe_allow_html=True)
-    total_pending_amount = df['Amount'].sum()
-    num_parties_pending = df['PARTY NAME'].nunique()
-
-    col1, col2 = st.columns(2)
-    with col1:
-        st.markdown(f"""
-        <div class="metric-card">
-            <p>Total Pending Amount</p>
-            <p class="metric-value">BHD {total_pending_amount:,.0f}</p>
-        </div>
-        """, unsafe_allow_html=True)
-    with col2:
-        st.markdown(f"""
-        <div class="metric-card">
-            <p>Parties with Pending Payments</p>
-            <p class="metric-value">{num_parties_pending}</p>
-        </div>
-        """, unsafe_allow_html=True)
-    st.markdown("</div>", unsafe_allow_html=True)
-
-
-    st.subheader("Raw Data Preview")
-    st.markdown("<div class='table-container-div'>", unsafe_allow_html=True)
-    st.dataframe(df.head())
-    st.markdown("</div>", unsafe_allow_html=True)
-
-    st.subheader("Key Metrics & Reports (Example)")
-    st.write(f"Total Pending Amount: BHD {total_pending_amount:,.2f}")
-
-    st.markdown("""
-    **Further analysis could include:**
-    - Top parties with highest pending amounts
-    - Distribution of pending amounts
-    - Contact person analysis
-    - Aging of payments (if a 'Due Date' or similar column is available)
-    """)
-    if 'PARTY NAME' in df.columns:
-        st.write("#### Top 10 Parties by Pending Amount:")
-        st.markdown("<div class='table-container-div'>", unsafe_allow_html=True)
-        top_parties = df.groupby('PARTY NAME')['Amount'].sum().nlargest(10).reset_index()
-        st.dataframe(top_parties)
-        st.markdown("</div>", unsafe_allow_html=True)
-
-        plt.style.use('dark_background')
-        fig, ax = plt.subplots(figsize=(10, 6))
-        sns.barplot(x='Amount', y='PARTY NAME', data=top_parties, palette='coolwarm', ax=ax)
-        ax.set_title('Top 10 Parties by Pending Amount')
-        ax.set_xlabel('Amount Pending (BHD)')
-        ax.set_ylabel('Party Name')
-        st.pyplot(fig)
-
-
-def process_quotation_register_2023(df: pd.DataFrame):
+    bounds, labels = [], {dim: set() for dim in FILTER_LABELS}
+    for frame_key, df, cube in sheets.values():
+        if cube is None:
+            continue
+        index = sheet_index(frame_key, df, cube.filter_columns(), cube.columns.get("id"))
+        if index.date_bounds():
+            bounds.append(index.date_bounds())
+        for dim in labels:
+            labels[dim].update(label for label in index.labels(dim) if str(label).strip())
+    if not bounds and not any(labels.values()):
+        return {}
+
+    filters = {}
+    st.subheader("Filters")
+    columns = st.columns(3)
+    if bounds:
+        first, last = min(b[0] for b in bounds).date(), max(b[1] for b in bounds).date()
+        selected = columns[0].date_input("Date range", value=(first, last), min_value=first, max_value=last,
+                                         key="filter_dates")
+        if isinstance(selected, (tuple, list)) and len(selected) == 2 and tuple(selected) != (first, last):
+            filters["day"] = tuple(selected)
+    for column, (dim, label) in zip(columns[1:], FILTER_LABELS.items()):
+        if labels[dim]:
+            chosen = column.multiselect(label, sorted(labels[dim], key=str), key=f"filter_{dim}")
+            if chosen:
+                filters[dim] = chosen
+    return filters
+
+
+def render_report(report: dict, explorer=None):
+    """
+    Renders a sheet report from dashboard.report (computed from the cleaned sheet and its aggregate cube).
+    `explorer`, if given, is called in place of the raw data preview table.
+    """
+    if report['title']:
+        st.markdown(f"<h2 class='st-emotion-cache-10grg6x e10grg6x4'>{report['title']}</h2>", unsafe_allow_html=True)
+    for block in report['blocks']:
+        kind = block['type']
+        if kind == 'metrics':
+            st.markdown("<div class='key-metrics-container'>", unsafe_allow_html=True)
+            for col, item in zip(st.columns(block['columns']), block['items']):
+                with col:
+                    st.markdown(f"""
+                    <div class="metric-card">
+                        <p>{item['label']}</p>
+                        <p class="metric-value">{item['format'].format(item['value'])}</p>
+                    </div>
+                    """, unsafe_allow_html=True)
+            st.markdown("</div>", unsafe_allow_html=True)
+        elif kind == 'subheader':
+            st.subheader(block['text'])
+        elif kind == 'heading':
+            st.write(f"#### {block['text']}")
+        elif kind == 'table' and block.get('preview') and explorer is not None:
+            explorer()
+        elif kind == 'table':
+            if block['title']:
+                st.write(f"#### {block['title']}")
+            st.markdown("<div class='table-container-div'>", unsafe_allow_html=True)
+            with stage("table", title=block['title'] or "preview", rows=len(block['data'])):
+                st.dataframe(block['data'])
+            st.markdown("</div>", unsafe_allow_html=True)
+        elif kind == 'chart':
+            show_chart(block['spec'])
+        elif kind == 'text':
+            if 'value' in block:
+                st.write(block['text'], block['value'])
+            else:
+                st.write(block['text'])
+        elif kind == 'markdown':
+            st.markdown(block['text'])
+        elif kind == 'info':
+            st.info(block['text'])
+        elif kind == 'warning':
+            st.warning(block['text'])
+
+
+def _ingest_jobs_view(job_keys: list) -> list:
+    # (job, sheets it loads, sheets ready) of the session's load jobs
+    return [(job, st.session_state['ingest_jobs'].get(job.key, []), job.partial_results())
+            for job in map(get_job, job_keys) if job is not None]
+
+
+@st.fragment(run_every=1)
+def ingest_progress(job_keys: list, adopted: int):
     """
-    Processes the 'Quotation Register 2023' data.
-    Note: This sheet has generic column names, so specific analysis is limited without more info.
+    Per-sheet progress of the running load jobs, refreshed every second on its own. The page reruns
+    whenever another sheet is ready (`adopted` were ready at the last full run), so each sheet's
+    analysis appears as soon as it is loaded.
     """
-    st.markdown("<h2 class='st-emotion-cache-10grg6x e10grg6x4'>Quotation Register 2023</h2>", unsafe_allow_html=True)
-    st.warning("This sheet has generic column names (e.g., Unnamed: 0), making specific analysis challenging without more context.")
-    st.subheader("Raw Data Preview")
-    st.markdown("<div class='table-container-div'>", unsafe_allow_html=True)
-    st.dataframe(df.head())
-    st.markdown("</div>", unsafe_allow_html=True)
-    st.write("Columns detected:", df.columns.tolist())
-    st.markdown("""
-    To perform meaningful analysis on this sheet, please provide more information about what each column represents.
-    """)
+    jobs = _ingest_jobs_view(job_keys)
+    if sum(len(ready) for _, _, ready in jobs) > adopted or all(job.finished for job, _, _ in jobs):
+        st.rerun()
+    sheets = [name for _, names, _ in jobs for name in names]
+    ready = [name for _, _, results in jobs for name in results]
+    st.progress(len(ready) / max(len(sheets), 1), text=f"Loading sheets: {len(ready)} of {len(sheets)} ready")
+    st.caption(" · ".join(f"{name}: {'ready' if name in ready else 'loading...'}" for name in sheets))
+    if st.button("Cancel loading", key="ingest_cancel"):
+        for job, _, _ in jobs:
+            job.cancel()
+
+
+def ingest_status(job_keys: list):
+    """
+    Progress of the session's unfinished load jobs, or what happened to those that failed or were cancelled.
+    """
+    jobs = _ingest_jobs_view(job_keys)
+    running = [job.key for job, _, _ in jobs if not job.finished]
+    if running:
+        ingest_progress(running, sum(len(ready) for job, _, ready in jobs if job.key in running))
+    for job, names, ready in jobs:
+        if not job.finished:
+            continue
+        pending = [name for name in names if name not in ready]
+        if job.status == "failed":
+            st.error(f"Error processing the Excel file: {job.error}")
+            st.write("Please ensure the uploaded file is a valid .xlsx workbook and that the sheet names and data formats are consistent.")
+        else:
+            st.info(f"Loading cancelled; not loaded: {', '.join(pending)}.")
+        if st.button("Load again", key=f"ingest_retry:{job.key}"):
+            del st.session_state['ingest_jobs'][job.key]
+            st.rerun()
+
+
+@st.fragment(run_every=1)
+def export_progress(job_key: str):
+    """
+    Progress of a running export, refreshed every second on its own; the page reruns once it finishes.
+    """
+    job = get_job(job_key)
+    if job is None or job.finished:
+        st.rerun()
+    st.progress(job.progress, text=job.message)
+    if st.button("Cancel export", key="export_cancel"):
+        job.cancel()
+
+
+def export_panel(sheets: dict, filters: dict, links):
+    """
+    Exports the reports of the loaded sheets ({name: (frame key, frame, cube)}), as filtered and
+    binned on the page, plus the quote-to-cash report, to one file. The file is written by a
+    background job (dashboard.export), so the page stays usable meanwhile.
+    """
+    with st.expander("Export Report", expanded=False):
+        col_format, col_start = st.columns([3, 1])
+        fmt = col_format.selectbox("Format", list(EXPORT_FORMATS), format_func=lambda f: EXPORT_FORMATS[f][0],
+                                   key="export_format")
+        job = get_job(st.session_state['export_job']) if st.session_state.get('export_job') else None
+        if col_start.button("Export", key="export_start", disabled=job is not None and not job.finished,
+                            use_container_width=True):
+            job = submit(f"export:{uuid.uuid4().hex}", "export", export_reports, sheets, fmt, filters,
+                         st.session_state['trend_granularity'], links, "Salahuddin Softech Solutions Dashboard")
+            st.session_state['export_job'] = job.key
+        if job is None:
+            st.caption(f"{len(sheets)} sheet(s)" + (" and the Quote-to-Cash report" if links is not None else "")
+                       + " will be exported" + (" with the current filters." if filters else "."))
+        elif not job.finished:
+            export_progress(job.key)
+        elif job.status == "done":
+            result = job.result
+            try:
+                with open(result['path'], 'rb') as fh:
+                    data = fh.read()
+            except FileNotFoundError:
+                st.info("The exported file has expired; please export again.")
+            else:
+                st.download_button(
+                    f"Download {result['file_name']} ({result['bytes'] / 2**20:.1f} MB)", data,
+                    file_name=result['file_name'], mime=result['mime'], key="export_download", on_click="ignore"
+                )
+                st.caption(f"Exported in {result['seconds']:.1f} s.")
+        elif job.status == "failed":
+            st.error(f"Export failed: {job.error}")
+        else:
+            st.info("Export cancelled.")
 
 
 # --- Streamlit UI Components (rebuilt using design) ---
@@ -742,43 +631,103 @@ uploaded_file = st.file_uploader(
     label_visibility="collapsed" # Hide default label, as we have custom text
 )
 
-# Dictionary to map sheet names to their respective skiprows values
-sheet_skiprows_map = {
-    "Payment Pending": 1,
-    "Quotation Register 2023": 879,
-    "Meeting Agenda": 2,
-    # For '2025 INV' and 'QT Register 2025', assuming header is at row 0 (default)
-}
+# Chart rendering: matplotlib draws PNGs on the server, Altair/Plotly send the aggregated data to the browser
+st.sidebar.selectbox(
+    "Chart backend",
+    options=CHART_BACKENDS,
+    index=CHART_BACKENDS.index(DEFAULT_CHART_BACKEND) if DEFAULT_CHART_BACKEND in CHART_BACKENDS else 0,
+    key="chart_backend",
+    help="Altair and Plotly render charts client-side, which takes rendering load off the server."
+)
+
+# Trends over time are binned from each cube's prefix-summed daily series, so switching granularity is cheap
+st.sidebar.selectbox(
+    "Trend granularity",
+    options=list(GRANULARITIES),
+    index=list(GRANULARITIES).index("M"),
+    format_func=lambda code: GRANULARITIES[code][1],
+    key="trend_granularity",
+    help="Period of the trend tables and charts of the dated sheets."
+)
+
+# Diagnostics: per-stage timings/memory of this page, and an opt-in profile of a single rerun
+st.sidebar.checkbox("Diagnostics", key="diagnostics", help="Record wall time, CPU time and memory of every stage.")
+profile_capture = None
+if st.session_state['diagnostics']:
+    profiler_name = st.sidebar.selectbox("Profiler", options=PROFILERS, key="profiler")
+    if st.sidebar.button("Profile this rerun", help="Reruns the page under the profiler; the report appears under Diagnostics."):
+        profile_capture = ProfileCapture(profiler_name).start()
+
+# Stages are recorded when the diagnostics panel is on or a JSON log is configured (MASTERSHEET_PROFILE_LOG)
+recorder = None
+if st.session_state['diagnostics'] or PROFILE_LOG:
+    st.session_state.setdefault('session_tag', uuid.uuid4().hex[:8])
+    recorder = Recorder(trace_memory=st.session_state['diagnostics'], session=st.session_state['session_tag']).start()
+
+# Revision-aware uploads: a new upload is diffed against the previous one and only changed rows are reprocessed
+st.sidebar.checkbox(
+    "Incremental refresh",
+    value=True,
+    key="incremental_refresh",
+    help="When a new revision of the workbook is uploaded, only re-clean and re-aggregate the rows that changed."
+)
+
+# Manual skiprows overrides. Header rows of 'QT Register 2025', '2025 INV', 'Meeting Agenda' and
+# 'Payment Pending' are detected from their column names (see dashboard.headers); other sheets start at row 0.
+sheet_skiprows_map = SKIPROWS_OVERRIDES
+
+# Initialize session state. Sessions only hold handles; the cleaned frames live once per process in FRAME_STORE
+if 'sheet_handles' not in st.session_state:
+    st.session_state['sheet_handles'] = {}
+    st.session_state['sheet_cubes'] = {}
+    st.session_state['workbook_sheet_names'] = []
+    st.session_state['sheet_parse_timings'] = {}
+    st.session_state['previous_revision'] = None
+    st.session_state['ingest_jobs'] = {}  # Background load job key -> sheets it loads
+    st.session_state['ingest_stages'] = []  # Stages recorded by this upload's finished load jobs
+
+# Cleaned sheets are shared across sessions, keyed by file content and parse settings
+workbook_cache = WorkbookCache()
+
+
+def reload_sheet(source, sheet_name: str, cache_key: str) -> pd.DataFrame:
+    """
+    Rebuilds a sheet for the frame store (from the on-disk cache when possible) after eviction.
+    """
+    return load_sheets(source, [sheet_name], sheet_skiprows_map, workbook_cache, cache_key)[0][sheet_name]
 
-# Initialize session state for processed dataframes
-if 'processed_dataframes' not in st.session_state:
-    st.session_state['processed_dataframes'] = {}
 
 if uploaded_file:
     # Check if a new file is uploaded or if the file has changed
     if st.session_state.get('last_uploaded_file_id') != uploaded_file.file_id:
-        st.session_state['processed_dataframes'] = {} # Clear dataframes if new file
+        # The previous upload's key and cubes are kept so the new revision can be applied as a delta
+        if st.session_state.get('workbook_key'):
+            st.session_state['previous_revision'] = {
+                'workbook_key': st.session_state['workbook_key'], 'cubes': st.session_state['sheet_cubes'],
+            }
+        st.session_state['sheet_handles'] = {} # Drop handles of the previous file (releases its frames)
+        st.session_state['sheet_cubes'] = {}
+        st.session_state['sheet_parse_timings'] = {}
+        st.session_state['ingest_jobs'] = {}
+        st.session_state['ingest_stages'] = []
+        st.session_state['quote_to_cash'] = None
+        st.session_state['export_job'] = None
         st.session_state['last_uploaded_file_id'] = uploaded_file.file_id # Store current file ID
 
         try:
-            excel_file = pd.ExcelFile(uploaded_file)
-            sheet_names = excel_file.sheet_names
-
-            # Process all sheets and store them in session state for later use
-            for sheet_name in sheet_names:
-                skip_rows = sheet_skiprows_map.get(sheet_name, 0)
-                df = pd.read_excel(uploaded_file, sheet_name=sheet_name, skiprows=skip_rows)
-                st.session_state['processed_dataframes'][sheet_name] = df
-
-            st.success("Excel file loaded and sheets processed!")
+            # Only the workbook metadata is read here; sheets are parsed when first selected
+            cache_key = workbook_key(uploaded_file.getvalue(), sheet_skiprows_map, CLEANING_VERSION)
+            st.session_state['workbook_key'] = cache_key
+            st.session_state['workbook_sheet_names'] = workbook_sheet_names(uploaded_file, workbook_cache, cache_key)
+            st.success(f"Excel file loaded: {len(st.session_state['workbook_sheet_names'])} sheets found!")
 
         except Exception as e:
             st.error(f"Error processing the Excel file: {e}")
             st.write("Please ensure the uploaded file is a valid .xlsx workbook and that the sheet names and data formats are consistent.")
-            st.session_state['processed_dataframes'] = {} # Clear on error
+            st.session_state['workbook_sheet_names'] = [] # Clear on error
 
     # --- Data Analysis & Reports Section ---
-    if st.session_state['processed_dataframes']:
+    if st.session_state['workbook_sheet_names']:
         st.markdown(
             "<div class='main-content-section flex h-full min-h-[700px] flex-col justify-between bg-[--primary-bg] p-4'>",
             unsafe_allow_html=True
@@ -786,7 +735,7 @@ if uploaded_file:
         st.markdown("<h1 class='st-emotion-cache-10grg6x e10grg6x4'>Data Sheets</h1>", unsafe_allow_html=True)
 
         # Sheet Selection
-        available_sheets = list(st.session_state['processed_dataframes'].keys())
+        available_sheets = st.session_state['workbook_sheet_names']
         # Provide a default selection for common sheets if they exist
         default_selection = [s for s in available_sheets if any(keyword in s for keyword in ["QT Register 2025", "2025 INV", "Meeting Agenda", "Payment Pending", "Quotation Register 2023"])]
         if not default_selection and available_sheets: # If no common sheets, select the first one
@@ -823,23 +772,119 @@ if uploaded_file:
         if not selected_sheets_for_analysis:
             st.info("Please select at least one sheet for analysis from the multi-select above.")
         else:
+            # Sheets are parsed (or fetched from the cache) by a background job per content hash and
+            # selection, so the page stays responsive and a reloaded page re-attaches to a running job
+            cache_key = st.session_state['workbook_key']
+            ingest_jobs = st.session_state['ingest_jobs']
+            claimed = {name for job_key, names in ingest_jobs.items() for name in names}
+            sheets_to_load = [s for s in selected_sheets_for_analysis
+                              if s not in st.session_state['sheet_handles'] and s not in claimed]
+            if sheets_to_load:
+                previous = st.session_state['previous_revision'] if st.session_state['incremental_refresh'] else None
+                previous_key = previous['workbook_key'] if previous else None
+                # Keyed on the content hash and sheets only, so a reloaded page (which has lost the
+                # previous revision) re-attaches to the running job instead of starting another
+                job = submit(
+                    f"ingest:{cache_key}:{sorted(sheets_to_load)!r}", "ingest", ingest_job,
+                    uploaded_file.getvalue(), sheets_to_load, sheet_skiprows_map, workbook_cache, cache_key,
+                    previous_key=previous_key, previous_cubes=previous['cubes'] if previous else None
+                )
+                ingest_jobs[job.key] = sheets_to_load
+
+            # Sheets the jobs finished are adopted: the session takes a handle on the stored frame and the cube
+            for job_key in list(ingest_jobs):
+                job = get_job(job_key)
+                if job is None:  # Dropped from the job history; its sheets are loaded again
+                    del ingest_jobs[job_key]
+                    continue
+                for name, result in job.partial_results().items():
+                    if name in st.session_state['sheet_handles']:
+                        continue
+                    st.session_state['sheet_handles'][name] = FrameHandle(
+                        f"{cache_key}:{name}", partial(reload_sheet, uploaded_file, name, cache_key)
+                    )
+                    st.session_state['sheet_cubes'][name] = result['cube']
+                    if result['seconds'] is not None:
+                        st.session_state['sheet_parse_timings'][name] = result['seconds']
+                    delta = result['delta']
+                    if delta is not None:
+                        st.info(
+                            f"'{name}' refreshed from the previous upload: {delta.added_records} added, "
+                            f"{delta.edited_records} edited, {delta.removed_records} removed, "
+                            f"{delta.unchanged} rows unchanged."
+                        )
+                if job.status == "done":
+                    st.session_state['ingest_stages'] += job.stages()
+                    del ingest_jobs[job_key]
+            ingest_status(list(ingest_jobs))
+
+            if st.session_state['sheet_parse_timings']:
+                parse_timings = st.session_state['sheet_parse_timings']
+                with st.expander("Sheet parse timings", expanded=False):
+                    st.dataframe(pd.DataFrame(
+                        {'Sheet': list(parse_timings.keys()), 'Parse Time (s)': list(parse_timings.values())}
+                    ))
+
+            # Read-only views of the shared frames, with their store keys and cubes
+            loaded = {
+                name: (handle.key, handle.frame(), st.session_state['sheet_cubes'].get(name))
+                for name, handle in st.session_state['sheet_handles'].items() if name in selected_sheets_for_analysis
+            }
+            filters = filter_bar(loaded)
+
             for sheet_name in selected_sheets_for_analysis:
-                df = st.session_state['processed_dataframes'][sheet_name].copy() # Use a copy for display/analysis
+                if sheet_name not in loaded:
+                    continue
+                frame_key, df, cube = loaded[sheet_name]
                 with st.expander(f"Analysis for Sheet: '{sheet_name}'", expanded=True):
-                    if "QT Register 2025" in sheet_name:
-                        # Reusing internal functions with new styling
-                        process_qt_register_2025(df)
-                    elif "2025 INV" in sheet_name:
-                        process_2025_inv(df)
-                    elif "Meeting Agenda" in sheet_name:
-                        process_meeting_agenda(df)
-                    elif "Payment Pending" in sheet_name:
-                        process_payment_pending(df)
-                    elif "Quotation Register 2023" in sheet_name:
-                        process_quotation_register_2023(df)
-                    else:
-                        st.write(f"No specific processing logic defined for sheet: '{sheet_name}'. Displaying raw data.")
-                        st.dataframe(df.head())
+                    if filters:
+                        # Rows and cube of the selection come from the prebuilt indexes (dashboard.indexes)
+                        with stage("filter", sheet=sheet_name):
+                            total_rows = len(df)
+                            df, cube, applied = filter_sheet(frame_key, df, cube, filters)
+                        if applied:
+                            frame_key = f"{frame_key}|{ {dim: filters[dim] for dim in applied}!r}"
+                            st.caption(f"Filtered by {', '.join(FILTER_NAMES[dim] for dim in applied)}: "
+                                       f"{len(df):,} of {total_rows:,} rows.")
+                        skipped = [FILTER_NAMES[dim] for dim in filters if dim not in applied]
+                        if skipped:
+                            st.caption(f"Not filtered by {', '.join(skipped)} (no such column in this sheet).")
+                    with stage("report", sheet=sheet_name):
+                        report = build_report(sheet_name, df, cube, st.session_state['trend_granularity'])
+                    with stage("render", sheet=sheet_name):
+                        render_report(report, partial(render_explorer, sheet_name, frame_key, df))
+
+            # Quotations -> invoices -> pending payments, linked once per set of loaded sheets
+            linked_sheets = {name: loaded[name] for name in loaded if sheet_kind(name) in JOIN_KINDS}
+            if len(linked_sheets) >= 2:
+                link_keys = sorted(frame_key for frame_key, _, _ in linked_sheets.values())
+                if (st.session_state.get('quote_to_cash') or {}).get('keys') != link_keys:
+                    # Party names resolve through the workbook's entity index, extended from the previous revision's
+                    previous = st.session_state['previous_revision']
+                    resolver = entity_index(st.session_state['workbook_key'], previous['workbook_key'] if previous else None)
+                    with stage("link sheets", sheets=len(linked_sheets)):
+                        links = link_sheets({name: df for name, (_, df, _) in linked_sheets.items()}, resolver)
+                    st.session_state['quote_to_cash'] = {'keys': link_keys, 'links': links}
+                links = st.session_state['quote_to_cash']['links']
+                if links is not None:
+                    with st.expander("Quote-to-Cash: " + " → ".join(linked_sheets), expanded=True):
+                        if filters:
+                            st.caption("Computed over the whole sheets; the filter bar does not apply here.")
+                        resolution = entity_index(st.session_state['workbook_key']).stats()
+                        st.caption(
+                            f"Party names: {resolution['names']:,} spellings resolved to {resolution['entities']:,} parties, "
+                            f"comparing {resolution['compared_pairs']:,} candidate pairs instead of "
+                            f"{resolution['all_pairs']:,} ({resolution['merges']:,} merged; last update: "
+                            f"{resolution['last_new_names']:,} new names in {resolution['last_seconds'] * 1000:.0f} ms)."
+                        )
+                        with stage("report", sheet="quote-to-cash"):
+                            report = quote_to_cash_report(links)
+                        with stage("render", sheet="quote-to-cash"):
+                            render_report(report)
+            if loaded:
+                links = (st.session_state.get('quote_to_cash') or {}).get('links') if len(linked_sheets) >= 2 else None
+                export_panel(loaded, filters, links)
+            fill_chart_slots()
         st.markdown("</div>", unsafe_allow_html=True) # Close the main-content-container
 
 
@@ -848,3 +893,49 @@ if uploaded_file:
 
 else:
     st.info("Please upload your Excel workbook (.xlsx) from the file uploader above to get started.")
+
+# Shared sheet store usage (all sessions in this server process)
+store_stats = FRAME_STORE.stats()
+st.sidebar.caption(
+    f"Sheet memory: {store_stats['bytes'] / 2**20:.1f} / {store_stats['max_bytes'] / 2**20:.0f} MB, "
+    f"{store_stats['frames']} sheet(s), {store_stats['evictions']} evicted"
+)
+
+# --- Diagnostics ---
+if profile_capture is not None:
+    st.session_state['last_profile'] = profile_capture.stop()
+if recorder is not None:
+    recorder.stop()
+    write_log(recorder)
+    if st.session_state['diagnostics']:
+        with st.expander("Diagnostics", expanded=False):
+            measures = {'stage', 'depth', 'start_s', 'wall_s', 'cpu_s', 'alloc_peak_bytes', 'alloc_net_bytes'}
+
+            def stages_table(records: list) -> pd.DataFrame:
+                return pd.DataFrame([{
+                    'Stage': "  " * record['depth'] + record['stage'],
+                    'Detail': ", ".join(f"{k}={v}" for k, v in record.items() if k not in measures and v is not None),
+                    'Wall (ms)': record['wall_s'] * 1000,
+                    'CPU (ms)': record['cpu_s'] * 1000,
+                    'Peak alloc (KB)': record.get('alloc_peak_bytes', float('nan')) / 1024,
+                    'Net alloc (KB)': record.get('alloc_net_bytes', float('nan')) / 1024,
+                } for record in records])
+
+            stages = stages_table(recorder.ordered())
+            if stages.empty:
+                st.write("No stages recorded in this run.")
+            else:
+                st.caption("CPU time is this session's thread only; work done in worker processes shows as wall time.")
+                st.dataframe(stages.round(1), hide_index=True)
+            # Sheets are parsed, cleaned and cached by background load jobs, which record their own stages
+            job_records = list(st.session_state.get('ingest_stages', []))
+            for job in map(get_job, st.session_state.get('ingest_jobs', {})):
+                if job is not None:
+                    job_records += job.stages()
+            if job_records:
+                st.write("#### Background loading")
+                st.caption("Recorded by the load jobs of this upload (CPU time is the job thread's; memory is not traced).")
+                st.dataframe(stages_table(job_records).round(1), hide_index=True)
+            if st.session_state.get('last_profile'):
+                st.write("#### Profile of the last profiled rerun")
+                st.code(st.session_state['last_profile'], language=None)
@@ -0,0 +1,3 @@
+"""
+Benchmarks of the dashboard pipeline on synthetic workbooks (see benchmarks.run).
+"""
@@ -0,0 +1,141 @@
+"""
+Synthetic SSS master workbooks for benchmarking. The sheets follow the layouts the dashboard reads
+(title rows above the header, the 879-row preamble of 'Quotation Register 2023') and include the
+irregularities the cleaners handle: dates typed as text (some with '//'), padded names, amounts
+entered as 'TBD' and order values with thousands separators. Rows are streamed to disk, so
+workbooks of a million rows are written in constant memory.
+
+    python -m benchmarks.generate 100000 /tmp/master-100k.xlsx
+"""
+import argparse
+import datetime
+import random
+
+from openpyxl import Workbook
+
+# Rows of each sheet per row of 'QT Register 2025'
+SHEET_RATIOS = {
+    "2025 INV": 0.5,
+    "Meeting Agenda": 0.1,
+    "Payment Pending": 0.05,
+    "Quotation Register 2023": 0.25,
+}
+QR2023_PREAMBLE_ROWS = 879
+
+SALES_PEOPLE = ["Ahmed", "Sara ", "John", "Fatima", " Omar", "Priya", "Yousif", "Maria"]
+PRODUCTS = [
+    "Firewall", "Switch", "Router", "Access Point", "License Renewal", "UPS", "Server", "Storage",
+    "CCTV", "Structured Cabling", "Laptop", "Desktop", "Printer", "Support Contract", "Backup Appliance",
+]
+START_DATE = datetime.datetime(2025, 1, 1)
+
+
+def _companies(rng: random.Random, count: int = 400) -> list:
+    stems = ["Al Noor", "Gulf", "Bahrain", "Manama", "Delta", "Falcon", "Pearl", "Crescent", "Oasis", "Horizon"]
+    kinds = ["Trading", "Contracting", "Holdings", "Group", "Services", "Bank", "Hospital", "School"]
+    suffixes = ["W.L.L.", "WLL", "B.S.C.", "Co.", ""]
+    names = {f"{rng.choice(stems)} {rng.choice(kinds)} {rng.choice(suffixes)}".strip() for _ in range(count * 3)}
+    return sorted(names)[:count]
+
+
+def _date(rng: random.Random, days: int = 365):
+    value = START_DATE + datetime.timedelta(days=rng.randrange(days))
+    roll = rng.random()
+    if roll < 0.05:
+        return value.strftime("%d//%m/%Y")  # Typo seen in the real register
+    if roll < 0.15:
+        return value.strftime("%d/%m/%Y")
+    return value
+
+
+def _qt_register_2025(ws, rows: int, rng: random.Random, companies: list):
+    ws.append(["Date", "Quotation ID", "Company  Name", "Product", "Sales Person", "Value", "Status"])
+    for i in range(rows):
+        ws.append([
+            _date(rng), f"SSS/QT/25/{i + 1:06d}", rng.choice(companies) + rng.choice(["", " "]),
+            rng.choice(PRODUCTS), rng.choice(SALES_PEOPLE), rng.randint(50, 250000),
+            rng.choice(["Open", "Won", "Lost", "Revised"]),
+        ])
+
+
+def _inv_2025(ws, rows: int, rng: random.Random, companies: list):
+    ws.append(["Date", "INV No.", "PARTY NAME", "Product", "Sales Person ", "Amount", "Reseller/End User"])
+    for i in range(rows):
+        ws.append([
+            START_DATE + datetime.timedelta(days=rng.randrange(365)), f"INV-25-{i + 1:06d}", rng.choice(companies),
+            rng.choice(PRODUCTS), rng.choice(SALES_PEOPLE), round(rng.uniform(20, 120000), 3),
+            rng.choice(["Reseller", "End User"]),
+        ])
+
+
+def _meeting_agenda(ws, rows: int, rng: random.Random, companies: list):
+    ws.append(["SSS Weekly Sales Meeting Agenda"])
+    ws.append([])
+    ws.append(["No:", "Date", "Customer", "Topic", "Order Value Approx.", "Margin", "Action By"])
+    for i in range(rows):
+        ws.append([
+            i + 1, _date(rng), rng.choice(companies), rng.choice(["Follow up", "Demo", "Renewal", "Tender"]),
+            f"{rng.randint(1, 500) * 100:,}", round(rng.uniform(0.05, 0.4), 3), rng.choice(SALES_PEOPLE),
+        ])
+
+
+def _payment_pending(ws, rows: int, rng: random.Random, companies: list):
+    ws.append(["Payment pending as of " + START_DATE.strftime("%d %B %Y")])
+    ws.append(["PARTY NAME", "Contact Person", "Amount", "Remarks"])
+    for _ in range(rows):
+        amount = "TBD" if rng.random() < 0.03 else round(rng.uniform(10, 50000), 3)
+        ws.append([rng.choice(companies), rng.choice(["Mr. Ali", "Ms. Huda", "Accounts"]), amount, ""])
+
+
+def _quotation_register_2023(ws, rows: int, rng: random.Random, companies: list):
+    for i in range(QR2023_PREAMBLE_ROWS):  # Archived block above the actual table
+        ws.append([f"Archived quotation note {i + 1}", None, None])
+    ws.append(["Ref", "Client", "Date", "Value"])
+    for i in range(rows):
+        ws.append([f"QT/23/{i + 1:05d}", rng.choice(companies), _date(rng), rng.randint(50, 90000)])
+
+
+SHEET_WRITERS = {
+    "QT Register 2025": _qt_register_2025,
+    "2025 INV": _inv_2025,
+    "Meeting Agenda": _meeting_agenda,
+    "Payment Pending": _payment_pending,
+    "Quotation Register 2023": _quotation_register_2023,
+}
+
+
+def sheet_rows(rows: int) -> dict:
+    """
+    Data rows per sheet for a workbook whose 'QT Register 2025' has `rows` rows.
+    """
+    return {name: rows if name == "QT Register 2025" else max(1, int(rows * SHEET_RATIOS[name]))
+            for name in SHEET_WRITERS}
+
+
+def generate_workbook(path: str, rows: int, seed: int = 0) -> dict:
+    """
+    Writes a synthetic master workbook to `path` and returns its data rows per sheet.
+    The same (rows, seed) always produces the same workbook contents.
+    """
+    rng = random.Random(seed)
+    companies = _companies(rng)
+    counts = sheet_rows(rows)
+    wb = Workbook(write_only=True)
+    for name, writer in SHEET_WRITERS.items():
+        writer(wb.create_sheet(name), counts[name], rng, companies)
+    wb.save(path)
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic SSS master workbook.")
+    parser.add_argument("rows", type=int, help="Rows of 'QT Register 2025' (other sheets scale with it)")
+    parser.add_argument("path", help="Output .xlsx path")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    for name, count in generate_workbook(args.path, args.rows, args.seed).items():
+        print(f"{name}: {count} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Scaling benchmark of the dashboard pipeline. For each workbook size a synthetic workbook is
+generated (see benchmarks.generate) and every stage is timed separately: Excel parsing, cleaning,
+aggregation (cubes and reports), building the filter indexes, re-running the reports under a filter
+bar selection, chart rendering and table serialization (Arrow IPC, which is what st.dataframe sends
+to the browser). Each stage records wall time, CPU time and peak traced memory; the results go to a
+JSON file so revisions can be compared.
+
+    python -m benchmarks.run --sizes 1000,10000,100000 --output bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+import pyarrow as pa
+
+from benchmarks.generate import generate_workbook
+from dashboard.aggregates import build_cube
+from dashboard.charts import draw_image
+from dashboard.cleaning import clean_sheet
+from dashboard.headers import SKIPROWS_OVERRIDES, header_signature
+from dashboard.indexes import filter_sheet, sheet_index
+from dashboard.ingest import WorkbookReader, default_engine
+from dashboard.profiling import Recorder, stage
+from dashboard.report import build_report
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+STAGES = ["parse", "clean", "aggregate", "index", "filter", "charts", "serialize"]
+# Filter bar selection timed by the "filter" stage: one quarter and the first sales person of each sheet
+FILTER_QUARTER = (pd.Timestamp("2025-04-01"), pd.Timestamp("2025-06-30"))
+
+
+def _arrow_bytes(df: pd.DataFrame) -> int:
+    sink = pa.BufferOutputStream()
+    table = pa.Table.from_pandas(df.astype({c: str for c in df.columns[df.dtypes == object]}))
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().size
+
+
+def run_size(path: str, engine: str, trace_memory: bool) -> dict:
+    """
+    Runs every stage once over the workbook at `path`; returns per-stage results and counts.
+    """
+    recorder = Recorder(trace_memory=trace_memory).start()
+    with stage("parse"):
+        with WorkbookReader(path, engine=engine) as reader:
+            raw = {
+                name: reader.read_sheet(name, skiprows=SKIPROWS_OVERRIDES.get(name),
+                                        header_signature=header_signature(name))
+                for name in reader.sheet_names
+            }
+
+    with stage("clean"):
+        cleaned = {name: clean_sheet(name, df) for name, df in raw.items()}
+
+    with stage("aggregate"):
+        cubes = {name: build_cube(name, df) for name, df in cleaned.items()}
+        reports = [build_report(name, df, cubes[name]) for name, df in cleaned.items()]
+
+    indexed = {name: cube for name, cube in cubes.items() if cube is not None}
+    with stage("index"):
+        indexes = {name: sheet_index(name, cleaned[name], cube.filter_columns(), cube.columns.get("id"))
+                   for name, cube in indexed.items()}
+        for cube in indexed.values():
+            cube.filtered({}, cube.rows, cube.distinct_ids)  # Builds the index over the cube table
+    with stage("filter"):
+        for name, cube in indexed.items():
+            salespeople = indexes[name].labels("salesperson")
+            filters = {"day": FILTER_QUARTER, "salesperson": salespeople[:1] or None}
+            build_report(name, *filter_sheet(name, cleaned[name], cube, filters)[:2])
+    blocks = [block for report in reports for block in report["blocks"]]
+
+    charts = [block["spec"] for block in blocks if block["type"] == "chart"]
+    with stage("charts"):
+        image_bytes = sum(len(draw_image(spec)) for spec in charts)  # Uncached, one by one
+
+    tables = [block["data"] for block in blocks if block["type"] == "table"]
+    with stage("serialize"):
+        table_bytes = sum(_arrow_bytes(df) for df in tables)
+    recorder.stop()
+
+    stages = {}
+    for record in recorder.records:
+        if record["depth"] == 0:  # Stages nested inside the pipeline code are summed into these
+            stages[record["stage"]] = {"wall_s": record["wall_s"], "cpu_s": record["cpu_s"]}
+            if "alloc_peak_bytes" in record:
+                stages[record["stage"]]["peak_bytes"] = record["alloc_peak_bytes"]
+
+    return {
+        "sheet_rows": {name: len(df) for name, df in cleaned.items()},
+        "charts": len(charts),
+        "chart_bytes": image_bytes,
+        "tables": len(tables),
+        "table_bytes": table_bytes,
+        "stages": stages,
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard pipeline on synthetic workbooks.")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="Comma-separated 'QT Register 2025' row counts, up to 1000000")
+    parser.add_argument("--output", default="bench.json", help="JSON report path (default: bench.json)")
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "mastersheet-bench"),
+                        help="Where generated workbooks are kept and reused between runs")
+    parser.add_argument("--engine", default=default_engine(), choices=["calamine", "openpyxl"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true",
+                        help="Skip tracemalloc (its overhead inflates timings of allocation-heavy stages)")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.workdir, exist_ok=True)
+    trace_memory = not args.no_memory
+
+    results = []
+    for rows in [int(s) for s in args.sizes.split(",")]:
+        path = os.path.join(args.workdir, f"master-{rows}-seed{args.seed}.xlsx")
+        if not os.path.exists(path):
+            print(f"Generating {rows} rows -> {path}", file=sys.stderr)
+            generate_workbook(path, rows, args.seed)
+        result = {"rows": rows, "workbook_bytes": os.path.getsize(path), **run_size(path, args.engine, trace_memory)}
+        results.append(result)
+        print(f"{rows:>9} rows: " + "  ".join(
+            f"{stage} {result['stages'][stage]['wall_s']:.2f}s" for stage in STAGES
+        ), file=sys.stderr)
+
+    report = {
+        "meta": {
+            "revision": _git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "engine": args.engine,
+            "seed": args.seed,
+            "memory_traced": trace_memory,
+            # Peak resident set size of the whole run (KiB on Linux, bytes on macOS)
+            "max_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"Results written to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,3 @@
+"""
+Data layer for the Salahuddin Softech Solutions dashboard (ingestion, caching and analysis helpers).
+"""
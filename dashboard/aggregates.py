@@ -0,0 +1,183 @@
+"""
+Aggregations shared by the reports, including the per-sheet aggregate cube that metric cards,
+tables and charts are answered from.
+"""
+import numpy as np
+import pandas as pd
+
+from dashboard.cleaning import sheet_kind
+from dashboard.indexes import FILTER_DIMENSIONS, SheetIndex
+from dashboard.timeseries import TimeSeries
+
+# Heatmap limits: keep at most this many rows/columns (the rest are bucketed into "Other")
+HEATMAP_TOP_ROWS = 15
+HEATMAP_TOP_COLS = 20
+OTHER_LABEL = "Other"
+
+
+def _top_labels(totals: pd.Series, n: int) -> list:
+    return totals.sort_values(ascending=False, kind="stable").index[:n].tolist()
+
+
+def top_n_crosstab(df: pd.DataFrame, row: str, col: str, top_rows: int = HEATMAP_TOP_ROWS,
+                   top_cols: int = HEATMAP_TOP_COLS, other_label: str = OTHER_LABEL,
+                   weights: str = None) -> pd.DataFrame:
+    """
+    Count matrix of `row` x `col` limited to the most frequent labels on each axis.
+    Counts are taken in sparse (long) form, so only label pairs that occur are ever materialised;
+    labels outside the top N are summed into an `other_label` row/column before the small dense
+    matrix is built. Rows and columns are ordered by total count, with "Other" last.
+    If `weights` is given, that column holds pre-aggregated counts to sum instead of counting rows.
+    """
+    grouped = df.groupby([row, col], observed=True, sort=False)
+    pairs = grouped[weights].sum() if weights else grouped.size()
+    if pairs.empty:
+        return pd.DataFrame()
+
+    keep_rows = _top_labels(pairs.groupby(level=0, observed=True).sum(), top_rows)
+    keep_cols = _top_labels(pairs.groupby(level=1, observed=True).sum(), top_cols)
+
+    long = pairs.rename("count").reset_index()
+    long[row] = long[row].astype(object).where(long[row].isin(keep_rows), other_label)
+    long[col] = long[col].astype(object).where(long[col].isin(keep_cols), other_label)
+    matrix = long.groupby([row, col], sort=False)["count"].sum().unstack(fill_value=0)
+
+    row_order = keep_rows + ([other_label] if other_label in matrix.index else [])
+    col_order = keep_cols + ([other_label] if other_label in matrix.columns else [])
+    return matrix.reindex(index=row_order, columns=col_order, fill_value=0).astype(int)
+
+
+# --- Aggregate cube ---
+
+# Cube dimension / measure -> source column, per sheet kind. Columns missing from a sheet are skipped.
+CUBE_COLUMNS = {
+    "qt_register_2025": {
+        "salesperson": "Sales Person", "product": "Product", "party": "Company  Name",
+        "day": "Date", "value": "Value", "id": "Quotation ID",
+    },
+    "inv_2025": {
+        "salesperson": "Sales Person", "product": "Product", "party": "PARTY NAME",
+        "day": "Date", "value": "Amount", "id": "INV No.",
+    },
+    "meeting_agenda": {"salesperson": "Action By", "day": "Date", "value": "Order Value Approx.", "id": "No:"},
+    "payment_pending": {"party": "PARTY NAME", "value": "Amount"},
+}
+CUBE_DIMENSIONS = ["salesperson", "product", "party", "day"]
+
+
+class AggregateCube:
+    """
+    Counts and value sums of one sheet grouped by (salesperson, product, party, day), built once when
+    the sheet is loaded. Every report query is answered from this table, whose size depends on the
+    number of distinct label combinations rather than on the number of rows in the sheet.
+    """
+
+    def __init__(self, table: pd.DataFrame, dimensions: list, columns: dict, has_value: bool,
+                 distinct_ids: int, rows: int):
+        self.table = table
+        self.dimensions = dimensions
+        self.columns = columns
+        self.has_value = has_value
+        self.distinct_ids = distinct_ids
+        self.rows = rows
+        self._index = None
+        self._series = None
+
+    def has(self, dimension: str) -> bool:
+        return dimension in self.dimensions
+
+    def total(self, measure: str = "count"):
+        return self.table[measure].sum()
+
+    def by(self, dimension: str, measure: str = "count") -> pd.Series:
+        """
+        Totals per label of a dimension, largest first (like value_counts; missing labels are dropped).
+        """
+        totals = self.table.groupby(dimension, observed=True)[measure].sum()
+        totals.index = totals.index.astype(object)  # Plain labels, so charts don't draw unused categories
+        return totals.sort_values(ascending=False, kind="stable")
+
+    def frame_by(self, dimension: str, value_name: str, measure: str = "count") -> pd.DataFrame:
+        """
+        `by()` as a two-column table: the sheet's column name for the dimension, then `value_name`.
+        """
+        totals = self.by(dimension, measure)
+        return totals.rename_axis(self.columns[dimension]).reset_index(name=value_name)
+
+    def nunique(self, dimension: str) -> int:
+        return self.table[dimension].nunique()
+
+    def series(self) -> TimeSeries:
+        """
+        Prefix-summed daily series of the cube (see dashboard.timeseries), built on first use.
+        """
+        if self._series is None:
+            self._series = TimeSeries.from_table(self.table)
+        return self._series
+
+    def trend(self, granularity: str = "M", measure: str = "count") -> pd.Series:
+        """
+        Totals per day, week, month or quarter ("D", "W", "M", "Q"), indexed by period.
+        """
+        return self.series().binned(granularity, measure)
+
+    def cumulative(self, measure: str = "count") -> pd.Series:
+        return self.series().cumulative(measure)
+
+    def window(self, start, end, measure: str = "count") -> float:
+        return self.series().window(start, end, measure)
+
+    def filter_columns(self) -> dict:
+        """
+        Source column of each filterable dimension of this cube's sheet.
+        """
+        return {d: self.columns[d] for d in FILTER_DIMENSIONS if self.has(d)}
+
+    def filtered(self, filters: dict, rows: int, distinct_ids: int):
+        """
+        The cube of a filtered selection of the sheet ({dimension: (start, end) or [labels]}; see
+        dashboard.indexes). Table rows are selected through an index over the cube table built on
+        first use; `rows` and `distinct_ids` describe the selection in the sheet itself.
+        """
+        if self._index is None:
+            self._index = SheetIndex(self.table, {d: d for d in FILTER_DIMENSIONS if self.has(d)})
+        mask = self._index.mask(filters)
+        table = self.table if mask is None else self.table.iloc[np.flatnonzero(mask)].reset_index(drop=True)
+        return AggregateCube(table, self.dimensions, self.columns, self.has_value, distinct_ids, rows)
+
+    def crosstab(self, row: str, col: str, **kwargs) -> pd.DataFrame:
+        """
+        Bounded count matrix of two dimensions (see top_n_crosstab), labelled with the sheet's column names.
+        """
+        matrix = top_n_crosstab(self.table, row, col, weights="count", **kwargs)
+        return matrix.rename_axis(index=self.columns[row], columns=self.columns[col])
+
+
+def build_cube(sheet_name: str, df: pd.DataFrame):
+    """
+    Builds the aggregate cube of a cleaned sheet, or returns None for sheets without a cube layout.
+    """
+    columns = {
+        key: col for key, col in CUBE_COLUMNS.get(sheet_kind(sheet_name), {}).items() if col in df.columns
+    }
+    if not columns:
+        return None
+
+    dimensions = [d for d in CUBE_DIMENSIONS if d in columns]
+    if "day" in dimensions and not pd.api.types.is_datetime64_any_dtype(df[columns["day"]]):
+        dimensions.remove("day")
+    frame = pd.DataFrame({d: df[columns[d]] for d in dimensions}, index=df.index)
+    if "day" in dimensions:
+        frame["day"] = frame["day"].dt.normalize()
+
+    has_value = "value" in columns and pd.api.types.is_numeric_dtype(df[columns["value"]])
+    frame["value"] = df[columns["value"]].astype("float64") if has_value else 0.0  # Sum without small-int overflow
+
+    if dimensions:
+        grouped = frame.groupby(dimensions, dropna=False, observed=True, sort=False)
+        table = grouped.size().rename("count").to_frame().join(grouped["value"].sum()).reset_index()
+    else:
+        table = pd.DataFrame({"count": [len(frame)], "value": [frame["value"].sum()]})
+
+    distinct_ids = df[columns["id"]].nunique() if "id" in columns else len(df)
+    return AggregateCube(table, dimensions, columns, has_value, distinct_ids, len(df))
@@ -0,0 +1,232 @@
+"""
+Headless batch reports: builds the dashboard's sheet reports for every workbook in a directory
+(e.g. archived monthly snapshots) without a browser session, one workbook or one sheet per worker
+process. Each sheet is written as report.json plus its tables (CSV) and charts (PNG). With one job
+per sheet, the cross-sheet quote-to-cash report of a workbook is built by a follow-up job once that
+workbook's sheet jobs have finished (reading their sheets back from the shared workbook cache).
+
+    python -m dashboard.batch snapshots/ --output reports/ --workers 8 [--per-sheet] [--all-sheets]
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+from dashboard.aggregates import build_cube
+from dashboard.cache import WorkbookCache, workbook_key
+from dashboard.charts import render_png
+from dashboard.cleaning import CLEANING_VERSION, sheet_kind
+from dashboard.headers import SKIPROWS_OVERRIDES
+from dashboard.entities import entity_index
+from dashboard.ingest import list_sheets
+from dashboard.joins import JOIN_KINDS, link_sheets
+from dashboard.loader import load_sheets, workbook_sheet_names
+from dashboard.report import build_report, quote_to_cash_report
+
+INDEX_FILE = "index.json"
+QUOTE_TO_CASH_DIR = "_quote-to-cash"
+
+
+def find_workbooks(directory: str) -> list:
+    """
+    All .xlsx files below `directory`, skipping Excel's ~$ lock files.
+    """
+    paths = []
+    for root, _, files in os.walk(directory):
+        paths += [os.path.join(root, f) for f in files if f.lower().endswith(".xlsx") and not f.startswith("~$")]
+    return sorted(paths)
+
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "-", name).strip("-") or "sheet"
+
+
+def _plain(value):
+    # JSON-safe scalars (numpy numbers, timestamps)
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    return value
+
+
+def write_report(report: dict, directory: str) -> dict:
+    """
+    Writes a report's tables and charts next to a report.json describing every block.
+    Returns the JSON document.
+    """
+    os.makedirs(directory, exist_ok=True)
+    blocks, tables, charts = [], 0, 0
+    for block in report["blocks"]:
+        block = dict(block)
+        if block["type"] == "metrics":
+            block["items"] = [
+                {"label": m["label"], "value": _plain(m["value"]), "display": m["format"].format(m["value"])}
+                for m in block["items"]
+            ]
+        elif block["type"] == "table":
+            tables += 1
+            data = block.pop("data")
+            block["file"] = f"table-{tables}.csv"
+            block["rows"] = len(data)
+            data.to_csv(os.path.join(directory, block["file"]), index=False)
+        elif block["type"] == "chart":
+            charts += 1
+            spec = block.pop("spec")
+            block["file"] = f"chart-{charts}.png"
+            block["title"] = spec["params"]["title"]
+            block["kind"] = spec["kind"]
+            with open(os.path.join(directory, block["file"]), "wb") as fh:
+                fh.write(render_png(spec))
+        blocks.append(block)
+
+    document = {"sheet": report["sheet"], "title": report["title"], "blocks": blocks}
+    with open(os.path.join(directory, "report.json"), "w", encoding="utf-8") as fh:
+        json.dump(document, fh, indent=2, default=str)
+    return document
+
+
+def report_workbook(path: str, output: str, sheet_names: list = None, all_sheets: bool = False,
+                    cache_dir: str = None) -> dict:
+    """
+    Worker job: loads (through the shared workbook cache), cleans and reports the given sheets of
+    one workbook, or all of its known sheets. Returns a JSON-safe summary of the job.
+    """
+    start = time.perf_counter()
+    with open(path, "rb") as fh:
+        data = fh.read()
+    cache = WorkbookCache(cache_dir) if cache_dir else WorkbookCache()
+    key = workbook_key(data, SKIPROWS_OVERRIDES, CLEANING_VERSION)
+    if sheet_names is None:
+        sheet_names = [n for n in workbook_sheet_names(data, cache, key) if all_sheets or sheet_kind(n)]
+
+    # Jobs already run one per process, so each parses its sheets serially rather than starting an ingest pool
+    sheets, timings = load_sheets(data, sheet_names, SKIPROWS_OVERRIDES, cache, key, workers=1)
+    written = []
+    for sheet_name, df in sheets.items():
+        report = build_report(sheet_name, df, build_cube(sheet_name, df))
+        directory = os.path.join(output, _slug(sheet_name))
+        write_report(report, directory)
+        written.append({"sheet": sheet_name, "directory": directory, "rows": len(df),
+                        "parse_seconds": timings.get(sheet_name)})
+
+    entry = _write_quote_to_cash(sheets, key, output)
+    if entry is not None:
+        written.append(entry)
+    return {"workbook": path, "sheets": written, "seconds": time.perf_counter() - start}
+
+
+def _write_quote_to_cash(sheets: dict, key: str, output: str):
+    resolver = entity_index(key)
+    links = link_sheets(sheets, resolver)
+    if links is None:
+        return None
+    directory = os.path.join(output, QUOTE_TO_CASH_DIR)
+    write_report(quote_to_cash_report(links), directory)
+    return {"sheet": None, "report": "quote-to-cash", "directory": directory, "name_resolution": resolver.stats()}
+
+
+def _join_sheet_names(sheet_names: list) -> list:
+    return [n for n in sheet_names if sheet_kind(n) in JOIN_KINDS]
+
+
+def report_quote_to_cash(path: str, output: str, sheet_names: list, cache_dir: str = None) -> dict:
+    """
+    Worker job: builds only the quote-to-cash report of a workbook from its join sheets (the
+    follow-up to the per-sheet jobs of that workbook, whose sheets it finds in the workbook cache).
+    """
+    start = time.perf_counter()
+    with open(path, "rb") as fh:
+        data = fh.read()
+    cache = WorkbookCache(cache_dir) if cache_dir else WorkbookCache()
+    key = workbook_key(data, SKIPROWS_OVERRIDES, CLEANING_VERSION)
+    sheets, _ = load_sheets(data, _join_sheet_names(sheet_names), SKIPROWS_OVERRIDES, cache, key, workers=1)
+    entry = _write_quote_to_cash(sheets, key, output)
+    return {"workbook": path, "sheets": [entry] if entry is not None else [], "seconds": time.perf_counter() - start}
+
+
+def run_batch(directory: str, output: str, workers: int = None, per_sheet: bool = False,
+              all_sheets: bool = False, cache_dir: str = None) -> list:
+    """
+    Reports every workbook below `directory` into `output/<workbook>/<sheet>/` on a process pool,
+    one job per workbook (or per sheet with `per_sheet`, plus one quote-to-cash job per workbook
+    with at least two join sheets, submitted once its sheet jobs are done). A failing job is
+    recorded in its summary ("error") without stopping the others. Writes and returns the list
+    of job summaries.
+    """
+    jobs, summaries = [], []
+    follow_ups = {}  # workbook path -> [sheet jobs left, target, join sheet names]
+    for path in find_workbooks(directory):
+        relative = os.path.splitext(os.path.relpath(path, directory))[0]
+        target = os.path.join(output, _slug(relative.replace(os.sep, "__")))
+        if per_sheet:
+            try:
+                names = [n for n in list_sheets(path) if all_sheets or sheet_kind(n)]
+            except Exception as e:  # Unreadable workbook; reported like a failed job
+                summaries.append({"workbook": path, "sheets": None, "error": f"{type(e).__name__}: {e}"})
+                print(f"FAILED: {path}", file=sys.stderr)
+                continue
+            jobs += [(path, target, [name]) for name in names]
+            joined = _join_sheet_names(names)
+            if len(joined) >= 2:
+                follow_ups[path] = [len(names), target, joined]
+        else:
+            jobs.append((path, target, None))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(report_workbook, path, target, names, all_sheets, cache_dir): (path, names)
+            for path, target, names in jobs
+        }
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                path, names = futures.pop(future)
+                try:
+                    summary = future.result()
+                except Exception as e:
+                    summary = {"workbook": path, "sheets": names, "error": f"{type(e).__name__}: {e}"}
+                summaries.append(summary)
+                print(f"{'FAILED' if 'error' in summary else 'done'}: {path}"
+                      + (f" [{', '.join(names)}]" if names else ""), file=sys.stderr)
+
+                follow_up = follow_ups.get(path)  # Popped once the quote-to-cash job is submitted
+                if follow_up is not None:
+                    follow_up[0] -= 1
+                    if not follow_up[0]:
+                        _, target, joined = follow_ups.pop(path)
+                        future = pool.submit(report_quote_to_cash, path, target, joined, cache_dir)
+                        futures[future] = (path, ["quote-to-cash"])
+
+    summaries.sort(key=lambda s: s["workbook"])
+    os.makedirs(output, exist_ok=True)
+    with open(os.path.join(output, INDEX_FILE), "w", encoding="utf-8") as fh:
+        json.dump(summaries, fh, indent=2, default=str)
+    return summaries
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Build dashboard reports for every .xlsx workbook in a directory.")
+    parser.add_argument("directory", help="Directory searched (recursively) for .xlsx workbooks")
+    parser.add_argument("-o", "--output", default="reports", help="Output directory (default: reports)")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--per-sheet", action="store_true", help="One job per sheet instead of per workbook")
+    parser.add_argument("--all-sheets", action="store_true", help="Also report sheets without a specific report")
+    parser.add_argument("--cache-dir", default=None, help="Workbook cache directory (default: MASTERSHEET_CACHE_DIR)")
+    args = parser.parse_args(argv)
+
+    summaries = run_batch(args.directory, args.output, args.workers, args.per_sheet, args.all_sheets, args.cache_dir)
+    failed = sum(1 for s in summaries if "error" in s)
+    print(f"{len(summaries) - failed} job(s) done, {failed} failed; index written to "
+          f"{os.path.join(args.output, INDEX_FILE)}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
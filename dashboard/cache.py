@@ -0,0 +1,151 @@
+"""
+Content-addressed on-disk cache of parsed (and cleaned) workbooks, shared by every session and worker process.
+Sheets are kept as memory-mapped Arrow files, so later loads and restarts never go back to openpyxl.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import uuid
+
+import pandas as pd
+
+from dashboard.columnar import read_frame, write_frame
+
+CACHE_DIR = os.environ.get("MASTERSHEET_CACHE_DIR", os.path.join(tempfile.gettempdir(), "mastersheet-cache"))
+CACHE_MAX_BYTES = int(os.environ.get("MASTERSHEET_CACHE_MAX_MB", "512")) * 1024 * 1024
+
+# Bump whenever the on-disk sheet format or the parsed sheets change, so entries written by older code are not read
+CACHE_FORMAT = "3"
+
+MANIFEST = "manifest.json"
+ROW_HASHES_SUFFIX = "\x00row-hashes"  # Stored like a sheet; cannot clash with a real sheet name
+
+
+def workbook_key(data: bytes, skiprows_map: dict = None, version: str = "") -> str:
+    """
+    Hashes the uploaded bytes together with the parse settings (and the version of the
+    processing applied before caching), so the same workbook uploaded by different sessions
+    maps to the same cache entry.
+    """
+    digest = hashlib.sha256(data)
+    digest.update(json.dumps(skiprows_map or {}, sort_keys=True).encode("utf-8"))
+    digest.update(version.encode("utf-8"))
+    digest.update(CACHE_FORMAT.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def _sheet_file(sheet_name: str) -> str:
+    # Sheet names may contain characters that are not valid in file names
+    return hashlib.sha1(sheet_name.encode("utf-8")).hexdigest()[:16] + ".arrow"
+
+
+class WorkbookCache:
+    """
+    One directory per workbook key holding a manifest of sheet names and one file per sheet.
+    Sheets are added individually as they are first loaded, every file is published with an
+    atomic rename, recency is tracked through the directory mtime and the least recently used
+    entries are evicted once the cache grows past `max_bytes`.
+    """
+
+    def __init__(self, directory: str = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _entry(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def sheet_names(self, key: str):
+        """
+        Returns the cached sheet list of a workbook, or None on a miss.
+        """
+        try:
+            with open(os.path.join(self._entry(key), MANIFEST), encoding="utf-8") as fh:
+                return json.load(fh)["sheets"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def put_sheet_names(self, key: str, sheet_names: list):
+        entry = self._entry(key)
+        try:
+            os.makedirs(entry, exist_ok=True)
+            staging = os.path.join(entry, f".{MANIFEST}.{uuid.uuid4().hex}")
+            with open(staging, "w", encoding="utf-8") as fh:
+                json.dump({"sheets": list(sheet_names)}, fh)
+            os.replace(staging, os.path.join(entry, MANIFEST))
+        except OSError:
+            pass  # The cache is best-effort; a concurrent eviction is not an error
+
+    def get_sheet(self, key: str, sheet_name: str):
+        """
+        Returns a cached sheet, or None on a miss.
+        """
+        entry = self._entry(key)
+        try:
+            df = read_frame(os.path.join(entry, _sheet_file(sheet_name)))
+            os.utime(entry)  # Mark as recently used
+        except (OSError, ValueError):
+            # Missing, half-evicted or unreadable files are treated as a miss
+            return None
+        return df
+
+    def put_sheet(self, key: str, sheet_name: str, df):
+        """
+        Stores one sheet under `key` and evicts old entries if the size cap is exceeded.
+        """
+        entry = self._entry(key)
+        try:
+            os.makedirs(entry, exist_ok=True)
+            write_frame(os.path.join(entry, _sheet_file(sheet_name)), df)
+            os.utime(entry)
+        except (OSError, TypeError):
+            # A sheet holding values the columnar format cannot keep exactly is not cached
+            return
+        self.evict()
+
+    def get_row_hashes(self, key: str, sheet_name: str):
+        """
+        Returns the raw row hashes recorded for a sheet (see dashboard.refresh), or None on a miss.
+        """
+        frame = self.get_sheet(key, sheet_name + ROW_HASHES_SUFFIX)
+        return None if frame is None else frame["hash"].to_numpy()
+
+    def put_row_hashes(self, key: str, sheet_name: str, hashes):
+        self.put_sheet(key, sheet_name + ROW_HASHES_SUFFIX, pd.DataFrame({"hash": hashes}))
+
+    def evict(self):
+        """
+        Removes least recently used entries until the cache fits in `max_bytes`.
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.startswith(".") or not os.path.isdir(path):
+                continue
+            try:
+                entries.append((os.path.getmtime(path), _dir_size(path), path))
+            except OSError:
+                continue
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+    def stats(self) -> dict:
+        entries = [n for n in os.listdir(self.directory) if not n.startswith(".")]
+        return {"entries": len(entries), "bytes": _dir_size(self.directory), "max_bytes": self.max_bytes}
@@ -0,0 +1,397 @@
+"""
+Chart layer. Charts are described as backend-neutral specs over small aggregated frames and can be
+rendered server-side with matplotlib (once to PNG bytes, cached by a hash of the data, parameters
+and style; batches of charts render concurrently on a process pool) or handed to the browser as
+Vega-Lite (Altair) or Plotly JSON.
+"""
+import hashlib
+import io
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import matplotlib
+matplotlib.use("Agg")  # Server-side rendering only; no GUI backend
+import matplotlib.style
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import pandas as pd
+import seaborn as sns
+
+from dashboard.profiling import stage
+
+# Dark theme matching the dashboard CSS, applied per render through rc_context
+CHART_STYLE = {
+    'axes.facecolor': '#294242', # secondary-bg
+    'figure.facecolor': '#294242', # secondary-bg
+    'savefig.facecolor': '#294242',
+    'text.color': 'white',
+    'axes.labelcolor': 'white',
+    'xtick.color': 'white',
+    'ytick.color': 'white',
+    'grid.color': '#3b5e5e', # border-color
+    'grid.linestyle': '--',
+    'grid.linewidth': 0.5,
+    'axes.edgecolor': '#3b5e5e',
+    'boxplot.boxprops.color': 'white',
+    'boxplot.whiskerprops.color': 'white',
+    'boxplot.capprops.color': 'white',
+    'boxplot.medianprops.color': 'white',
+    'patch.edgecolor': 'white',
+}
+CHART_DPI = 100
+
+# Full rc settings of a render: matplotlib's dark_background style overridden by the dashboard theme
+_RENDER_RC = {**matplotlib.style.library['dark_background'], **CHART_STYLE}
+
+# Heatmaps larger than this are drawn without per-cell text (one text artist per cell is the slow part)
+MAX_ANNOTATED_CELLS = 400
+
+CHART_BACKENDS = ("matplotlib", "altair", "plotly")
+DEFAULT_CHART_BACKEND = os.environ.get("MASTERSHEET_CHART_BACKEND", "matplotlib")
+
+# Matplotlib palette names -> closest Vega and Plotly colour schemes
+VEGA_SCHEMES = {
+    'viridis': 'viridis', 'magma': 'magma', 'GnBu': 'greenblue', 'Spectral': 'spectral',
+    'coolwarm': 'redblue', 'YlGnBu': 'yellowgreenblue',
+}
+PLOTLY_SCALES = {
+    'viridis': 'Viridis', 'magma': 'Magma', 'GnBu': 'GnBu', 'Spectral': 'Spectral',
+    'coolwarm': 'RdBu_r', 'YlGnBu': 'YlGnBu',
+}
+
+CHART_CACHE_MAX_BYTES = int(os.environ.get("MASTERSHEET_CHART_CACHE_MB", "64")) * 1024 * 1024
+
+# Worker processes for rendering batches of charts (1 renders them one by one in this process)
+CHART_WORKERS = int(os.environ.get("MASTERSHEET_CHART_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+_CHART_CACHE = OrderedDict()
+_CHART_CACHE_BYTES = 0
+_CHART_CACHE_LOCK = threading.Lock()
+
+# rcParams are process-global, so renders in this process (one per session thread) take turns
+_RENDER_LOCK = threading.Lock()
+_POOLS = {}  # workers -> ProcessPoolExecutor
+_POOL_LOCK = threading.Lock()
+
+
+def data_hash(data) -> str:
+    """
+    Content hash of a DataFrame or Series (values, index and column names).
+    """
+    digest = hashlib.sha1(pd.util.hash_pandas_object(data, index=True).values.tobytes())
+    names = list(data.columns) if isinstance(data, pd.DataFrame) else [data.name]
+    digest.update(repr(names).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _style_hash() -> str:
+    return hashlib.sha1(repr(sorted(CHART_STYLE.items())).encode("utf-8")).hexdigest()
+
+
+def _cache_get(key):
+    with _CHART_CACHE_LOCK:
+        image = _CHART_CACHE.get(key)
+        if image is not None:
+            _CHART_CACHE.move_to_end(key)
+        return image
+
+
+def _cache_put(key, image: bytes):
+    global _CHART_CACHE_BYTES
+    with _CHART_CACHE_LOCK:
+        if key in _CHART_CACHE:
+            return
+        _CHART_CACHE[key] = image
+        _CHART_CACHE_BYTES += len(image)
+        while _CHART_CACHE_BYTES > CHART_CACHE_MAX_BYTES and len(_CHART_CACHE) > 1:
+            _, evicted = _CHART_CACHE.popitem(last=False)
+            _CHART_CACHE_BYTES -= len(evicted)
+
+
+def chart_cache_stats() -> dict:
+    with _CHART_CACHE_LOCK:
+        return {"charts": len(_CHART_CACHE), "bytes": _CHART_CACHE_BYTES, "max_bytes": CHART_CACHE_MAX_BYTES}
+
+
+def _chart_key(spec: dict, fmt: str) -> tuple:
+    return (spec["kind"], data_hash(spec["data"]), repr(sorted(spec["params"].items())), tuple(spec["figsize"]),
+            fmt, _style_hash())
+
+
+def draw_image(spec: dict, fmt: str = "png") -> bytes:
+    """
+    Draws a chart spec to image bytes on its own Figure and Agg canvas. pyplot is never involved, so
+    no figure manager, current figure or style is left behind; the rc settings only apply inside
+    the rc_context. Also the entry point of the render worker processes.
+    """
+    with matplotlib.rc_context(_RENDER_RC):
+        fig = Figure(figsize=spec["figsize"])
+        FigureCanvasAgg(fig)
+        ax = fig.subplots()
+        _DRAWERS[spec["kind"]](fig, ax, spec["data"], **spec["params"])
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=fmt, dpi=CHART_DPI, bbox_inches='tight')
+    return buffer.getvalue()
+
+
+def render_png(spec: dict, fmt: str = "png") -> bytes:
+    """
+    Returns the image bytes for a chart spec, rendering it only on a cache miss.
+    """
+    key = _chart_key(spec, fmt)
+    image = _cache_get(key)
+    if image is None:
+        with stage("chart render", title=spec["params"].get("title")), _RENDER_LOCK:
+            image = draw_image(spec, fmt)
+        _cache_put(key, image)
+    return image
+
+
+def _render_pool(workers: int) -> ProcessPoolExecutor:
+    with _POOL_LOCK:
+        pool = _POOLS.get(workers)
+        if pool is None:
+            # Spawned rather than forked: the Streamlit server process runs many threads
+            pool = _POOLS[workers] = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return pool
+
+
+def _reset_pool(workers: int = None):
+    # Shuts down the pool with `workers` processes (all pools when None); the next batch starts a new one
+    with _POOL_LOCK:
+        sizes = list(_POOLS) if workers is None else [workers]
+        for size in sizes:
+            pool = _POOLS.pop(size, None)
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+
+def render_many(specs: list, fmt: str = "png", workers: int = None):
+    """
+    Renders a batch of independent chart specs, yielding (index, image bytes) as each one is ready:
+    cached charts first, then the rest as the worker processes finish them (in any order).
+    Charts a worker failed on, and all remaining ones if the pool broke, are rendered in this process.
+    """
+    workers = CHART_WORKERS if workers is None else workers
+    misses = []
+    for index, spec in enumerate(specs):
+        key = _chart_key(spec, fmt)
+        image = _cache_get(key)
+        if image is None:
+            misses.append((index, key, spec))
+        else:
+            yield index, image
+
+    rendered = set()
+    if workers > 1 and len(misses) > 1:
+        futures = {}
+        try:
+            pool = _render_pool(workers)
+            futures = {pool.submit(draw_image, spec, fmt): (index, key, spec) for index, key, spec in misses}
+            for future in as_completed(futures):
+                index, key, spec = futures[future]
+                try:
+                    with stage("chart render (worker)", title=spec["params"].get("title")):
+                        image = future.result()
+                except BrokenProcessPool:
+                    raise
+                except Exception:
+                    continue  # Rendered again below, where a real error surfaces with its traceback
+                _cache_put(key, image)
+                rendered.add(index)
+                yield index, image
+        except BrokenProcessPool:
+            _reset_pool(workers)  # Workers died (e.g. out of memory); the remaining charts are rendered here
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+    for index, _, spec in misses:
+        if index not in rendered:
+            yield index, render_png(spec, fmt)
+
+
+# --- Matplotlib drawing ---
+
+def _draw_bar(fig, ax, data, x, y, title, xlabel, ylabel, palette):
+    # Bars are horizontal, so the palette runs over the labels on y (one color per bar, no legend)
+    sns.barplot(x=x, y=y, data=data, hue=y, palette=palette, legend=False, ax=ax)
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+
+
+def _draw_line(fig, ax, data, x, y, title, xlabel, ylabel, color):
+    sns.lineplot(x=x, y=y, data=data, marker='o', color=color, ax=ax)
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.tick_params(axis='x', labelrotation=45)
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment('right')
+
+
+def _draw_heatmap(fig, ax, data, title, xlabel, ylabel, annotate):
+    sns.heatmap(data, annot=annotate, fmt="d", cmap="YlGnBu", linewidths=.5, ax=ax)
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.tick_params(axis='x', labelrotation=90)
+    ax.tick_params(axis='y', labelrotation=0)
+    fig.tight_layout() # Adjust layout to prevent labels overlapping
+
+
+def _draw_hist(fig, ax, data, title, xlabel, ylabel, color):
+    sns.histplot(data, kde=True, ax=ax, color=color)
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+
+
+_DRAWERS = {"bar": _draw_bar, "line": _draw_line, "heatmap": _draw_heatmap, "hist": _draw_hist}
+
+
+# --- Client-side backends ---
+
+def _vega_field(column) -> str:
+    # Vega-Lite reads '.' and '[...]' in field names as nested-field paths unless escaped
+    name = str(column)
+    for char in ("\\", ".", "[", "]"):
+        name = name.replace(char, "\\" + char)
+    return name
+
+
+def _vega_channel(channel, data: pd.DataFrame, column, **kwargs):
+    """
+    An Altair encoding channel for a data column, given by field and type rather than by a
+    shorthand string (which would also parse ':' and aggregates out of the column label).
+    """
+    from altair.utils.core import infer_vegalite_type_for_pandas
+
+    return channel(field=_vega_field(column), type=infer_vegalite_type_for_pandas(data[column]), **kwargs)
+
+
+def altair_chart(spec: dict):
+    """
+    Builds a Vega-Lite chart (rendered in the browser) from a chart spec.
+    """
+    import altair as alt
+
+    kind, data, p = spec["kind"], spec["data"], spec["params"]
+    if kind == "bar":
+        chart = alt.Chart(data).mark_bar().encode(
+            x=_vega_channel(alt.X, data, p["x"], title=p["xlabel"]),
+            y=_vega_channel(alt.Y, data, p["y"], title=p["ylabel"], sort=None),
+            color=_vega_channel(alt.Color, data, p["x"], legend=None,
+                                scale=alt.Scale(scheme=VEGA_SCHEMES.get(p["palette"], "viridis"))),
+            tooltip=[_vega_channel(alt.Tooltip, data, p["y"]), _vega_channel(alt.Tooltip, data, p["x"])],
+        )
+    elif kind == "line":
+        chart = alt.Chart(data).mark_line(point=True, color=p["color"]).encode(
+            x=_vega_channel(alt.X, data, p["x"], title=p["xlabel"]),
+            y=_vega_channel(alt.Y, data, p["y"], title=p["ylabel"]),
+            tooltip=[_vega_channel(alt.Tooltip, data, p["x"]), _vega_channel(alt.Tooltip, data, p["y"])],
+        )
+    elif kind == "heatmap":
+        long = data.rename_axis(index=p["ylabel"], columns=p["xlabel"]).stack().rename("Count").reset_index()
+        x = alt.X(field=_vega_field(p["xlabel"]), type="nominal", title=p["xlabel"])
+        y = alt.Y(field=_vega_field(p["ylabel"]), type="nominal", title=p["ylabel"])
+        base = alt.Chart(long).encode(x=x, y=y)
+        chart = base.mark_rect().encode(
+            color=alt.Color("Count:Q", scale=alt.Scale(scheme="yellowgreenblue")),
+            tooltip=[
+                alt.Tooltip(field=_vega_field(p["ylabel"]), type="nominal"),
+                alt.Tooltip(field=_vega_field(p["xlabel"]), type="nominal"),
+                alt.Tooltip("Count:Q"),
+            ],
+        )
+        if p["annotate"]:
+            chart = chart + base.mark_text(color="black").encode(text="Count:Q")
+    elif kind == "hist":
+        frame = data.to_frame(name=p["xlabel"])
+        chart = alt.Chart(frame).mark_bar(color=p["color"]).encode(
+            x=alt.X(field=_vega_field(p["xlabel"]), type="quantitative", bin=alt.Bin(maxbins=30), title=p["xlabel"]),
+            y=alt.Y("count()", title=p["ylabel"]),
+        )
+    else:
+        raise ValueError(f"Unknown chart kind: {kind!r}")
+
+    return chart.properties(title=p["title"], background=CHART_STYLE['figure.facecolor']).configure_axis(
+        labelColor='white', titleColor='white', gridColor=CHART_STYLE['grid.color']
+    ).configure_title(color='white').configure_view(stroke=None)
+
+
+def plotly_figure(spec: dict):
+    """
+    Builds a Plotly figure (serialized to JSON and rendered in the browser) from a chart spec.
+    """
+    import plotly.express as px
+
+    kind, data, p = spec["kind"], spec["data"], spec["params"]
+    if kind == "bar":
+        fig = px.bar(
+            data, x=p["x"], y=p["y"], orientation='h', color=p["x"],
+            color_continuous_scale=PLOTLY_SCALES.get(p["palette"], "Viridis"),
+        )
+        fig.update_yaxes(autorange="reversed")  # Keep the first row on top, as in the tables
+        fig.update_coloraxes(showscale=False)
+    elif kind == "line":
+        fig = px.line(data, x=p["x"], y=p["y"], markers=True)
+        fig.update_traces(line_color=p["color"])
+    elif kind == "heatmap":
+        fig = px.imshow(data, text_auto=p["annotate"], aspect="auto", color_continuous_scale="YlGnBu")
+    elif kind == "hist":
+        fig = px.histogram(data, nbins=30)
+        fig.update_traces(marker_color=p["color"])
+        fig.update_layout(showlegend=False)
+    else:
+        raise ValueError(f"Unknown chart kind: {kind!r}")
+
+    fig.update_layout(
+        title=p["title"], xaxis_title=p["xlabel"], yaxis_title=p["ylabel"], template="plotly_dark",
+        paper_bgcolor=CHART_STYLE['figure.facecolor'], plot_bgcolor=CHART_STYLE['axes.facecolor'],
+    )
+    return fig
+
+
+# --- Chart specs ---
+
+def _spec(kind: str, data, figsize: tuple, **params) -> dict:
+    return {"kind": kind, "data": data, "figsize": figsize, "params": params}
+
+
+def bar_chart(data: pd.DataFrame, x: str, y: str, title: str, xlabel: str, ylabel: str,
+              palette: str = 'viridis', figsize: tuple = (10, 6)) -> dict:
+    """
+    Horizontal bar chart of an aggregated table (one bar per row, in row order).
+    """
+    return _spec("bar", data, figsize, x=x, y=y, title=title, xlabel=xlabel, ylabel=ylabel, palette=palette)
+
+
+def line_chart(data: pd.DataFrame, x: str, y: str, title: str, xlabel: str, ylabel: str,
+               color: str = 'purple', figsize: tuple = (10, 6)) -> dict:
+    return _spec("line", data, figsize, x=x, y=y, title=title, xlabel=xlabel, ylabel=ylabel, color=color)
+
+
+def heatmap_chart(data: pd.DataFrame, title: str, xlabel: str, ylabel: str, figsize: tuple = None) -> dict:
+    """
+    Heatmap of a wide count matrix (rows on the y axis, columns on the x axis). Cells are only
+    annotated up to MAX_ANNOTATED_CELLS; the default figure size grows with the matrix, so the
+    matrix should already be bounded (see aggregates.top_n_crosstab).
+    """
+    if figsize is None:
+        figsize = (14, len(data.index) * 0.7 + len(data.columns) * 0.2 + 2) # Dynamic sizing
+    return _spec("heatmap", data, figsize, title=title, xlabel=xlabel, ylabel=ylabel,
+                 annotate=data.size <= MAX_ANNOTATED_CELLS)
+
+
+def hist_chart(data: pd.Series, title: str, xlabel: str, ylabel: str,
+               color: str = 'teal', figsize: tuple = (10, 6)) -> dict:
+    return _spec("hist", data, figsize, title=title, xlabel=xlabel, ylabel=ylabel, color=color)
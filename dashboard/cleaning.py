@@ -0,0 +1,203 @@
+"""
+Per-sheet cleaning pipeline. Cleaning is pure (the raw frame is never modified); cleaned sheets are
+reused through the workbook cache and the shared frame store, so reruns never clean a sheet again.
+Cleaned sheets finish with a dtype normalization pass (categoricals, downcast numerics).
+"""
+import datetime
+
+import numpy as np
+import pandas as pd
+
+# Bump whenever a cleaner changes, so cached cleaned sheets from older code are not reused
+CLEANING_VERSION = "5"
+
+# Formats accepted for dates typed as text, tried in order. The registers are kept day-first
+# (e.g. 05/03/2025 is 5 March); year-first spellings are listed so they are never read day-first.
+TEXT_DATE_FORMATS = [
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d",
+    "%Y/%m/%d %H:%M:%S",
+    "%Y/%m/%d",
+    "%Y.%m.%d",
+    "%d/%m/%Y",
+    "%d/%m/%Y %H:%M:%S",
+    "%d-%m-%Y",
+    "%d.%m.%Y",
+    "%d/%m/%y",
+    "%d-%m-%y",
+    "%d.%m.%y",
+    "%d %b %Y",
+    "%d-%b-%Y",
+    "%d %B %Y",
+    "%d-%B-%Y",
+    "%d %b %y",
+    "%d-%b-%y",
+]
+# Text in none of the formats above is parsed on its own (day-first) if it has a day, a month and
+# a year, e.g. 'March 5, 2025'; anything else (e.g. 'TBD', '1.5') is treated as missing
+DATE_LIKE_TEXT = r"^\s*\w+[\s/.,\-]+\w+[\s/.,\-]+\w+"
+
+# Text columns with at most this share of distinct values are stored as 'category'
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+# Substring of the sheet name -> sheet kind, checked in order (same matching the dashboard uses)
+SHEET_KINDS = [
+    ("QT Register 2025", "qt_register_2025"),
+    ("2025 INV", "inv_2025"),
+    ("Meeting Agenda", "meeting_agenda"),
+    ("Payment Pending", "payment_pending"),
+    ("Quotation Register 2023", "quotation_register_2023"),
+]
+
+def sheet_kind(sheet_name: str):
+    """
+    Returns the kind of a sheet from its name, or None for sheets without specific handling.
+    """
+    for keyword, kind in SHEET_KINDS:
+        if keyword in sheet_name:
+            return kind
+    return None
+
+
+# --- Shared cleaning steps ---
+
+def parse_dates(series: pd.Series, clean_text=None, formats: list = None) -> pd.Series:
+    """
+    Vectorized replacement for pd.to_datetime(series.astype(str), errors='coerce').
+    Only the distinct values are converted: cells that already hold dates are kept and text is
+    parsed against `formats` (TEXT_DATE_FORMATS by default), the first matching format winning,
+    and date-like text in no format is parsed value by value with dayfirst=True, so a value parses
+    the same way wherever it appears in the column. `clean_text` is applied to the distinct text
+    values before parsing. Unparseable values become NaT.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    codes, uniques = pd.factorize(series)
+    values = pd.Series(uniques, dtype=object)
+    is_date = values.map(lambda v: isinstance(v, (datetime.date, np.datetime64)))
+
+    parsed = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+    if is_date.any():
+        parsed[is_date] = pd.to_datetime(values[is_date], errors='coerce')
+    text = values[~is_date].astype(str)
+    if clean_text is not None:
+        text = clean_text(text)
+    for fmt in formats or TEXT_DATE_FORMATS:
+        if text.empty:
+            break
+        dates = pd.to_datetime(text, format=fmt, errors='coerce')
+        matched = dates.notna()
+        parsed[matched[matched].index] = dates[matched]
+        text = text[~matched]
+    for index, value in text[text.str.match(DATE_LIKE_TEXT)].items():
+        date = pd.to_datetime(value, dayfirst=True, errors='coerce')
+        if date is not pd.NaT and date.tzinfo is None:
+            parsed[index] = date
+
+    result = parsed.to_numpy()[codes]
+    result[codes == -1] = np.datetime64("NaT")
+    return pd.Series(result, index=series.index, name=series.name)
+
+
+def normalize_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Shrinks a cleaned sheet: low-cardinality text columns become 'category', numeric columns whose
+    values are all whole numbers are stored as the smallest integer type and other float columns as
+    float32 where that is lossless. The result depends only on the values, not on the dtypes they
+    arrive in, so a sheet assembled from parts (see dashboard.refresh) normalizes like a whole one.
+    """
+    df = df.copy()
+    for col in df.columns:
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            series = series.astype(series.cat.categories.dtype)
+        if pd.api.types.is_string_dtype(series):
+            if pd.api.types.infer_dtype(series, skipna=True) != 'string':
+                continue  # Mixed-type columns stay as they are
+            series = series.astype('str')
+            if len(series) and series.nunique() <= CATEGORY_MAX_UNIQUE_RATIO * len(series):
+                series = series.astype('category')
+            df[col] = series
+        elif pd.api.types.is_bool_dtype(series):
+            continue
+        elif pd.api.types.is_integer_dtype(series):
+            df[col] = pd.to_numeric(series, downcast='integer')
+        elif pd.api.types.is_float_dtype(series):
+            whole = series.notna().all() and (series % 1 == 0).all() and (series.abs() < 2 ** 53).all()
+            if len(series) and whole:
+                df[col] = pd.to_numeric(series.astype('int64'), downcast='integer')
+                continue
+            downcast = series.astype('float32')
+            if (downcast.astype('float64') == series)[series.notna()].all():
+                df[col] = downcast
+            else:
+                df[col] = series.astype('float64')
+    return df
+
+
+# --- Per-sheet cleaners ---
+
+def _fix_double_slash(text: pd.Series) -> pd.Series:
+    return text.str.replace('//', '/', regex=False)
+
+
+def clean_qt_register_2025(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    df['Date'] = parse_dates(df['Date'], clean_text=_fix_double_slash)
+    df = df.dropna(subset=['Date'])
+
+    # Strip leading/trailing spaces from categorical columns
+    for col in ['Company  Name', 'Product', 'Sales Person']:
+        if col in df.columns:
+            df[col] = df[col].astype(str).str.strip()
+    return df
+
+
+def clean_2025_inv(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    df['Date'] = parse_dates(df['Date'])
+    df = df.dropna(subset=['Date'])
+    df.columns = df.columns.str.strip()  # Clean column names
+    return df
+
+
+def clean_meeting_agenda(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    df['Order Value Approx.'] = pd.to_numeric(
+        df['Order Value Approx.'].astype(str).str.replace(',', ''), errors='coerce'
+    )
+    df['Date'] = parse_dates(df['Date'])
+    df = df.dropna(subset=['Date', 'Order Value Approx.'])
+    df.columns = df.columns.str.strip()
+    return df
+
+
+def clean_payment_pending(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    df['Amount'] = pd.to_numeric(df['Amount'], errors='coerce')
+    df = df.dropna(subset=['Amount', 'PARTY NAME'])
+    df.columns = df.columns.str.strip()
+    return df
+
+
+CLEANERS = {
+    "qt_register_2025": clean_qt_register_2025,
+    "inv_2025": clean_2025_inv,
+    "meeting_agenda": clean_meeting_agenda,
+    "payment_pending": clean_payment_pending,
+}
+
+
+def clean_sheet(sheet_name: str, df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Returns the cleaned version of a raw sheet; sheets without a cleaner are returned unchanged.
+    """
+    cleaner = CLEANERS.get(sheet_kind(sheet_name))
+    if cleaner is None:
+        return df
+    return normalize_dtypes(cleaner(df))
+
+    cleaned = normalize_dtypes(cleaner(df))
+    with _CLEAN_CACHE_LOCK:
+        _CLEAN_CACHE[key] = cleaned
+    return cleaned
@@ -0,0 +1,184 @@
+"""
+Columnar persistence for sheets: uncompressed Arrow IPC files that are memory-mapped on read.
+"""
+import datetime
+import json
+import os
+import uuid
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# Schema metadata: the original column labels, and the columns stored in the mixed-type encoding
+COLUMNS_META = b"mastersheet.columns"
+MIXED_META = b"mastersheet.mixed"
+
+# --- Mixed-type columns ---
+# Excel sheets often mix numbers, dates and text in a column (e.g. an 'Amount' with 'TBD' rows).
+# Such a column is stored as a struct with one child per Python type plus a per-row tag naming
+# the child that holds the value, so a cached sheet reads back with exactly the values of a cold load.
+MIXED_TAGS = ["none", "nat", "bool", "int", "float", "str", "datetime", "timestamp", "date", "time", "timedelta"]
+MIXED_CHILDREN = {
+    "bool": pa.bool_(),
+    "int": pa.int64(),
+    "float": pa.float64(),
+    "str": pa.string(),
+    "datetime": pa.timestamp("us"),
+    "timestamp": pa.timestamp("ns"),
+    "date": pa.date32(),
+    "time": pa.time64("us"),
+    "timedelta": pa.duration("us"),
+}
+_TAG_CODES = {name: code for code, name in enumerate(MIXED_TAGS)}
+
+
+def _mixed_tag(value) -> str:
+    # Order matters: bool is an int, Timestamp a datetime and datetime a date
+    if value is None:
+        return "none"
+    if value is pd.NaT:
+        return "nat"
+    if isinstance(value, (bool, np.bool_)):
+        return "bool"
+    if isinstance(value, (int, np.integer)):
+        return "int"
+    if isinstance(value, (float, np.floating)):
+        return "float"
+    if isinstance(value, str):
+        return "str"
+    if isinstance(value, pd.Timestamp):
+        return "timestamp"
+    if isinstance(value, datetime.datetime):
+        return "datetime"
+    if isinstance(value, datetime.date):
+        return "date"
+    if isinstance(value, datetime.time):
+        return "time"
+    if isinstance(value, datetime.timedelta):
+        return "timedelta"
+    raise TypeError(f"Cannot store a {type(value).__name__} value in a mixed column")
+
+
+def _encode_mixed(values) -> pa.StructArray:
+    tags = [_mixed_tag(v) for v in values]
+    children = []
+    for name, arrow_type in MIXED_CHILDREN.items():
+        column = [v if tag == name else None for v, tag in zip(values, tags)]
+        children.append(pa.array(column, type=arrow_type, from_pandas=False))
+    codes = pa.array([_TAG_CODES[tag] for tag in tags], type=pa.int8())
+    return pa.StructArray.from_arrays([codes, *children], names=["tag", *MIXED_CHILDREN])
+
+
+def _decode_mixed(array) -> np.ndarray:
+    if isinstance(array, pa.ChunkedArray):
+        array = array.combine_chunks()
+    codes = array.field("tag").to_numpy(zero_copy_only=False)
+    out = np.empty(len(codes), dtype=object)
+    out[codes == _TAG_CODES["nat"]] = pd.NaT
+    for name in MIXED_CHILDREN:
+        rows = np.flatnonzero(codes == _TAG_CODES[name])
+        if len(rows):
+            values = array.field(name).take(pa.array(rows)).to_pylist()
+            out[rows] = np.array(values + [None], dtype=object)[:-1]  # Keep 1-d even for tuple-like values
+    return out
+
+
+# --- Column labels ---
+
+def _encode_label(label) -> list:
+    if isinstance(label, (bool, np.bool_)):
+        return ["bool", bool(label)]
+    if isinstance(label, (int, np.integer)):
+        return ["int", int(label)]
+    if isinstance(label, (float, np.floating)):
+        return ["float", repr(float(label))]
+    if isinstance(label, str):
+        return ["str", label]
+    if isinstance(label, datetime.datetime):
+        return ["datetime", pd.Timestamp(label).isoformat()]
+    raise TypeError(f"Cannot store a {type(label).__name__} column label")
+
+
+def _decode_label(tag: str, value):
+    if tag == "float":
+        return float(value)
+    if tag == "datetime":
+        return pd.Timestamp(value)
+    return value
+
+
+def _field_names(labels) -> list:
+    # Arrow needs string field names; labels that collide once stringified get a position suffix
+    names = [str(label) for label in labels]
+    if len(set(names)) < len(names):
+        names = [f"{name}#{i}" for i, name in enumerate(names)]
+    return names
+
+
+def _to_table(df: pd.DataFrame) -> pa.Table:
+    """
+    Converts a sheet to an Arrow table. Typed columns convert as usual; object columns use the
+    tagged struct encoding, and the original column labels are kept in the schema metadata.
+    Raises TypeError for values that cannot be stored faithfully.
+    """
+    out = df.copy(deep=False)
+    labels = list(df.columns)
+    out.columns = _field_names(labels)
+    mixed = {}
+    for i, col in enumerate(out.columns):
+        if out.dtypes.iloc[i] == object:
+            # Arrow would coerce these (NaN to null, ints to int64, mixed numbers to float, ...)
+            mixed[col] = _encode_mixed(out.iloc[:, i].to_numpy())
+            out[col] = pd.Series([None] * len(out), index=out.index, dtype=object)
+    table = pa.Table.from_pandas(out)
+    for col, array in mixed.items():
+        table = table.set_column(table.schema.get_field_index(col), col, array)
+    metadata = dict(table.schema.metadata or {})
+    metadata[COLUMNS_META] = json.dumps({
+        "labels": [_encode_label(label) for label in labels],
+        "dtype": str(df.columns.dtype),
+        "name": df.columns.name,
+    }).encode("utf-8")
+    metadata[MIXED_META] = json.dumps(sorted(mixed)).encode("utf-8")
+    return table.replace_schema_metadata(metadata)
+
+
+def _from_table(table: pa.Table) -> pd.DataFrame:
+    metadata = table.schema.metadata or {}
+    mixed = {}
+    for col in json.loads(metadata.get(MIXED_META, b"[]")):
+        index = table.schema.get_field_index(col)
+        mixed[col] = _decode_mixed(table.column(index))
+        table = table.set_column(index, col, pa.nulls(len(table)))
+    df = table.to_pandas(split_blocks=True)
+    for col, values in mixed.items():
+        df[col] = pd.Series(values, index=df.index, dtype=object)
+    if COLUMNS_META in metadata:
+        columns = json.loads(metadata[COLUMNS_META])
+        labels = [_decode_label(tag, value) for tag, value in columns["labels"]]
+        dtype = columns["dtype"] if columns["dtype"] in ("object", "str") else None
+        df.columns = pd.Index(labels, dtype=dtype, name=columns["name"])
+    return df
+
+
+def write_frame(path: str, df: pd.DataFrame):
+    """
+    Writes a DataFrame as an uncompressed Arrow IPC file (compression would defeat memory mapping).
+    """
+    table = _to_table(df)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"  # Unique per writer; published by rename
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+def read_frame(path: str) -> pd.DataFrame:
+    """
+    Memory-maps an Arrow IPC file. Pages come from the OS page cache, so worker processes
+    reading the same sheet share them, and null-free numeric columns are converted without a copy.
+    """
+    with pa.memory_map(path, "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    return _from_table(table)
@@ -0,0 +1,224 @@
+"""
+Company/party name resolution. Names are first reduced to join keys (dashboard.joins.normalize_names);
+keys that are still spelled differently ("Al Noor Trading" / "Al Nour Trading") are merged when they
+are similar enough. Comparing every pair of keys is quadratic, so only candidate pairs are compared:
+keys sharing enough character trigrams or the same phonetic key (a block). The index is incremental
+and cached per workbook, so a new revision only resolves the names it has not seen before.
+"""
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from difflib import SequenceMatcher
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from dashboard.joins import normalize_names
+
+# Keys at least this similar (difflib ratio) are the same entity
+MATCH_THRESHOLD = float(os.environ.get("MASTERSHEET_MATCH_THRESHOLD", "0.9"))
+# Shorter keys only match exactly (a typo in a four-letter name is usually another name)
+MIN_FUZZY_LENGTH = 6
+# Trigrams shared by more keys than this ("tra" of every "trading") are not used for blocking
+MAX_BLOCK_SIZE = 100
+# Share of a key's trigrams another key must share to become a candidate
+MIN_SHARED_GRAMS = 0.6
+# Resolved workbooks kept in memory
+ENTITY_CACHE_ENTRIES = int(os.environ.get("MASTERSHEET_ENTITY_CACHE_ENTRIES", "16"))
+
+_ENTITY_CACHE = OrderedDict()  # workbook key -> EntityIndex
+_ENTITY_CACHE_LOCK = threading.Lock()
+
+_SOUNDEX = str.maketrans("bfpvcgjkqsxzdtlmnr", "111122222222334556")
+
+
+@lru_cache(maxsize=65536)
+def soundex(word: str) -> str:
+    """
+    Four-character Soundex code of a word ("noor" and "nour" are both N600).
+    """
+    letters = re.sub(r"[^a-z]", "", word.lower())
+    if not letters:
+        return word
+    digits = letters.translate(_SOUNDEX)
+    code, last = letters[0].upper(), digits[0]
+    for letter, digit in zip(letters[1:], digits[1:]):
+        if digit.isdigit() and digit != last:
+            code += digit
+        if letter not in "hw":
+            last = digit
+    return (code + "000")[:4]
+
+
+def _grams(key: str) -> set:
+    compact = f"#{key.replace(' ', '')}#"
+    return {compact[i:i + 3] for i in range(len(compact) - 2)}
+
+
+def _phonetic(key: str) -> str:
+    return " ".join(soundex(token) for token in key.split())
+
+
+class EntityIndex:
+    """
+    Incremental name -> entity resolution. Entity ids are assigned in order of first appearance and
+    never change for a name once assigned, unless a later name links two entities (the merged
+    entity keeps the smaller id).
+    """
+
+    def __init__(self):
+        self._key_of = {}  # raw name -> join key
+        self._key_ids = {}  # join key -> key id
+        self._keys = []  # key id -> join key
+        self._parent = []  # key id -> parent key id (union-find)
+        self._key_grams = []  # key id -> trigrams
+        self._gram_postings = {}  # trigram -> key ids
+        self._phonetic_blocks = {}  # phonetic key -> key ids
+        self._lock = threading.Lock()
+        self.candidate_pairs = 0
+        self.compared_pairs = 0
+        self.merges = 0
+        self.seconds = 0.0
+        self.last_seconds = 0.0
+        self.last_new_names = 0
+
+    def copy(self):
+        """
+        Independent copy, e.g. to extend with the names of a newer revision.
+        """
+        with self._lock:
+            other = EntityIndex()
+            other._key_of = dict(self._key_of)
+            other._key_ids = dict(self._key_ids)
+            other._keys = list(self._keys)
+            other._parent = list(self._parent)
+            other._key_grams = list(self._key_grams)  # Sets are never modified once added
+            other._gram_postings = {gram: list(ids) for gram, ids in self._gram_postings.items()}
+            other._phonetic_blocks = {code: list(ids) for code, ids in self._phonetic_blocks.items()}
+            other.candidate_pairs, other.compared_pairs = self.candidate_pairs, self.compared_pairs
+            other.merges, other.seconds = self.merges, self.seconds
+        return other
+
+    def _find(self, key_id: int) -> int:
+        while self._parent[key_id] != key_id:
+            self._parent[key_id] = self._parent[self._parent[key_id]]
+            key_id = self._parent[key_id]
+        return key_id
+
+    def _union(self, a: int, b: int):
+        a, b = self._find(a), self._find(b)
+        if a != b:
+            self._parent[max(a, b)] = min(a, b)
+            self.merges += 1
+
+    def _candidates(self, grams: set, phonetic: str) -> set:
+        # Prefix filter: a key sharing `needed` of the usable grams shares at least one of the
+        # len(usable) - needed + 1 rarest ones, so only their postings are scanned
+        postings = sorted((len(ids), gram, ids) for gram in grams
+                          for ids in [self._gram_postings.get(gram, ())] if len(ids) <= MAX_BLOCK_SIZE)
+        needed = max(2, int(np.ceil(MIN_SHARED_GRAMS * len(postings))))
+        pool = set()
+        for _, _, ids in postings[:max(len(postings) - needed + 1, 0)]:
+            pool.update(ids)
+        usable = {gram for _, gram, _ in postings}
+        candidates = {key_id for key_id in pool if len(usable & self._key_grams[key_id]) >= needed}
+        block = self._phonetic_blocks.get(phonetic, ())
+        if len(block) <= MAX_BLOCK_SIZE:
+            candidates.update(block)
+        return candidates
+
+    def _matches(self, key: str, other: str) -> bool:
+        if min(len(key), len(other)) < MIN_FUZZY_LENGTH:
+            return False
+        if re.findall(r"\d+", key) != re.findall(r"\d+", other):
+            return False  # "Branch 1" and "Branch 2" are different parties
+        matcher = SequenceMatcher(None, key, other, autojunk=False)
+        # Cheap upper bounds first; ratio() only for pairs that can still reach the threshold
+        return (matcher.real_quick_ratio() >= MATCH_THRESHOLD and matcher.quick_ratio() >= MATCH_THRESHOLD
+                and matcher.ratio() >= MATCH_THRESHOLD)
+
+    def _add_key(self, key: str) -> int:
+        key_id = len(self._keys)
+        self._key_ids[key] = key_id
+        self._keys.append(key)
+        self._parent.append(key_id)
+        grams, phonetic = _grams(key), _phonetic(key)
+        candidates = self._candidates(grams, phonetic)
+        self.candidate_pairs += len(candidates)
+        for other_id in candidates:
+            if self._find(other_id) == self._find(key_id):
+                continue  # Already linked through another candidate
+            self.compared_pairs += 1
+            if self._matches(key, self._keys[other_id]):
+                self._union(key_id, other_id)
+        self._key_grams.append(grams)
+        for gram in grams:
+            self._gram_postings.setdefault(gram, []).append(key_id)
+        self._phonetic_blocks.setdefault(phonetic, []).append(key_id)
+        return key_id
+
+    def add(self, names) -> int:
+        """
+        Resolves the names not seen before; returns how many there were.
+        """
+        with self._lock:
+            start = time.perf_counter()
+            new = [name for name in pd.unique(np.asarray(names, dtype=object))
+                   if name is not None and not pd.isna(name) and name not in self._key_of]
+            if not new:
+                return 0  # The last_* figures keep describing the last update that had new names
+            for name, key in zip(new, normalize_names(new)):
+                self._key_of[name] = key
+                if key is not None and key not in self._key_ids:
+                    self._add_key(key)
+            self.last_seconds = time.perf_counter() - start
+            self.last_new_names = len(new)
+            self.seconds += self.last_seconds
+            return len(new)
+
+    def resolve(self, names) -> np.ndarray:
+        """
+        Entity id of each name (None for missing or empty names). Unseen names are added first.
+        """
+        names = np.asarray(names, dtype=object)
+        self.add(names)
+        with self._lock:
+            ids = {key: self._find(key_id) for key, key_id in self._key_ids.items()}
+            return np.array([ids.get(self._key_of.get(name)) if name is not None and not pd.isna(name) else None
+                             for name in names], dtype=object)
+
+    def stats(self) -> dict:
+        with self._lock:
+            keys = len(self._keys)
+            return {
+                "names": len(self._key_of),
+                "keys": keys,
+                "entities": sum(1 for key_id in range(keys) if self._find(key_id) == key_id),
+                "candidate_pairs": self.candidate_pairs,
+                "compared_pairs": self.compared_pairs,
+                "all_pairs": keys * (keys - 1) // 2,  # What comparing every pair of keys would take
+                "merges": self.merges,
+                "seconds": self.seconds,
+                "last_seconds": self.last_seconds,
+                "last_new_names": self.last_new_names,
+            }
+
+
+def entity_index(workbook_key: str, base_key: str = None) -> EntityIndex:
+    """
+    The entity index of a workbook, shared by all sessions. A new workbook starts from a copy of
+    `base_key`'s index (its previous revision) when that is cached, so only new names are resolved.
+    """
+    with _ENTITY_CACHE_LOCK:
+        index = _ENTITY_CACHE.get(workbook_key)
+        if index is None:
+            base = _ENTITY_CACHE.get(base_key) if base_key else None
+            index = base.copy() if base is not None else EntityIndex()
+            _ENTITY_CACHE[workbook_key] = index
+            while len(_ENTITY_CACHE) > ENTITY_CACHE_ENTRIES:
+                _ENTITY_CACHE.popitem(last=False)
+        _ENTITY_CACHE.move_to_end(workbook_key)
+        return index
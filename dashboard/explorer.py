@@ -0,0 +1,132 @@
+"""
+Server-side raw data explorer. Sorting, text/date filtering and paging of a full sheet happen here,
+so only the visible page is ever serialized to the browser. Sort permutations and filtered views
+are row positions cached per (stored frame, query); paging through a view is a slice of them.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+EXPLORER_CACHE_MAX_BYTES = int(os.environ.get("MASTERSHEET_EXPLORER_CACHE_MB", "64")) * 1024 * 1024
+PAGE_SIZES = [25, 50, 100, 250]
+
+_VIEW_CACHE = OrderedDict()  # key -> row positions (int64 array)
+_VIEW_CACHE_BYTES = 0
+_VIEW_CACHE_LOCK = threading.Lock()
+
+
+def _cache_get(key):
+    with _VIEW_CACHE_LOCK:
+        positions = _VIEW_CACHE.get(key)
+        if positions is not None:
+            _VIEW_CACHE.move_to_end(key)
+        return positions
+
+
+def _cache_put(key, positions: np.ndarray) -> np.ndarray:
+    global _VIEW_CACHE_BYTES
+    positions.flags.writeable = False  # Shared between sessions
+    with _VIEW_CACHE_LOCK:
+        if key not in _VIEW_CACHE:
+            _VIEW_CACHE[key] = positions
+            _VIEW_CACHE_BYTES += positions.nbytes
+            while _VIEW_CACHE_BYTES > EXPLORER_CACHE_MAX_BYTES and len(_VIEW_CACHE) > 1:
+                _, evicted = _VIEW_CACHE.popitem(last=False)
+                _VIEW_CACHE_BYTES -= evicted.nbytes
+    return positions
+
+
+def explorer_cache_stats() -> dict:
+    with _VIEW_CACHE_LOCK:
+        return {"views": len(_VIEW_CACHE), "bytes": _VIEW_CACHE_BYTES, "max_bytes": EXPLORER_CACHE_MAX_BYTES}
+
+
+def date_columns(df: pd.DataFrame) -> list:
+    return [col for col in df.columns if pd.api.types.is_datetime64_any_dtype(df[col])]
+
+
+def sort_positions(frame_key: str, df: pd.DataFrame, column, ascending: bool = True) -> np.ndarray:
+    """
+    Row positions of `df` ordered by `column` (stable, missing values last), cached per frame key.
+    Columns mixing types (text and numbers) are ordered by their text.
+    """
+    key = ("sort", frame_key, column, ascending)
+    positions = _cache_get(key)
+    if positions is not None:
+        return positions
+
+    values = df[column].reset_index(drop=True)
+    try:
+        ordered = values.sort_values(ascending=ascending, kind="stable", na_position="last")
+    except TypeError:
+        ordered = values.where(values.isna(), values.astype(str)).sort_values(
+            ascending=ascending, kind="stable", na_position="last"
+        )
+    return _cache_put(key, ordered.index.to_numpy(dtype=np.int64))
+
+
+def _contains(series: pd.Series, text: str) -> np.ndarray:
+    # Matched once per distinct value, then broadcast to the rows through the factorized codes
+    codes, uniques = pd.factorize(series)
+    hits = pd.Index(uniques).astype(str).str.contains(text, case=False, regex=False)
+    return np.append(np.asarray(hits, dtype=bool), False)[codes]  # Code -1 (missing) never matches
+
+
+def filter_mask(df: pd.DataFrame, text: str = "", text_column=None, date_column=None,
+                date_range: tuple = None) -> np.ndarray:
+    """
+    Boolean row mask: rows containing `text` (case-insensitive) in `text_column`, or in any column
+    when it is None, and whose `date_column` falls within `date_range` (inclusive dates).
+    """
+    mask = np.ones(len(df), dtype=bool)
+    if text:
+        columns = [text_column] if text_column is not None else list(df.columns)
+        matches = np.zeros(len(df), dtype=bool)
+        for col in columns:
+            matches |= _contains(df[col], text)
+        mask &= matches
+    if date_column is not None and date_range is not None:
+        start, end = pd.Timestamp(date_range[0]), pd.Timestamp(date_range[1]) + pd.Timedelta(days=1)
+        dates = df[date_column]
+        mask &= ((dates >= start) & (dates < end)).to_numpy(dtype=bool)
+    return mask
+
+
+def query_positions(frame_key: str, df: pd.DataFrame, sort_by=None, ascending: bool = True, text: str = "",
+                    text_column=None, date_column=None, date_range: tuple = None) -> np.ndarray:
+    """
+    Row positions of the filtered and sorted view of a stored frame, cached per frame key and query.
+    """
+    date_range = tuple(pd.Timestamp(d) for d in date_range) if date_column is not None and date_range else None
+    filtered = bool(text) or date_range is not None
+    key = ("view", frame_key, sort_by, ascending, text.lower() if text else "", text_column, date_column, date_range)
+    positions = _cache_get(key)
+    if positions is not None:
+        return positions
+
+    if sort_by is None and not filtered:
+        return np.arange(len(df), dtype=np.int64)  # Sheet order, nothing worth caching
+    mask = filter_mask(df, text, text_column, date_column, date_range) if filtered else None
+    if sort_by is None:
+        positions = np.flatnonzero(mask).astype(np.int64)
+    else:
+        positions = sort_positions(frame_key, df, sort_by, ascending)
+        if mask is None:
+            return positions  # The cached permutation itself
+        positions = positions[mask[positions]]
+    return _cache_put(key, positions)
+
+
+def page(df: pd.DataFrame, positions: np.ndarray, number: int, size: int) -> pd.DataFrame:
+    """
+    Rows of page `number` (1-based) of a view; only these rows are materialized.
+    """
+    start = (max(number, 1) - 1) * size
+    return df.iloc[positions[start:start + size]]
+
+
+def page_count(rows: int, size: int) -> int:
+    return max(1, -(-rows // size))
@@ -0,0 +1,401 @@
+"""
+Bulk report export. The reports of the selected sheets (and the quote-to-cash report) are built one
+at a time from the sheets' aggregate cubes and streamed into a single file, so only one report is
+held in memory at any point: an XLSX workbook (openpyxl write-only mode, rows go straight to disk),
+a self-contained HTML page (charts inlined as base64 PNG) or a PDF (one page per chart or table
+chunk). Charts are taken from the chart cache when the dashboard already drew them. Exports run as
+background jobs (dashboard.jobs); the file is written to MASTERSHEET_EXPORT_DIR.
+"""
+import base64
+import html
+import io
+import os
+import re
+import tempfile
+import time
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.image
+from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.figure import Figure
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.drawing.image import Image
+from openpyxl.styles import Font
+import numpy as np
+import pandas as pd
+
+from dashboard.charts import _RENDER_LOCK, render_many
+from dashboard.indexes import filter_sheet
+from dashboard.report import build_report, quote_to_cash_report
+
+EXPORT_DIR = os.environ.get("MASTERSHEET_EXPORT_DIR") or os.path.join(tempfile.gettempdir(), "mastersheet-exports")
+# Exported files older than this are deleted when the next export starts
+EXPORT_MAX_AGE_SECONDS = 24 * 3600
+
+# Format -> (label, MIME type)
+EXPORT_FORMATS = {
+    "xlsx": ("Excel workbook (.xlsx)", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "html": ("Web page (.html)", "text/html"),
+    "pdf": ("PDF document (.pdf)", "application/pdf"),
+}
+
+# PDF layout: A4 landscape pages, table rows and columns per page
+PDF_PAGE_SIZE = (11.69, 8.27)
+PDF_TABLE_ROWS = 25
+PDF_TABLE_COLUMNS = 8
+PDF_CELL_CHARS = 28
+
+_BOLD = re.compile(r"\*\*(.+?)\*\*")
+
+
+def _display(item: dict) -> str:
+    return item["format"].format(item["value"])
+
+
+def _block_text(block: dict) -> str:
+    # Text of a text/markdown/note block, with the listed values of a text block appended
+    if "value" in block:
+        return block["text"] + " " + ", ".join(str(value) for value in block["value"])
+    return block["text"]
+
+
+def _text_lines(block: dict) -> list:
+    # The text of a non-table, non-chart block as plain lines (markdown bold markers dropped)
+    if block["type"] == "metrics":
+        return [f"{item['label']}: {_display(item)}" for item in block["items"]]
+    return _BOLD.sub(r"\1", _block_text(block)).splitlines()
+
+
+def _cell_value(value):
+    # Excel-safe scalar: missing values empty, numpy scalars unwrapped, other objects as text
+    if value is None or (not isinstance(value, (list, tuple, dict)) and pd.isna(value)):
+        return None
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    if isinstance(value, (str, int, float, bool)) or hasattr(value, "isoformat"):
+        return ILLEGAL_CHARACTERS_RE.sub("", value) if isinstance(value, str) else value
+    return str(value)
+
+
+# --- Writers ---
+
+class XlsxExport:
+    """
+    One worksheet per report: metrics and notes, then each table, then the charts as images.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.workbook = Workbook(write_only=True)
+        self._titles = set()
+
+    def _sheet(self, title: str):
+        base = re.sub(r"[\[\]:*?/\\]", " ", title).strip()[:31] or "Report"
+        name, n = base, 1
+        while name.lower() in self._titles:
+            n += 1
+            name = f"{base[:31 - len(str(n)) - 3]} ({n})"
+        self._titles.add(name.lower())
+        return self.workbook.create_sheet(name)
+
+    def _bold(self, ws, text: str):
+        cell = WriteOnlyCell(ws, value=_cell_value(text))
+        cell.font = Font(bold=True)
+        return cell
+
+    def _text(self, ws, value):
+        cell = WriteOnlyCell(ws, value=_cell_value(value))
+        if isinstance(cell.value, str) and cell.value.startswith("="):
+            cell.data_type = "s"  # Sheet text is never written as a formula
+        return cell
+
+    def write(self, report: dict, images: dict):
+        ws = self._sheet(report["sheet"] or report["title"])
+        ws.append([self._bold(ws, report["title"] or report["sheet"])])
+        rows = 1
+        for block in report["blocks"]:
+            if block["type"] == "table":
+                data = block["data"]
+                ws.append([])
+                if block["title"]:
+                    ws.append([self._bold(ws, block["title"])])
+                    rows += 1
+                ws.append([self._bold(ws, str(col)) for col in data.columns])
+                for row in data.itertuples(index=False, name=None):
+                    ws.append([self._text(ws, value) for value in row])
+                rows += len(data) + 2
+            elif block["type"] == "metrics":
+                for item in block["items"]:
+                    ws.append([self._bold(ws, item["label"]), self._text(ws, _display(item))])
+                rows += len(block["items"])
+            elif block["type"] != "chart":
+                lines = _text_lines(block)
+                for line in lines:
+                    ws.append([self._bold(ws, line) if block["type"] in ("subheader", "heading") else self._text(ws, line)])
+                rows += len(lines)
+        for position in sorted(images):
+            ws.append([])
+            image = Image(io.BytesIO(images[position]))
+            ws.add_image(image, f"A{rows + 2}")
+            spacer = int(np.ceil(image.height / 20)) + 1  # Default rows are 20 px high
+            for _ in range(spacer):
+                ws.append([])
+            rows += spacer + 1
+
+    def close(self):
+        self.workbook.save(self.path)
+
+
+class HtmlExport:
+    """
+    A single self-contained page: no external stylesheets, scripts or image files.
+    """
+
+    STYLE = """
+        body { background: #141f1f; color: #ffffff; font-family: "Segoe UI", Arial, sans-serif; margin: 2rem; }
+        h1, h2, h3, h4 { color: #ffffff; }
+        .metrics { display: flex; flex-wrap: wrap; gap: 1rem; margin: 1rem 0; }
+        .metric { background: #294242; border: 1px solid #3b5e5e; border-radius: 0.75rem; padding: 0.75rem 1.25rem; }
+        .metric p { margin: 0; color: #9bc0c0; }
+        .metric .value { color: #ffffff; font-size: 1.5rem; font-weight: bold; }
+        table { border-collapse: collapse; margin: 0.5rem 0 1.5rem; font-size: 0.9rem; }
+        th, td { border: 1px solid #3b5e5e; padding: 0.3rem 0.6rem; text-align: left; }
+        th { background: #294242; }
+        .note { background: #294242; border-left: 4px solid #9bc0c0; padding: 0.5rem 1rem; }
+        .warning { border-left-color: #fa5c38; }
+        img { max-width: 100%; margin: 0.5rem 0 1.5rem; }
+    """
+
+    def __init__(self, path: str, title: str):
+        self.path = path
+        self.file = open(path, "w", encoding="utf-8")
+        self.file.write(f"<!DOCTYPE html>\n<html><head><meta charset='utf-8'><title>{html.escape(title)}</title>"
+                        f"<style>{self.STYLE}</style></head><body>\n<h1>{html.escape(title)}</h1>\n")
+
+    @staticmethod
+    def _markdown(text: str) -> str:
+        lines, items = [], []
+        for line in text.splitlines():
+            line = _BOLD.sub(r"<strong>\1</strong>", html.escape(line))
+            if line.startswith("- "):
+                items.append(f"<li>{line[2:]}</li>")
+                continue
+            if items:
+                lines.append("<ul>" + "".join(items) + "</ul>")
+                items = []
+            lines.append(f"<p>{line}</p>")
+        if items:
+            lines.append("<ul>" + "".join(items) + "</ul>")
+        return "\n".join(lines)
+
+    def write(self, report: dict, images: dict):
+        out = self.file
+        out.write(f"<section>\n<h2>{html.escape(report['title'] or report['sheet'])}</h2>\n")
+        for position, block in enumerate(report["blocks"]):
+            kind = block["type"]
+            if kind == "metrics":
+                out.write("<div class='metrics'>" + "".join(
+                    f"<div class='metric'><p>{html.escape(item['label'])}</p>"
+                    f"<p class='value'>{html.escape(_display(item))}</p></div>" for item in block["items"]
+                ) + "</div>\n")
+            elif kind == "subheader":
+                out.write(f"<h3>{html.escape(block['text'])}</h3>\n")
+            elif kind == "heading":
+                out.write(f"<h4>{html.escape(block['text'])}</h4>\n")
+            elif kind == "table":
+                if block["title"]:
+                    out.write(f"<h4>{html.escape(block['title'])}</h4>\n")
+                block["data"].to_html(out, index=False, na_rep="", border=0)
+                out.write("\n")
+            elif kind == "chart":
+                if position in images:
+                    out.write(f"<img alt='{html.escape(block['spec']['params']['title'], quote=True)}' "
+                              f"src='data:image/png;base64,{base64.b64encode(images[position]).decode('ascii')}'>\n")
+            elif kind in ("info", "warning"):
+                out.write(f"<div class='note {kind}'>{html.escape(block['text'])}</div>\n")
+            else:
+                out.write(self._markdown(_block_text(block)) + "\n")
+        out.write("</section>\n")
+        out.flush()
+
+    def close(self):
+        self.file.write("</body></html>\n")
+        self.file.close()
+
+
+class PdfExport:
+    """
+    A4 landscape pages that blocks flow down: text lines, tables (in chunks of PDF_TABLE_ROWS rows)
+    and charts start a new page when they do not fit on the current one. Every page is written out
+    as soon as it is full. Matplotlib reads the process-global rcParams while artists are created
+    and pages saved, so those steps take the chart renderer's lock (see dashboard.charts).
+    """
+
+    # Heights as a share of the page
+    LINE_HEIGHT = 0.035
+    ROW_HEIGHT = 0.028
+    CHART_HEIGHT = 0.44
+    MARGIN = 0.05
+
+    def __init__(self, path: str, title: str):
+        self.path = path
+        self.pages = PdfPages(path)
+        self._figure = None
+        self._y = 0.0
+        self._text(title, size=20, bold=True)
+
+    def _new_page(self):
+        self._flush()
+        with _RENDER_LOCK:
+            self._figure = Figure(figsize=PDF_PAGE_SIZE)
+        self._y = 1 - self.MARGIN
+
+    def _flush(self):
+        if self._figure is not None:
+            with _RENDER_LOCK:
+                self.pages.savefig(self._figure)
+            self._figure = None
+
+    def _space(self, height: float):
+        # Starts a new page unless `height` still fits on this one
+        if self._figure is None or self._y - height < self.MARGIN:
+            self._new_page()
+
+    def _text(self, line: str, size: int = 10, bold: bool = False):
+        height = self.LINE_HEIGHT * max(size / 10, 1)
+        self._space(height)
+        with _RENDER_LOCK:
+            self._figure.text(self.MARGIN, self._y, line, fontsize=size, fontweight="bold" if bold else "normal",
+                              va="top", wrap=True)
+        self._y -= height
+
+    @staticmethod
+    def _cell(value) -> str:
+        if value is None or pd.isna(value):
+            return ""
+        if isinstance(value, pd.Timestamp) and value == value.normalize():
+            value = value.date()
+        return str(value)[:PDF_CELL_CHARS]
+
+    def _table(self, title: str, data: pd.DataFrame):
+        columns = list(data.columns[:PDF_TABLE_COLUMNS])
+        if len(data.columns) > len(columns):
+            title = f"{title or ''} (first {len(columns)} of {len(data.columns)} columns)".strip()
+        for start in range(0, max(len(data), 1), PDF_TABLE_ROWS):
+            chunk = data[columns].iloc[start:start + PDF_TABLE_ROWS]
+            label = title if start == 0 else f"{title or 'Table'} (continued)"
+            height = self.ROW_HEIGHT * (len(chunk) + 1)
+            self._space(height + (self.LINE_HEIGHT if label else 0))
+            if label:
+                self._text(label, bold=True)
+            cells = [[self._cell(value) for value in row] for row in chunk.itertuples(index=False, name=None)]
+            with _RENDER_LOCK:
+                ax = self._figure.add_axes((self.MARGIN, self._y - height, 1 - 2 * self.MARGIN, height))
+                ax.axis("off")
+                table = ax.table(cellText=cells or [[""] * len(columns)], colLabels=[self._cell(c) for c in columns],
+                                 cellLoc="left", bbox=(0, 0, 1, 1))
+                table.auto_set_font_size(False)
+                table.set_fontsize(8)
+            self._y -= height + self.LINE_HEIGHT / 2
+
+    def _chart(self, image: bytes):
+        self._space(self.CHART_HEIGHT)
+        picture = matplotlib.image.imread(io.BytesIO(image), format="png")
+        with _RENDER_LOCK:
+            ax = self._figure.add_axes((self.MARGIN, self._y - self.CHART_HEIGHT, 1 - 2 * self.MARGIN, self.CHART_HEIGHT))
+            ax.axis("off")
+            ax.imshow(picture)
+        self._y -= self.CHART_HEIGHT + self.LINE_HEIGHT / 2
+
+    def write(self, report: dict, images: dict):
+        if self._figure is None or self._y < 0.8:  # The first report shares the title page
+            self._new_page()
+        self._text(report["title"] or report["sheet"], size=16, bold=True)
+        for position, block in enumerate(report["blocks"]):
+            kind = block["type"]
+            if kind == "table":
+                self._table(block["title"], block["data"])
+            elif kind == "chart":
+                if position in images:
+                    self._chart(images[position])  # The title is part of the image
+            else:
+                for line in _text_lines(block):
+                    self._text(line, size=12 if kind in ("subheader", "heading") else 10,
+                               bold=kind in ("subheader", "heading"))
+        self._flush()
+
+    def close(self):
+        self._flush()
+        self.pages.close()
+
+
+# --- Export jobs ---
+
+def _prune_exports():
+    cutoff = time.time() - EXPORT_MAX_AGE_SECONDS
+    for entry in os.scandir(EXPORT_DIR):
+        if entry.is_file() and entry.stat().st_mtime < cutoff:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass  # Still being downloaded or already gone
+
+
+def _writer(fmt: str, path: str, title: str):
+    if fmt == "xlsx":
+        return XlsxExport(path)
+    if fmt == "html":
+        return HtmlExport(path, title)
+    if fmt == "pdf":
+        return PdfExport(path, title)
+    raise ValueError(f"Unknown export format: {fmt}")
+
+
+def export_reports(job, sheets: dict, fmt: str, filters: dict = None, granularity: str = "M", links=None,
+                   title: str = "Dashboard Report") -> dict:
+    """
+    Job function (see dashboard.jobs.submit): writes the reports of `sheets` ({name: (frame key,
+    frame, cube)}), filtered and binned like the dashboard, plus the quote-to-cash report of
+    `links` if given, to one `fmt` file. Returns {"path", "file_name", "mime", "bytes", "seconds"}.
+    """
+    start = time.perf_counter()
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    _prune_exports()
+    handle, path = tempfile.mkstemp(prefix="export-", suffix=f".{fmt}", dir=EXPORT_DIR)
+    os.close(handle)
+    steps = len(sheets) + (links is not None)
+    writer = _writer(fmt, path, title)
+    try:
+        for step, name in enumerate(list(sheets) + ([None] if links is not None else [])):
+            job.check()
+            job.update(step / steps, f"Exporting {name or 'Quote-to-Cash'} ({step + 1} of {steps})")
+            if name is None:
+                report = quote_to_cash_report(links)
+            else:
+                frame_key, df, cube = sheets[name]
+                if filters:
+                    df, cube, _ = filter_sheet(frame_key, df, cube, filters)
+                report = build_report(name, df, cube, granularity)
+            charts = {position: block["spec"] for position, block in enumerate(report["blocks"])
+                      if block["type"] == "chart"}
+            images = {}
+            for index, image in render_many(list(charts.values())):
+                images[list(charts)[index]] = image
+                job.check()
+            writer.write(report, images)
+        job.update(1.0, "Finishing the file")
+        writer.close()
+    except BaseException:
+        try:
+            writer.close()
+        finally:
+            os.remove(path)
+        raise
+    file_name = re.sub(r"[^A-Za-z0-9._-]+", "-", title).strip("-") + f".{fmt}"
+    return {"path": path, "file_name": file_name, "mime": EXPORT_FORMATS[fmt][1],
+            "bytes": os.path.getsize(path), "seconds": time.perf_counter() - start}
@@ -0,0 +1,78 @@
+"""
+Header-row detection. Known sheets are recognised by a signature of their column names, so the
+header is found by scanning rows in streaming mode instead of relying on hard-coded skiprows.
+"""
+import itertools
+import os
+import threading
+from collections import OrderedDict
+
+from dashboard.cleaning import sheet_kind
+
+# Column names expected in the header row of each sheet kind
+HEADER_SIGNATURES = {
+    "qt_register_2025": {"Date", "Quotation ID", "Company  Name", "Product", "Sales Person"},
+    "inv_2025": {"Date", "INV No.", "Sales Person"},
+    "meeting_agenda": {"No:", "Date", "Order Value Approx.", "Action By"},
+    "payment_pending": {"PARTY NAME", "Amount"},
+}
+
+# Manual skiprows for sheets without a header signature to detect (generic column names)
+SKIPROWS_OVERRIDES = {
+    "Quotation Register 2023": 879,
+}
+
+# Rows scanned before giving up and falling back to the first row
+MAX_HEADER_SCAN_ROWS = 5000
+
+# Header rows remembered per (workbook key, sheet); the least recently used are forgotten past this
+HEADER_ROWS_MAX = int(os.environ.get("MASTERSHEET_HEADER_ROWS_MAX", "4096"))
+
+_HEADER_ROWS = OrderedDict()  # (workbook key, sheet name) -> header row
+_HEADER_ROWS_LOCK = threading.Lock()
+
+
+def header_signature(sheet_name: str):
+    return HEADER_SIGNATURES.get(sheet_kind(sheet_name))
+
+
+def _matches(row, signature: set) -> bool:
+    cells = {v.strip() for v in row if isinstance(v, str)}
+    required = max(2, (len(signature) + 1) // 2) if len(signature) > 1 else 1
+    return len(signature & cells) >= required
+
+
+def locate_header(rows, signature: set, max_rows: int = MAX_HEADER_SCAN_ROWS):
+    """
+    Scans `rows` for the first row containing most of the `signature` column names.
+    Returns (header index or None, rows iterator positioned at the header). The rows before the
+    header are consumed once and never converted; if no header is found, all scanned rows are
+    handed back so the sheet can still be read from the top.
+    """
+    rows = iter(rows)
+    scanned = []
+    for index, row in enumerate(itertools.islice(rows, max_rows)):
+        if _matches(row, signature):
+            return index, itertools.chain([row], rows)
+        scanned.append(row)
+    return None, itertools.chain(scanned, rows)
+
+
+def cached_header_row(workbook_key: str, sheet_name: str):
+    """
+    Returns the header row detected earlier for a sheet of this workbook, or None (detect again).
+    """
+    key = (workbook_key, sheet_name)
+    with _HEADER_ROWS_LOCK:
+        row = _HEADER_ROWS.get(key)
+        if row is not None:
+            _HEADER_ROWS.move_to_end(key)
+        return row
+
+
+def remember_header_row(workbook_key: str, sheet_name: str, row: int):
+    with _HEADER_ROWS_LOCK:
+        _HEADER_ROWS[(workbook_key, sheet_name)] = row
+        _HEADER_ROWS.move_to_end((workbook_key, sheet_name))
+        while len(_HEADER_ROWS) > HEADER_ROWS_MAX:
+            _HEADER_ROWS.popitem(last=False)
@@ -0,0 +1,177 @@
+"""
+Prebuilt filter indexes. A sheet (or an aggregate cube table) gets, once, a sorted index of its date
+column for range lookups and a posting list of row positions per label of each categorical column.
+A filter is then answered by scattering the matching postings into boolean row bitmaps and
+intersecting them, instead of scanning and comparing every row on each widget change.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+INDEX_CACHE_MAX_BYTES = int(os.environ.get("MASTERSHEET_INDEX_CACHE_MB", "256")) * 1024 * 1024
+
+# Cube dimensions the filter bar can restrict; "day" is filtered by date range, the others by label
+FILTER_DIMENSIONS = ["day", "salesperson", "party"]
+
+_INDEX_CACHE = OrderedDict()  # frame key -> SheetIndex
+_INDEX_CACHE_BYTES = 0
+_INDEX_CACHE_LOCK = threading.Lock()
+
+
+def _codes(series: pd.Series):
+    # Integer code per row (-1 for missing) and the label of each code
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), series.cat.categories
+    return pd.factorize(series)
+
+
+class DateIndex:
+    """
+    Row positions ordered by date (missing dates excluded), so a date range is two binary searches.
+    """
+
+    def __init__(self, series: pd.Series):
+        values = series.to_numpy(dtype="datetime64[ns]")
+        order = np.argsort(values, kind="stable")  # NaT sorts last
+        valid = np.count_nonzero(~np.isnat(values))
+        self.order = order[:valid]
+        self.values = values[self.order]
+
+    @property
+    def nbytes(self) -> int:
+        return self.order.nbytes + self.values.nbytes
+
+    def bounds(self):
+        if not len(self.values):
+            return None
+        return pd.Timestamp(self.values[0]), pd.Timestamp(self.values[-1])
+
+    def positions(self, start, end) -> np.ndarray:
+        """
+        Rows dated from `start` up to and including the day of `end`.
+        """
+        lo = np.searchsorted(self.values, np.datetime64(pd.Timestamp(start).normalize()), side="left")
+        hi = np.searchsorted(self.values, np.datetime64(pd.Timestamp(end).normalize() + pd.Timedelta(days=1)),
+                             side="left")
+        return self.order[lo:hi]
+
+
+class PostingIndex:
+    """
+    Row positions grouped by label: the postings of code c are order[starts[c]:starts[c + 1]].
+    """
+
+    def __init__(self, series: pd.Series):
+        codes, labels = _codes(series)
+        self.labels = list(labels)
+        self.code_of = {label: code for code, label in enumerate(self.labels)}
+        valid = codes >= 0
+        self.order = np.argsort(np.where(valid, codes, len(self.labels)), kind="stable")[:np.count_nonzero(valid)]
+        self.starts = np.concatenate(([0], np.cumsum(np.bincount(codes[valid], minlength=len(self.labels)))))
+
+    @property
+    def nbytes(self) -> int:
+        return self.order.nbytes + self.starts.nbytes
+
+    def positions(self, labels) -> list:
+        return [self.order[self.starts[code]:self.starts[code + 1]]
+                for code in (self.code_of.get(label) for label in labels) if code is not None]
+
+
+class SheetIndex:
+    """
+    Filter indexes over the given columns of a frame, keyed by cube dimension ({"day": "Date", ...}).
+    With `id_column`, distinct record counts of a filtered selection are answered from its codes.
+    """
+
+    def __init__(self, df: pd.DataFrame, columns: dict, id_column: str = None):
+        self.rows = len(df)
+        self.dates = {dim: DateIndex(df[col]) for dim, col in columns.items() if dim == "day"}
+        self.postings = {dim: PostingIndex(df[col]) for dim, col in columns.items() if dim != "day"}
+        self.id_codes = _codes(df[id_column])[0] if id_column else None
+
+    @property
+    def nbytes(self) -> int:
+        return (sum(index.nbytes for index in (*self.dates.values(), *self.postings.values()))
+                + (self.id_codes.nbytes if self.id_codes is not None else 0))
+
+    def has(self, dimension: str) -> bool:
+        return dimension in self.dates or dimension in self.postings
+
+    def labels(self, dimension: str) -> list:
+        return self.postings[dimension].labels if dimension in self.postings else []
+
+    def date_bounds(self):
+        return self.dates["day"].bounds() if "day" in self.dates else None
+
+    def applicable(self, filters: dict) -> dict:
+        """
+        The active filters ({dimension: (start, end) or [labels]}) this index can apply.
+        """
+        return {dim: value for dim, value in filters.items() if value is not None and self.has(dim)}
+
+    def mask(self, filters: dict):
+        """
+        Boolean row bitmap of the rows passing every applicable filter, or None if none applies.
+        """
+        filters = self.applicable(filters)
+        if not filters:
+            return None
+        mask = None
+        for dim, value in filters.items():
+            bitmap = np.zeros(self.rows, dtype=bool)
+            if dim in self.dates:
+                bitmap[self.dates[dim].positions(*value)] = True
+            else:
+                for positions in self.postings[dim].positions(value):
+                    bitmap[positions] = True
+            mask = bitmap if mask is None else np.logical_and(mask, bitmap, out=mask)
+        return mask
+
+    def distinct_ids(self, mask: np.ndarray) -> int:
+        codes = self.id_codes[mask]
+        return int(np.count_nonzero(np.bincount(codes[codes >= 0]))) if len(codes) else 0
+
+
+def sheet_index(frame_key: str, df: pd.DataFrame, columns: dict, id_column: str = None) -> SheetIndex:
+    """
+    The SheetIndex of a stored frame, built on first use and shared by all sessions (LRU, byte budget).
+    """
+    global _INDEX_CACHE_BYTES
+    key = (frame_key, tuple(sorted(columns.items())), id_column)
+    with _INDEX_CACHE_LOCK:
+        index = _INDEX_CACHE.get(key)
+        if index is not None:
+            _INDEX_CACHE.move_to_end(key)
+            return index
+
+    index = SheetIndex(df, columns, id_column)
+    with _INDEX_CACHE_LOCK:
+        if key not in _INDEX_CACHE:
+            _INDEX_CACHE[key] = index
+            _INDEX_CACHE_BYTES += index.nbytes
+            while _INDEX_CACHE_BYTES > INDEX_CACHE_MAX_BYTES and len(_INDEX_CACHE) > 1:
+                _, evicted = _INDEX_CACHE.popitem(last=False)
+                _INDEX_CACHE_BYTES -= evicted.nbytes
+    return index
+
+
+def filter_sheet(frame_key: str, df: pd.DataFrame, cube, filters: dict):
+    """
+    Applies filters to a cleaned sheet and its aggregate cube through their indexes. Returns the
+    selected rows, the cube of the selection and the dimensions actually filtered (sheets without
+    a cube, or without any of the filtered columns, are returned unchanged).
+    """
+    if cube is None:
+        return df, cube, []
+    index = sheet_index(frame_key, df, cube.filter_columns(), cube.columns.get("id"))
+    applied = index.applicable(filters)
+    mask = index.mask(applied)
+    if mask is None:
+        return df, cube, []
+    rows = int(np.count_nonzero(mask))
+    distinct_ids = index.distinct_ids(mask) if index.id_codes is not None else rows
+    return df.iloc[np.flatnonzero(mask)], cube.filtered(applied, rows, distinct_ids), list(applied)
@@ -0,0 +1,176 @@
+"""
+Workbook ingestion: opens an uploaded .xlsx once and parses every sheet from that single handle.
+"""
+import datetime
+import io
+import itertools
+import time
+
+import pandas as pd
+from openpyxl import load_workbook
+from pandas.errors import EmptyDataError
+from pandas.io.parsers import TextParser
+
+from dashboard.headers import locate_header
+
+try:  # Optional Rust-based reader, several times faster than openpyxl when installed
+    import python_calamine
+except ImportError:
+    python_calamine = None
+
+def default_engine() -> str:
+    """
+    Returns the fastest reader engine available in this environment.
+    """
+    return "calamine" if python_calamine is not None else "openpyxl"
+
+
+def _as_buffer(source) -> io.BytesIO:
+    # Streamlit's UploadedFile is a BytesIO; raw bytes and paths are accepted for headless use
+    if isinstance(source, (bytes, bytearray)):
+        return io.BytesIO(source)
+    if isinstance(source, str):
+        with open(source, "rb") as fh:
+            return io.BytesIO(fh.read())
+    if hasattr(source, "getvalue"):
+        return io.BytesIO(source.getvalue())
+    return io.BytesIO(source.read())
+
+
+def _convert_cell(value):
+    # Mirrors pandas' Excel readers: blanks become "", integral floats become ints
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, datetime.date) and not isinstance(value, datetime.datetime):
+        return datetime.datetime(value.year, value.month, value.day)
+    return value
+
+
+def _row_width(row) -> int:
+    width = len(row)
+    while width and (row[width - 1] is None or row[width - 1] == ""):
+        width -= 1
+    return width
+
+
+def _measured(rows, widths: list):
+    for row in rows:
+        widths.append(_row_width(row))
+        yield row
+
+
+def frame_from_rows(rows, skiprows: int = 0, width: int = 0) -> pd.DataFrame:
+    """
+    Builds a DataFrame from an iterator of raw cell rows the same way pd.read_excel would: the
+    first `skiprows` rows are dropped (they only count towards the sheet width), the next row is
+    the header, blank rows inside the table are kept as all-missing rows and trailing blank rows
+    are trimmed. Values are inferred and missing-value strings recognised by pandas' TextParser,
+    the parser behind pd.read_excel. `width` is the width of rows dropped before the call.
+    """
+    rows = iter(rows)
+    width = max([width, *(_row_width(row) for row in itertools.islice(rows, skiprows))])
+    data, last = [], -1
+    for row in rows:
+        cells = [_convert_cell(v) for v in row]
+        while cells and cells[-1] == "":
+            cells.pop()
+        if cells:
+            last = len(data)
+            width = max(width, len(cells))
+        data.append(cells)
+    del data[last + 1:]
+    if not data:
+        return pd.DataFrame()
+
+    for cells in data:
+        cells.extend([""] * (width - len(cells)))
+    try:
+        return TextParser(data, header=0, skip_blank_lines=False).read()
+    except EmptyDataError:
+        return pd.DataFrame()
+
+
+class WorkbookReader:
+    """
+    Streaming, read-only view of an .xlsx workbook. The file is unzipped once; every sheet is
+    read from the same open handle.
+    """
+
+    def __init__(self, source, engine: str = None):
+        self.engine = engine or default_engine()
+        self.header_rows = {}
+        self._buffer = _as_buffer(source)
+        if self.engine == "calamine":
+            if python_calamine is None:
+                raise ImportError("The 'calamine' engine requires the python-calamine package.")
+            self._book = python_calamine.CalamineWorkbook.from_filelike(self._buffer)
+            self.sheet_names = list(self._book.sheet_names)
+        elif self.engine == "openpyxl":
+            self._book = load_workbook(self._buffer, read_only=True, data_only=True, keep_links=False)
+            self.sheet_names = list(self._book.sheetnames)
+        else:
+            raise ValueError(f"Unknown Excel engine: {self.engine!r}")
+
+    def iter_rows(self, sheet_name: str):
+        """
+        Yields the raw cell values of a sheet, one row at a time.
+        """
+        if self.engine == "calamine":
+            sheet = self._book.get_sheet_by_name(sheet_name)
+            padding = [""] * sheet.start[1] if sheet.start else []  # Rows start at the first used column
+            for row in sheet.iter_rows():
+                yield padding + row
+        else:
+            sheet = self._book[sheet_name]
+            sheet.reset_dimensions()  # Stored dimensions are often wrong in read-only mode
+            yield from sheet.iter_rows(values_only=True)
+
+    def read_sheet(self, sheet_name: str, skiprows: int = None, header_signature: set = None) -> pd.DataFrame:
+        """
+        Reads one sheet. An explicit `skiprows` wins; otherwise, when a `header_signature` is
+        given, the header row is located while streaming and parsing starts from it.
+        The header row used is recorded in `self.header_rows`.
+        """
+        rows = self.iter_rows(sheet_name)
+        if skiprows is None and header_signature:
+            widths = []
+            skiprows, rows = locate_header(_measured(rows, widths), header_signature)
+            self.header_rows[sheet_name] = skiprows or 0
+            # Rows above the header still widen the sheet, as they do for pd.read_excel
+            return frame_from_rows(rows, width=max(widths[:skiprows or 0], default=0))
+        self.header_rows[sheet_name] = skiprows or 0
+        return frame_from_rows(rows, skiprows=skiprows or 0)
+
+    def close(self):
+        self._book.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def list_sheets(source, engine: str = None) -> list:
+    """
+    Returns the sheet names of a workbook from its metadata, without parsing any cells.
+    """
+    with WorkbookReader(source, engine=engine) as reader:
+        return reader.sheet_names
+
+
+def read_workbook(source, skiprows_map: dict = None, engine: str = None, sheet_names: list = None):
+    """
+    Parses the sheets of a workbook (all of them unless `sheet_names` is given) in a single pass.
+    Returns (sheets, timings): sheet name -> DataFrame and sheet name -> parse time in seconds.
+    """
+    skiprows_map = skiprows_map or {}
+    sheets, timings = {}, {}
+    with WorkbookReader(source, engine=engine) as reader:
+        for sheet_name in sheet_names or reader.sheet_names:
+            start = time.perf_counter()
+            sheets[sheet_name] = reader.read_sheet(sheet_name, skiprows=skiprows_map.get(sheet_name, 0))
+            timings[sheet_name] = time.perf_counter() - start
+    return sheets, timings
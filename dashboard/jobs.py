@@ -0,0 +1,167 @@
+"""
+Background jobs for work that should not block a script run (workbook ingestion, report exports).
+Jobs run on a small thread pool in the server process and are registered under a key (e.g. the
+workbook's content hash), so they outlive the rerun that started them and a later rerun, or a
+reloaded page, finds them again. A job reports its progress and partial results as it goes and is
+cancelled cooperatively: the job function calls `job.check()` between steps. Jobs started from a
+recorded script run record their own stages (see dashboard.profiling), available from `job.stages()`.
+"""
+import contextvars
+import os
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from dashboard.profiling import background_recorder, write_log
+
+JOB_WORKERS = int(os.environ.get("MASTERSHEET_JOB_WORKERS", "2"))
+# Finished jobs kept (with their results) for reruns to pick up
+JOB_HISTORY = 32
+
+FINISHED = ("done", "failed", "cancelled")
+
+_JOBS = OrderedDict()  # key -> Job
+_JOBS_LOCK = threading.Lock()
+_POOL = None
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    """
+    One background job: status ("queued", "running", "done", "failed" or "cancelled"), progress
+    between 0 and 1 with a message, results published while it runs (e.g. one per loaded sheet)
+    and the job function's result (or error) once finished.
+    """
+
+    def __init__(self, key: str, kind: str):
+        self.key = key
+        self.kind = kind
+        self.status = "queued"
+        self.progress = 0.0
+        self.message = "Queued"
+        self.result = None
+        self.error = None
+        self._partial = OrderedDict()
+        self.created = time.time()
+        self.finished_at = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._recorder = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    def update(self, progress: float = None, message: str = None):
+        with self._lock:
+            if progress is not None:
+                self.progress = min(max(float(progress), 0.0), 1.0)
+            if message is not None:
+                self.message = message
+
+    def publish(self, name: str, value):
+        """
+        Makes one partial result available before the job finishes.
+        """
+        with self._lock:
+            self._partial[name] = value
+
+    def partial_results(self) -> dict:
+        with self._lock:
+            return dict(self._partial)
+
+    def stages(self) -> list:
+        """
+        Stages recorded so far, in start order (empty unless the job was started from a recorded run).
+        """
+        return [] if self._recorder is None else self._recorder.ordered()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def check(self):
+        """
+        Raises JobCancelled once cancellation was requested; job functions call it between steps.
+        """
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def _finish(self, status: str, result=None, error: str = None):
+        with self._lock:
+            self.status, self.result, self.error = status, result, error
+            self.finished_at = time.time()
+            if status == "done":
+                self.progress, self.message = 1.0, "Done"
+            elif status == "cancelled":
+                self.message = "Cancelled"
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _POOL
+    with _JOBS_LOCK:
+        if _POOL is None:
+            _POOL = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="mastersheet-job")
+        return _POOL
+
+
+def _run(job: Job, fn, args, kwargs):
+    # Runs in a copy of the submitting thread's context, so a script run's recorder is visible here
+    if job.cancel_requested:
+        job._finish("cancelled")
+        return
+    with job._lock:
+        job.status, job.message = "running", "Started"
+    job._recorder = background_recorder(job=job.kind)
+    try:
+        result = fn(job, *args, **kwargs)
+    except JobCancelled:
+        job._finish("cancelled")
+    except Exception as e:
+        traceback.print_exc()
+        job._finish("failed", error=f"{type(e).__name__}: {e}")
+    else:
+        job._finish("done", result=result)
+    finally:
+        if job._recorder is not None:
+            job._recorder.stop()
+            write_log(job._recorder)
+
+
+def submit(key: str, kind: str, fn, *args, **kwargs) -> Job:
+    """
+    Runs fn(job, *args, **kwargs) in the background under `key`. While a job with the same key is
+    queued, running or done, that job is returned instead of starting another one.
+    """
+    pool = _pool()
+    with _JOBS_LOCK:
+        job = _JOBS.get(key)
+        if job is not None and job.status not in ("failed", "cancelled"):
+            _JOBS.move_to_end(key)
+            return job
+        job = Job(key, kind)
+        _JOBS[key] = job
+        finished = [k for k, j in _JOBS.items() if j.finished]
+        for k in finished[:max(len(finished) - JOB_HISTORY, 0)]:
+            del _JOBS[k]
+    pool.submit(contextvars.copy_context().run, _run, job, fn, args, kwargs)
+    return job
+
+
+def get_job(key: str):
+    with _JOBS_LOCK:
+        return _JOBS.get(key)
+
+
+def job_stats() -> dict:
+    with _JOBS_LOCK:
+        statuses = [job.status for job in _JOBS.values()]
+    return {status: statuses.count(status) for status in ("queued", "running", *FINISHED)}
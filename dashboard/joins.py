@@ -0,0 +1,247 @@
+"""
+Cross-sheet quote-to-cash joins. Quotations (QT Register 2025), invoices (2025 INV) and pending
+payments (Payment Pending) share party and sales person names, written slightly differently from
+sheet to sheet. Each name is normalized once per upload and all sheets are coded against one key
+vocabulary, so the joins run on integer keys: quotations are matched to the first invoice of the
+same party (and product) dated on or after them, and pending payments to the party's invoices.
+"""
+import re
+from functools import cached_property, partial
+
+import numpy as np
+import pandas as pd
+
+from dashboard.aggregates import CUBE_COLUMNS
+from dashboard.cleaning import sheet_kind
+
+JOIN_KINDS = ["qt_register_2025", "inv_2025", "payment_pending"]
+
+# Legal-form suffixes dropped from party names ("Gulf Trading W.L.L." and "Gulf Trading" are one party)
+LEGAL_SUFFIXES = re.compile(r"(?:\s+(?:wll|bsc|bscc|bsc c|co|company|llc|ltd|limited|spc|est))+$")
+
+
+def normalize_names(names, legal_suffixes: bool = True) -> np.ndarray:
+    """
+    Join key of each name: case-folded, with punctuation and repeated spaces removed and (for party
+    names) legal suffixes dropped. Names left empty get no key (None).
+    """
+    text = pd.Index(names).astype(str).str.casefold().str.replace(r"[.'`]", "", regex=True)
+    text = text.str.replace(r"[^\w]+", " ", regex=True).str.strip()
+    if legal_suffixes:
+        text = text.str.replace(LEGAL_SUFFIXES, "", regex=True).str.strip()
+    keys = text.to_numpy(dtype=object)
+    keys[(keys == "") | np.asarray(pd.isna(pd.Index(names)))] = None
+    return keys
+
+
+def _codes(series: pd.Series):
+    # Integer code per row (-1 for missing) and the distinct values they index
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), series.cat.categories
+    return pd.factorize(series)
+
+
+def _frame(kind: str, df: pd.DataFrame) -> pd.DataFrame:
+    # The join columns of one sheet under their cube dimension names (see aggregates.CUBE_COLUMNS)
+    columns = {dim: col for dim, col in CUBE_COLUMNS[kind].items() if col in df.columns}
+    frame = pd.DataFrame({dim: df[col] for dim, col in columns.items()}, index=pd.RangeIndex(len(df)))
+    if "value" in frame:
+        frame["value"] = pd.to_numeric(frame["value"], errors="coerce").astype("float64")
+    if "day" in frame:
+        if pd.api.types.is_datetime64_any_dtype(frame["day"]):
+            frame["day"] = frame["day"].astype("datetime64[ns]")  # One resolution across sheets for the as-of join
+        else:
+            frame = frame.drop(columns="day")
+    return frame
+
+
+def _encode(frames: dict, column: str, normalize) -> dict:
+    """
+    Codes `column` of every frame against one shared vocabulary of join keys (-1 when missing),
+    stored as `<column>_code`. Keys are computed per distinct name, never per row. Returns
+    {code: display name}, the most frequent spelling of each key.
+    """
+    spellings, vocabulary = [], {}
+    for frame in frames.values():
+        if column not in frame:
+            frame[column + "_code"] = -1
+            continue
+        codes, names = _codes(frame[column])
+        key_codes = np.array([vocabulary.setdefault(key, len(vocabulary)) if key is not None else -1
+                              for key in normalize(names)], dtype=np.int64)
+        frame[column + "_code"] = np.append(key_codes, -1)[codes]
+        counts = np.bincount(codes[codes >= 0], minlength=len(names))
+        spellings.append(pd.DataFrame({"code": key_codes, "name": np.asarray(names, dtype=object), "rows": counts}))
+    if not vocabulary:
+        return {}
+    spellings = pd.concat(spellings, ignore_index=True)
+    spellings["name"] = [" ".join(str(name).split()) for name in spellings["name"]]
+    totals = spellings[spellings["code"] >= 0].groupby(["code", "name"])["rows"].sum().reset_index()
+    best = totals.sort_values("rows", ascending=False, kind="stable").drop_duplicates("code")
+    return dict(zip(best["code"], best["name"]))
+
+
+class QuoteToCash:
+    """
+    Linked quotations, invoices and pending payments of one upload. Built once (see link_sheets);
+    the views are aggregates over the joined, integer-keyed frames, computed on first access.
+    """
+
+    def __init__(self, frames: dict, parties: dict, salespeople: dict, match_product: bool, resolved: bool = False):
+        self.quotes = frames.get("qt_register_2025")
+        self.invoices = frames.get("inv_2025")
+        self.pending = frames.get("payment_pending")
+        self.parties = parties
+        self.salespeople = salespeople
+        self.match_product = match_product
+        self.resolved = resolved  # Parties matched through entity resolution rather than exact keys
+        if self.quotes is not None:
+            self.quotes["converted"] = self._convert()
+
+    def _convert(self) -> np.ndarray:
+        # Quotation -> first invoice of the same party (and product) on or after the quotation date
+        converted = np.zeros(len(self.quotes), dtype=bool)
+        if self.invoices is None or "day" not in self.quotes or "day" not in self.invoices:
+            return converted
+        by = ["party_code", "product_code"] if self.match_product else ["party_code"]
+        quotes = self.quotes.loc[(self.quotes[by] >= 0).all(axis=1) & self.quotes["day"].notna(), ["day"] + by]
+        invoices = self.invoices.loc[(self.invoices[by] >= 0).all(axis=1) & self.invoices["day"].notna(), ["day"] + by]
+        invoices = invoices.assign(invoice=True)
+        if quotes.empty or invoices.empty:
+            return converted
+        linked = pd.merge_asof(
+            quotes.reset_index().sort_values("day", kind="stable"), invoices.sort_values("day", kind="stable"),
+            on="day", by=by, direction="forward",
+        )
+        converted[linked.loc[linked["invoice"].notna(), "index"].to_numpy()] = True
+        return converted
+
+    def has_conversion(self) -> bool:
+        return self.quotes is not None and self.invoices is not None
+
+    def has_outstanding(self) -> bool:
+        return self.pending is not None and "party" in self.pending
+
+    @cached_property
+    def summary(self) -> dict:
+        summary = {}
+        if self.has_conversion():
+            quoted = self.quotes["value"] if "value" in self.quotes else pd.Series(dtype="float64")
+            summary.update({
+                "quotations": len(self.quotes),
+                "converted": int(self.quotes["converted"].sum()),
+                "quoted_value": float(quoted.sum()),
+                "converted_value": float(quoted[self.quotes["converted"]].sum()),
+                "invoiced": float(self.invoices["value"].sum()) if "value" in self.invoices else 0.0,
+            })
+        if self.has_outstanding():
+            parties = pd.unique(self.pending.loc[self.pending["party_code"] >= 0, "party_code"])
+            summary.update({
+                "outstanding": float(self.pending["value"].sum()) if "value" in self.pending else 0.0,
+                "pending_parties": len(parties),
+                "unmatched_parties": int((~pd.Index(parties).isin(self.invoice_totals.index)).sum()),
+            })
+        return summary
+
+    @cached_property
+    def invoice_totals(self) -> pd.DataFrame:
+        # Per party code: invoice count, amount, last invoice date and its sales person
+        if self.invoices is None or "party_code" not in self.invoices:
+            return pd.DataFrame(columns=["invoices", "invoiced", "last_invoice", "last_salesperson"])
+        invoices = self.invoices[self.invoices["party_code"] >= 0]
+        if "day" in invoices:
+            invoices = invoices.sort_values("day", kind="stable")
+        grouped = invoices.groupby("party_code")
+        totals = pd.DataFrame({
+            "invoices": grouped.size(),
+            "invoiced": grouped["value"].sum() if "value" in invoices else 0.0,
+        })
+        if "day" in invoices:
+            totals["last_invoice"] = grouped["day"].last()
+        if "salesperson_code" in invoices:
+            totals["last_salesperson"] = grouped["salesperson_code"].last().map(self.salespeople)
+        return totals
+
+    @cached_property
+    def by_salesperson(self) -> pd.DataFrame:
+        """
+        Quotations, conversions and values per sales person, highest conversion rate first.
+        """
+        quotes = self.quotes[self.quotes["salesperson_code"] >= 0]
+        value = quotes["value"] if "value" in quotes else pd.Series(0.0, index=quotes.index)
+        grouped = quotes.assign(value=value, converted_value=value.where(quotes["converted"], 0.0)).groupby(
+            "salesperson_code")
+        table = pd.DataFrame({
+            "Quotations": grouped.size(),
+            "Converted": grouped["converted"].sum().astype(int),
+            "Quoted Value": grouped["value"].sum(),
+            "Converted Value": grouped["converted_value"].sum(),
+        })
+        table.insert(2, "Conversion Rate (%)", (table["Converted"] / table["Quotations"] * 100).round(1))
+        table.index = table.index.map(self.salespeople)
+        return table.rename_axis("Sales Person").sort_values(
+            ["Conversion Rate (%)", "Quotations"], ascending=False, kind="stable"
+        ).reset_index()
+
+    @cached_property
+    def by_party(self) -> pd.DataFrame:
+        """
+        Quote-to-cash per party (quoted, invoiced and pending), largest quoted value first.
+        """
+        quotes = self.quotes[self.quotes["party_code"] >= 0]
+        grouped = quotes.groupby("party_code")
+        table = pd.DataFrame({
+            "Quotations": grouped.size(),
+            "Converted": grouped["converted"].sum().astype(int),
+            "Quoted Value": grouped["value"].sum() if "value" in quotes else 0.0,
+        })
+        invoices = self.invoice_totals
+        table["Invoices"] = invoices["invoices"].reindex(table.index, fill_value=0).astype(int)
+        table["Invoiced Amount"] = invoices["invoiced"].reindex(table.index, fill_value=0.0)
+        if self.has_outstanding():
+            pending = self.pending[self.pending["party_code"] >= 0].groupby("party_code")["value"].sum()
+            table["Pending Amount"] = pending.reindex(table.index, fill_value=0.0)
+        table.index = table.index.map(self.parties)
+        return table.rename_axis("Party").sort_values("Quoted Value", ascending=False, kind="stable").reset_index()
+
+    @cached_property
+    def outstanding(self) -> pd.DataFrame:
+        """
+        Pending amounts per party next to what the party was invoiced, largest pending amount first.
+        """
+        pending = self.pending[self.pending["party_code"] >= 0].groupby("party_code")["value"].sum()
+        table = pending.rename("Pending Amount").to_frame()
+        invoices = self.invoice_totals
+        table["Invoiced Amount"] = invoices["invoiced"].reindex(table.index, fill_value=0.0)
+        table["Pending Share (%)"] = (table["Pending Amount"] / table["Invoiced Amount"].where(
+            table["Invoiced Amount"] > 0) * 100).round(1)
+        if "last_invoice" in invoices:
+            table["Last Invoice"] = invoices["last_invoice"].reindex(table.index).dt.date
+        if "last_salesperson" in invoices:
+            table["Sales Person"] = invoices["last_salesperson"].reindex(table.index)
+        table.index = table.index.map(self.parties)
+        return table.rename_axis("Party").sort_values("Pending Amount", ascending=False, kind="stable").reset_index()
+
+
+def link_sheets(sheets: dict, resolver=None):
+    """
+    Links the quote-to-cash sheets among `sheets` ({sheet name: cleaned frame}). Parties are matched
+    on their normalized names, or on the entity ids of `resolver` (a dashboard.entities.EntityIndex)
+    when given. Returns None unless quotations and invoices, or invoices and pending payments, are present.
+    """
+    frames = {}
+    for name, df in sheets.items():
+        kind = sheet_kind(name)
+        if kind in JOIN_KINDS and kind not in frames:
+            frames[kind] = _frame(kind, df)
+    if "inv_2025" not in frames or len(frames) < 2:
+        return None
+
+    if resolver is not None:  # New names of all sheets are resolved as one update
+        resolver.add(np.concatenate([np.asarray(_codes(frame["party"])[1], dtype=object)
+                                     for frame in frames.values() if "party" in frame] or [[]]))
+    parties = _encode(frames, "party", resolver.resolve if resolver is not None else normalize_names)
+    salespeople = _encode(frames, "salesperson", partial(normalize_names, legal_suffixes=False))
+    _encode(frames, "product", partial(normalize_names, legal_suffixes=False))
+    match_product = all("product" in frames.get(kind, ()) for kind in ("qt_register_2025", "inv_2025"))
+    return QuoteToCash(frames, parties, salespeople, match_product, resolved=resolver is not None)
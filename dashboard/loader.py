@@ -0,0 +1,261 @@
+"""
+On-demand sheet loading: the sheet list comes from workbook metadata and a sheet is only parsed
+and cleaned the first time it is requested. Results are kept in the shared workbook cache.
+"""
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from dashboard.aggregates import build_cube
+from dashboard.cache import WorkbookCache
+from dashboard.cleaning import clean_sheet
+from dashboard.headers import cached_header_row, header_signature, remember_header_row
+from dashboard.ingest import WorkbookReader, list_sheets
+from dashboard.profiling import stage
+from dashboard.refresh import refresh_sheet, row_hashes, update_cube
+from dashboard.store import FRAME_STORE
+
+# Worker processes for parallel sheet parsing (1 disables it) and the smallest workbook worth it
+INGEST_WORKERS = int(os.environ.get("MASTERSHEET_INGEST_WORKERS", str(os.cpu_count() or 1)))
+PARALLEL_MIN_BYTES = int(float(os.environ.get("MASTERSHEET_PARALLEL_MIN_MB", "2")) * 1024 * 1024)
+
+_POOLS = {}  # workers -> ProcessPoolExecutor
+_POOL_LOCK = threading.Lock()
+
+
+def workbook_sheet_names(source, cache: WorkbookCache, key: str) -> list:
+    """
+    Returns the sheet names of a workbook without parsing any sheet data.
+    """
+    sheet_names = cache.sheet_names(key)
+    if sheet_names is None:
+        sheet_names = list_sheets(source)
+        cache.put_sheet_names(key, sheet_names)
+    return sheet_names
+
+
+def load_sheets(source, sheet_names: list, skiprows_map: dict, cache: WorkbookCache, key: str,
+                workers: int = None):
+    """
+    Returns (sheets, timings) for the requested sheets. Cached sheets are read from the store;
+    the rest are parsed together from a single workbook handle, cleaned and cached.
+    `timings` only lists the sheets that actually had to be parsed.
+
+    `skiprows_map` entries are manual overrides; other sheets with a known header signature have
+    their header row detected (and remembered for this workbook), the rest start at row 0.
+    `workers` overrides INGEST_WORKERS (see refresh_sheets).
+    """
+    sheets, timings, _ = refresh_sheets(source, sheet_names, skiprows_map, cache, key, workers=workers)
+    return sheets, timings
+
+
+def refresh_sheets(source, sheet_names: list, skiprows_map: dict, cache: WorkbookCache, key: str,
+                   previous_key: str = None, workers: int = None, on_sheet=None):
+    """
+    load_sheets() for a new revision of a workbook. Sheets that have to be parsed are compared
+    row by row with the cached sheets of revision `previous_key` (when available) and only the
+    changed rows are cleaned. Returns (sheets, timings, deltas), where `deltas` maps the sheets
+    refreshed this way to their SheetDelta.
+
+    Several sheets of a large workbook are parsed and cleaned in parallel (see _use_pool); the
+    worker processes write their results to the cache, from which they are memory-mapped here.
+    Sheets parsed in this process are read back from the cache too, so both paths return the
+    same memory-mapped frames (a sheet the cache cannot hold is returned as cleaned).
+
+    `on_sheet(sheet_name, df, seconds, delta)` is called as soon as each sheet is ready (cached
+    sheets first, with seconds None). If it raises, sheets not yet started are abandoned.
+    """
+    on_sheet = on_sheet or (lambda *args: None)
+    sheets, missing = {}, []
+    for sheet_name in sheet_names:
+        df = cache.get_sheet(key, sheet_name)
+        if df is None:
+            missing.append(sheet_name)
+        else:
+            sheets[sheet_name] = df
+            on_sheet(sheet_name, df, None, None)
+
+    timings, deltas = {}, {}
+    skiprows = {name: skiprows_map.get(name, cached_header_row(key, name)) for name in missing}
+    workers = INGEST_WORKERS if workers is None else workers
+    if _use_pool(source, missing, workers):
+        path, spooled = _source_path(source, cache, key)
+        futures = {}
+        try:
+            futures = {
+                _ingest_pool(workers).submit(
+                    _sheet_job, path, name, skiprows[name], cache.directory, cache.max_bytes, key, previous_key
+                ): name
+                for name in missing
+            }
+            for future in as_completed(futures):  # In the order the workers finish them
+                sheet_name = futures[future]
+                with stage("parse+clean (worker)", sheet=sheet_name):
+                    header_row, timings[sheet_name], delta = future.result()
+                remember_header_row(key, sheet_name, header_row)
+                df = cache.get_sheet(key, sheet_name)
+                if df is not None:  # Otherwise the worker could not write the cache; parsed again below
+                    sheets[sheet_name] = df
+                    if delta is not None:
+                        deltas[sheet_name] = delta
+                    on_sheet(sheet_name, df, timings[sheet_name], delta)
+        except BrokenProcessPool:
+            _reset_pool(workers)  # Workers died (e.g. out of memory); the remaining sheets are parsed here
+        except BaseException:
+            for future in futures:
+                future.cancel()  # Sheets already being parsed finish in the background (into the cache)
+            raise
+        finally:
+            if spooled:
+                os.remove(path)
+        missing = [name for name in missing if name not in sheets]
+
+    if missing:
+        with WorkbookReader(source) as reader:
+            for sheet_name in missing:
+                df, header_row, timings[sheet_name], delta = _process_sheet(
+                    reader, sheet_name, skiprows[sheet_name], cache, key, previous_key
+                )
+                cached = cache.get_sheet(key, sheet_name)
+                sheets[sheet_name] = df if cached is None else cached
+                remember_header_row(key, sheet_name, header_row)
+                if delta is not None:
+                    deltas[sheet_name] = delta
+                on_sheet(sheet_name, sheets[sheet_name], timings[sheet_name], delta)
+    return {name: sheets[name] for name in sheet_names}, timings, deltas
+
+
+def ingest_job(job, source, sheet_names: list, skiprows_map: dict, cache: WorkbookCache, key: str,
+               previous_key: str = None, previous_cubes: dict = None) -> dict:
+    """
+    Job function (see dashboard.jobs.submit) loading sheets in the background. Each sheet is put
+    in the shared frame store under "<key>:<sheet name>" and published as soon as it is ready, as
+    {"cube", "seconds", "delta"}: its aggregate cube (updated from `previous_cubes` when the sheet
+    was refreshed from revision `previous_key`), parse time and SheetDelta. Sheets already in the
+    store are not parsed again. Returns {"seconds"}.
+    """
+    start = time.perf_counter()
+    previous_cubes = previous_cubes or {}
+    total = len(sheet_names)
+
+    def ready(sheet_name, df, seconds, delta):
+        store_key = f"{key}:{sheet_name}"
+        FRAME_STORE.put(store_key, df)
+        cube = None
+        if delta is not None and previous_cubes.get(sheet_name) is not None:
+            cube = update_cube(previous_cubes[sheet_name], sheet_name, df, delta)
+        job.publish(sheet_name, {"cube": cube or build_cube(sheet_name, df), "seconds": seconds, "delta": delta})
+        done = len(job.partial_results())
+        job.update(done / total, f"{done} of {total} sheet(s) ready")
+        job.check()  # Cancelling abandons the sheets not started yet
+
+    stored = [name for name in sheet_names if f"{key}:{name}" in FRAME_STORE]
+    for sheet_name in stored:
+        df = FRAME_STORE.get(f"{key}:{sheet_name}")
+        if df is not None:
+            ready(sheet_name, df, None, None)
+    missing = [name for name in sheet_names if name not in job.partial_results()]
+    if missing:
+        job.update(message=f"Parsing {len(missing)} sheet(s): {', '.join(missing)}")
+        refresh_sheets(source, missing, skiprows_map, cache, key, previous_key=previous_key, on_sheet=ready)
+    return {"seconds": time.perf_counter() - start}
+
+
+def _process_sheet(reader: WorkbookReader, sheet_name: str, skiprows, cache: WorkbookCache, key: str,
+                   previous_key: str = None):
+    """
+    Parses, cleans (or refreshes from `previous_key`) and caches one sheet.
+    Returns (cleaned sheet, header row, parse seconds, SheetDelta or None).
+    """
+    start = time.perf_counter()
+    with stage("parse", sheet=sheet_name):
+        raw_df = reader.read_sheet(sheet_name, skiprows=skiprows, header_signature=header_signature(sheet_name))
+    seconds = time.perf_counter() - start
+
+    with stage("clean", sheet=sheet_name):
+        hashes = row_hashes(raw_df)
+        previous_hashes = previous = delta = None
+        if previous_key:
+            previous_hashes = cache.get_row_hashes(previous_key, sheet_name)
+            previous = cache.get_sheet(previous_key, sheet_name) if previous_hashes is not None else None
+        if previous is not None:
+            df, delta = refresh_sheet(sheet_name, raw_df, hashes, previous, previous_hashes)
+        else:
+            df = clean_sheet(sheet_name, raw_df)
+    with stage("cache write", sheet=sheet_name):
+        cache.put_sheet(key, sheet_name, df)
+        cache.put_row_hashes(key, sheet_name, hashes)
+    return df, reader.header_rows[sheet_name], seconds, delta
+
+
+# --- Parallel ingestion ---
+
+def _sheet_job(path: str, sheet_name: str, skiprows, cache_dir: str, cache_max_bytes: int, key: str,
+               previous_key: str):
+    """
+    Worker process entry point. The cleaned sheet goes to the cache as an Arrow file instead of
+    being pickled back; only (header row, parse seconds, SheetDelta or None) are returned.
+    """
+    with WorkbookReader(path) as reader:
+        _, header_row, seconds, delta = _process_sheet(
+            reader, sheet_name, skiprows, WorkbookCache(cache_dir, cache_max_bytes), key, previous_key
+        )
+    return header_row, seconds, delta
+
+
+def _source_size(source) -> int:
+    if isinstance(source, (bytes, bytearray)):
+        return len(source)
+    if isinstance(source, str):
+        return os.path.getsize(source)
+    if hasattr(source, "getbuffer"):
+        return source.getbuffer().nbytes
+    return 0
+
+
+def _use_pool(source, missing: list, workers: int) -> bool:
+    # Each worker reopens the workbook, which only pays off for several sheets of a large file
+    return workers > 1 and len(missing) > 1 and _source_size(source) >= PARALLEL_MIN_BYTES
+
+
+def _source_path(source, cache: WorkbookCache, key: str):
+    """
+    Returns (path, spooled): workers open the workbook from a file, so uploads are spooled to the
+    cache directory (dot-prefixed, so never evicted or listed as an entry) for the duration of the load.
+    """
+    if isinstance(source, str):
+        return source, False
+    path = os.path.join(cache.directory, f".{key}.{uuid.uuid4().hex}.xlsx")
+    with open(path, "wb") as fh:
+        fh.write(source if isinstance(source, (bytes, bytearray)) else source.getvalue())
+    return path, True
+
+
+def _ingest_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Returns the shared pool with `workers` processes, started on first use.
+    """
+    with _POOL_LOCK:
+        pool = _POOLS.get(workers)
+        if pool is None:
+            # Spawned rather than forked: the Streamlit server process runs many threads
+            pool = _POOLS[workers] = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return pool
+
+
+def _reset_pool(workers: int = None):
+    """
+    Shuts down the pool with `workers` processes (all pools when None); the next load starts a new one.
+    """
+    with _POOL_LOCK:
+        sizes = list(_POOLS) if workers is None else [workers]
+        for size in sizes:
+            pool = _POOLS.pop(size, None)
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,177 @@
+"""
+Stage instrumentation for the hot paths (ingestion, cleaning, aggregation, reports, charts and
+tables). Code marks a stage with `with stage("clean", sheet=name):`; while a Recorder is active
+in the current context (one Streamlit script run), each stage records its wall time, CPU time of
+the running thread and, when memory tracing is on, the memory it allocated. Without an active
+recorder stages cost next to nothing.
+"""
+import contextvars
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:  # Optional sampling profiler with more readable call trees than cProfile
+    import pyinstrument
+except ImportError:
+    pyinstrument = None
+
+# JSON-lines file each recorded script run is appended to (unset: no log)
+PROFILE_LOG = os.environ.get("MASTERSHEET_PROFILE_LOG")
+
+PROFILERS = ("cProfile", "pyinstrument") if pyinstrument is not None else ("cProfile",)
+
+_RECORDER = contextvars.ContextVar("mastersheet_recorder", default=None)
+_LOG_LOCK = threading.Lock()
+
+
+class Recorder:
+    """
+    Collects the stages of one run. With `trace_memory`, tracemalloc runs while the recorder is
+    active (it is process-wide, so it slows every session down meanwhile).
+    """
+
+    def __init__(self, trace_memory: bool = False, **labels):
+        self.trace_memory = trace_memory
+        self.labels = labels
+        self.records = []
+        self._depth = 0
+        self._stack = []  # [baseline bytes, highest peak seen in nested stages] per open traced stage
+        self._token = None
+        self._started_tracing = False
+        self._origin = time.perf_counter()
+
+    def start(self):
+        previous = _RECORDER.get()
+        if previous is not None:
+            previous.stop()  # A run that ended early (st.stop, rerun) never stopped its recorder
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._token = _RECORDER.set(self)
+        return self
+
+    def stop(self):
+        if self._token is not None:
+            _RECORDER.set(None)
+            self._token = None
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        return self
+
+    @contextmanager
+    def stage(self, name: str, **labels):
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                self._stack[-1][1] = max(self._stack[-1][1], peak)  # Keep the outer stage's peak
+            tracemalloc.reset_peak()
+            self._stack.append([current, current])
+        depth = self._depth
+        self._depth += 1
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            record = {
+                "stage": name, **labels, "depth": depth, "start_s": wall - self._origin,
+                "wall_s": time.perf_counter() - wall, "cpu_s": time.thread_time() - cpu,
+            }
+            if tracing and not tracemalloc.is_tracing():
+                self._stack.pop()  # Another session stopped tracing meanwhile; no memory figures
+            elif tracing:
+                baseline, nested_peak = self._stack.pop()
+                current, peak = tracemalloc.get_traced_memory()
+                peak = max(peak, nested_peak)
+                record["alloc_peak_bytes"] = peak - baseline
+                record["alloc_net_bytes"] = current - baseline
+                if self._stack:
+                    self._stack[-1][1] = max(self._stack[-1][1], peak)
+            self.records.append(record)
+
+    def ordered(self) -> list:
+        """
+        Records in the order the stages started (they are appended as they finish).
+        """
+        return sorted(self.records, key=lambda record: record["start_s"])
+
+    def to_json(self) -> dict:
+        return {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"), **self.labels, "stages": self.ordered()}
+
+
+def current_recorder():
+    return _RECORDER.get()
+
+
+def background_recorder(**labels):
+    """
+    Starts a Recorder for background work launched from a recorded run, in a copy of that run's
+    context (see dashboard.jobs), or returns None when the run records nothing. The work outlives
+    the run, so it records into its own list, labelled like the run plus `labels`; memory is not
+    traced. Stop it (and write_log it) when the work ends.
+    """
+    parent = _RECORDER.get()
+    if parent is None:
+        return None
+    _RECORDER.set(None)  # Detach this context from the run's recorder before starting our own
+    return Recorder(**parent.labels, **labels).start()
+
+
+@contextmanager
+def stage(name: str, **labels):
+    """
+    Marks a stage of the active recorder; does nothing when no recorder is active.
+    """
+    recorder = _RECORDER.get()
+    if recorder is None:
+        yield
+    else:
+        with recorder.stage(name, **labels):
+            yield
+
+
+def write_log(recorder: Recorder, path: str = PROFILE_LOG):
+    """
+    Appends the run as one JSON line to `path` (if set).
+    """
+    if not path:
+        return
+    line = json.dumps(recorder.to_json(), default=str)
+    with _LOG_LOCK, open(path, "a", encoding="utf-8") as fh:
+        fh.write(line + "\n")
+
+
+class ProfileCapture:
+    """
+    Opt-in profile of the current thread between start() and stop(), which returns a text report.
+    """
+
+    def __init__(self, profiler: str = "cProfile"):
+        self.profiler = profiler if profiler in PROFILERS else "cProfile"
+        self._profile = None
+
+    def start(self):
+        if self.profiler == "pyinstrument":
+            self._profile = pyinstrument.Profiler(async_mode="disabled")
+            self._profile.start()
+        else:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        return self
+
+    def stop(self) -> str:
+        if self.profiler == "pyinstrument":
+            self._profile.stop()
+            return self._profile.output_text(unicode=True, color=False)
+        self._profile.disable()
+        out = io.StringIO()
+        pstats.Stats(self._profile, stream=out).sort_stats("cumulative").print_stats(40)
+        return out.getvalue()
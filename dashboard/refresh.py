@@ -0,0 +1,132 @@
+"""
+Incremental refresh between revisions of the same workbook. The master sheet is re-uploaded with
+only a few rows changed, so each raw row is hashed and compared with the previous revision: rows
+whose content is unchanged keep their cleaned version, only added or edited rows are cleaned, and
+aggregate cubes are updated by adding the new rows and subtracting the removed ones.
+"""
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from dashboard.aggregates import AggregateCube, build_cube
+from dashboard.cleaning import CLEANERS, clean_sheet, normalize_dtypes, sheet_kind
+
+# Column identifying a record in each sheet kind, used to tell edited rows from added/removed ones
+ROW_KEYS = {
+    "qt_register_2025": "Quotation ID",
+    "inv_2025": "INV No.",
+    "meeting_agenda": "No:",
+    "payment_pending": "PARTY NAME",
+}
+
+
+def row_hashes(raw: pd.DataFrame) -> np.ndarray:
+    """
+    One uint64 content hash per raw row. The column names are mixed in, so rows of a sheet whose
+    header changed never match the previous revision.
+    """
+    hashes = pd.util.hash_pandas_object(raw, index=False).to_numpy()
+    columns = hashlib.sha1(repr(list(raw.columns)).encode("utf-8")).digest()
+    return hashes ^ np.frombuffer(columns[:8], dtype=np.uint64)[0]
+
+
+def diff_rows(old_hashes: np.ndarray, new_hashes: np.ndarray):
+    """
+    Matches rows of two revisions by content. Returns (position map, added positions): the map
+    gives, for every old row position, its position in the new revision or -1 if the row is gone;
+    added positions are the new rows without an unchanged counterpart. Duplicate rows are matched
+    one to one, in order.
+    """
+    old = pd.DataFrame({"hash": old_hashes, "old": np.arange(len(old_hashes))})
+    new = pd.DataFrame({"hash": new_hashes, "new": np.arange(len(new_hashes))})
+    old["nth"] = old.groupby("hash", sort=False).cumcount()
+    new["nth"] = new.groupby("hash", sort=False).cumcount()
+    matched = old.merge(new, on=["hash", "nth"], how="inner")
+
+    position_map = np.full(len(old_hashes), -1, dtype=np.int64)
+    position_map[matched["old"].to_numpy()] = matched["new"].to_numpy()
+    is_kept = np.zeros(len(new_hashes), dtype=bool)
+    is_kept[matched["new"].to_numpy()] = True
+    return position_map, np.flatnonzero(~is_kept)
+
+
+class SheetDelta:
+    """
+    What changed in one sheet between two revisions: the cleaned rows that were added and removed
+    (an edited row is both), the number of unchanged cleaned rows, and counts of added, edited and
+    removed records by row key.
+    """
+
+    def __init__(self, added: pd.DataFrame, removed: pd.DataFrame, unchanged: int, row_key: str = None):
+        self.added = added
+        self.removed = removed
+        self.unchanged = unchanged
+        if row_key and row_key in added.columns and row_key in removed.columns:
+            added_keys = set(added[row_key].dropna().astype(str).str.strip())
+            removed_keys = set(removed[row_key].dropna().astype(str).str.strip())
+            self.edited_records = len(added_keys & removed_keys)
+            self.added_records = len(added_keys - removed_keys)
+            self.removed_records = len(removed_keys - added_keys)
+        else:
+            self.edited_records = 0
+            self.added_records = len(added)
+            self.removed_records = len(removed)
+
+    def is_empty(self) -> bool:
+        return self.added.empty and self.removed.empty
+
+
+def refresh_sheet(sheet_name: str, raw: pd.DataFrame, hashes: np.ndarray,
+                  previous: pd.DataFrame, previous_hashes: np.ndarray):
+    """
+    Builds the cleaned sheet of a new revision from the previous revision's cleaned sheet.
+    `previous` must be indexed by raw row position (as cleaned sheets are). Only the raw rows
+    without an unchanged counterpart go through the cleaner. Returns (cleaned, SheetDelta).
+    """
+    position_map, added_positions = diff_rows(previous_hashes, hashes)
+    new_positions = position_map[previous.index.to_numpy()]
+    is_kept = new_positions >= 0
+
+    kept = previous[is_kept]
+    kept.index = pd.Index(new_positions[is_kept])
+    removed = previous[~is_kept]
+    added = clean_sheet(sheet_name, raw.iloc[added_positions]) if len(added_positions) else previous.iloc[:0]
+    if added.empty:
+        added = previous.iloc[:0]
+
+    if sheet_kind(sheet_name) in CLEANERS:
+        cleaned = pd.concat([kept, added]).sort_index(kind="stable") if len(added) else kept
+        # Dtypes follow the values of the whole sheet (categories, integer widths), as in a full clean
+        cleaned = normalize_dtypes(cleaned)
+    else:
+        cleaned = raw  # Sheets without a cleaner are used as parsed
+    delta = SheetDelta(added, removed, len(kept), ROW_KEYS.get(sheet_kind(sheet_name)))
+    return cleaned, delta
+
+
+def update_cube(cube: AggregateCube, sheet_name: str, cleaned: pd.DataFrame, delta: SheetDelta):
+    """
+    Applies a delta to the previous revision's cube: the cube table is regrouped together with the
+    added rows' counts and the removed rows' negated counts, so the cost depends on the delta and the
+    cube size rather than on the sheet size. Returns None if the layouts differ (rebuild instead).
+    """
+    added = build_cube(sheet_name, delta.added)
+    removed = build_cube(sheet_name, delta.removed)
+    if added is None or removed is None or added.dimensions != cube.dimensions or removed.dimensions != cube.dimensions:
+        return None
+
+    negated = removed.table.assign(count=-removed.table["count"], value=-removed.table["value"])
+    parts = [t for t in (cube.table, added.table, negated) if len(t)]
+    table = pd.concat(parts, ignore_index=True) if parts else cube.table
+    if cube.dimensions:
+        table = table.groupby(cube.dimensions, dropna=False, observed=True, sort=False)[["count", "value"]].sum()
+        table = table[table["count"] != 0].reset_index()
+        for dimension in cube.dimensions:
+            if dimension != "day":  # Labels get the sheet's current dtype (and categories), as in build_cube
+                table[dimension] = table[dimension].astype(cleaned[cube.columns[dimension]].dtype)
+    else:
+        table = table[["count", "value"]].sum().to_frame().T.astype({"count": "int64"})
+
+    distinct_ids = cleaned[cube.columns["id"]].nunique() if "id" in cube.columns else len(cleaned)
+    return AggregateCube(table, cube.dimensions, cube.columns, cube.has_value, distinct_ids, len(cleaned))
@@ -0,0 +1,349 @@
+"""
+Renderer-independent sheet reports. A report is a title plus an ordered list of blocks (metric
+cards, headings, tables, chart specs, notes) computed from a cleaned sheet and its aggregate cube.
+The Streamlit app renders reports on the page; dashboard.batch writes them to files.
+"""
+import pandas as pd
+
+from dashboard.charts import bar_chart, heatmap_chart, hist_chart, line_chart
+from dashboard.cleaning import sheet_kind
+from dashboard.timeseries import GRANULARITIES
+
+# Rows shown in the raw data preview of every sheet
+PREVIEW_ROWS = 5
+# Lengths (days) of the recent windows compared with the window before them on dated sheets
+RECENT_WINDOWS = [7, 30, 90]
+
+
+def _block(block_type: str, **fields) -> dict:
+    return {"type": block_type, **fields}
+
+
+def _metric(label: str, value, fmt: str = "{}") -> dict:
+    return {"label": label, "value": value, "format": fmt}
+
+
+def _preview(df: pd.DataFrame) -> list:
+    # Marked as the preview, so a renderer can replace it with the full raw data explorer
+    return [_block("subheader", text="Raw Data Preview"),
+            _block("table", title=None, data=df.head(PREVIEW_ROWS), preview=True)]
+
+
+def _further_analysis(*items: str) -> dict:
+    return _block("markdown", text="**Further analysis could include:**\n" + "\n".join(f"- {item}" for item in items))
+
+
+def _trend(cube, granularity: str, label: str, measure: str = "count") -> pd.DataFrame:
+    # Totals per period as a two-column table, e.g. ['Month', 'Number of Quotations']
+    period = GRANULARITIES[granularity][0]
+    trend = cube.trend(granularity, measure).rename_axis(period).reset_index(name=label)
+    trend[period] = trend[period].astype(str)
+    return trend
+
+
+def _cumulative(cube, label: str, measure: str = "count") -> pd.DataFrame:
+    return cube.cumulative(measure).rename_axis('Date').reset_index(name=label)
+
+
+def _recent_activity(cube, count_label: str, value_label: str = None) -> pd.DataFrame:
+    """
+    Totals of the last 7/30/90 days of data next to the same-length window before them. Every
+    figure is a window query on the cube's prefix sums, so no rows are regrouped.
+    """
+    last = cube.series().bounds()[1]
+    rows = []
+    for days in RECENT_WINDOWS:
+        start, previous = last - pd.Timedelta(days=days - 1), last - pd.Timedelta(days=2 * days - 1)
+        row = {"Window": f"Last {days} days", count_label: int(cube.window(start, last)),
+               "Previous": int(cube.window(previous, start - pd.Timedelta(days=1)))}
+        if value_label:
+            row[value_label] = cube.window(start, last, "value")
+            row["Previous Value"] = cube.window(previous, start - pd.Timedelta(days=1), "value")
+        rows.append(row)
+    table = pd.DataFrame(rows)
+    table.insert(3, "Change (%)", ((table[count_label] / table["Previous"].where(table["Previous"] > 0) - 1) * 100
+                                   ).round(1))
+    return table
+
+
+def _time_blocks(cube, granularity: str, noun: str, count_label: str, value_label: str, color: str) -> list:
+    # Trend table and chart, cumulative chart and recent windows of a dated sheet
+    if not cube.has('day') or cube.series().empty():
+        return []
+    period, adjective, _ = GRANULARITIES[granularity]
+    trend = _trend(cube, granularity, count_label)
+    measure = "value" if cube.has_value else "count"
+    cumulative_label = f"Cumulative {value_label if cube.has_value else count_label}"
+    return [
+        _block("heading", text=f"{noun} Over Time:"),
+        _block("table", title=f"{adjective} {noun}:", data=trend),
+        _block("chart", spec=line_chart(
+            trend, x=period, y=count_label, title=f'{adjective} {noun}', xlabel=period, ylabel=count_label,
+            color=color
+        )),
+        _block("chart", spec=line_chart(
+            _cumulative(cube, cumulative_label, measure), x='Date', y=cumulative_label,
+            title=cumulative_label, xlabel='Date', ylabel=cumulative_label, color=color, figsize=(12, 6)
+        )),
+        _block("table", title="Recent Activity:",
+               data=_recent_activity(cube, count_label, value_label if cube.has_value else None)),
+    ]
+
+
+# --- Per-sheet reports ---
+
+def qt_register_2025_report(df: pd.DataFrame, cube, granularity: str = "M") -> list:
+    top_salesperson = cube.by('salesperson').index[0] if cube.has('salesperson') and cube.rows else "N/A"
+    metrics = [_metric("Number of Quotations", cube.distinct_ids), _metric("Top Salesperson", top_salesperson)]
+    if 'Value' in df.columns:
+        metrics.append(_metric("Total Quotation Value", cube.total('value'), "BHD {:,.0f}"))
+    blocks = [_block("metrics", items=metrics, columns=3)] + _preview(df)
+
+    blocks.append(_block("subheader", text="Key Metrics & Reports"))
+    if cube.has('salesperson'):
+        quotations_by_sales_person = cube.frame_by('salesperson', 'Number of Quotations')
+        blocks.append(_block("table", title="Number of Quotations by Sales Person:", data=quotations_by_sales_person))
+    if cube.has('product'):
+        quotations_by_product = cube.frame_by('product', 'Number of Quotations')
+        blocks.append(_block("table", title="Number of Quotations by Product:", data=quotations_by_product.head(10)))
+    period, adjective, _ = GRANULARITIES[granularity]
+    if cube.has('day'):
+        quotation_trend = _trend(cube, granularity, 'Number of Quotations')
+        blocks.append(_block("table", title=f"{adjective} Quotation Trends:", data=quotation_trend))
+        if not cube.series().empty():
+            blocks.append(_block("table", title="Recent Activity:", data=_recent_activity(
+                cube, 'Number of Quotations', 'Quotation Value' if cube.has_value else None)))
+
+    blocks.append(_block("subheader", text="Advanced Visualizations"))
+    if cube.has('salesperson'):
+        blocks.append(_block("chart", spec=bar_chart(
+            quotations_by_sales_person, x='Number of Quotations', y='Sales Person',
+            title='Number of Quotations by Sales Person (2025)', xlabel='Number of Quotations', ylabel='Sales Person',
+            palette='viridis'
+        )))
+    if cube.has('product'):
+        blocks.append(_block("chart", spec=bar_chart(
+            quotations_by_product.head(10), x='Number of Quotations', y='Product',
+            title='Top 10 Products by Number of Quotations (2025)', xlabel='Number of Quotations', ylabel='Product',
+            palette='magma', figsize=(12, 7)
+        )))
+    if cube.has('day'):
+        blocks.append(_block("chart", spec=line_chart(
+            quotation_trend, x=period, y='Number of Quotations',
+            title=f'{adjective} Quotation Trends (2025)', xlabel=period, ylabel='Number of Quotations',
+            color='purple'
+        )))
+
+    if cube.has('salesperson') and cube.has('product'):
+        blocks.append(_block("heading", text="Heatmap: Quotations by Product and Sales Person"))
+        # Top sales people x top products from a sparse crosstab; everything else is bucketed into "Other"
+        heatmap_data = cube.crosstab('salesperson', 'product')
+        if not heatmap_data.empty:
+            blocks.append(_block("chart", spec=heatmap_chart(
+                heatmap_data, title='Number of Quotations per Product and Sales Person',
+                xlabel='Product', ylabel='Sales Person'
+            )))
+        else:
+            blocks.append(_block("info", text="No data available to generate Heatmap for Product and Sales Person."))
+
+    if cube.has('day'):
+        blocks.append(_block("heading", text="Cumulative Sum of Quotations Over Time"))
+        cumulative_quotations = _cumulative(cube, 'Cumulative Quotations')
+        if not cumulative_quotations.empty:
+            blocks.append(_block("chart", spec=line_chart(
+                cumulative_quotations, x='Date', y='Cumulative Quotations',
+                title='Cumulative Number of Quotations (2025)', xlabel='Date', ylabel='Cumulative Quotations',
+                color='green', figsize=(12, 6)
+            )))
+        else:
+            blocks.append(_block("info", text="No date data available to generate Cumulative Sum of Quotations."))
+    return blocks
+
+
+def inv_2025_report(df: pd.DataFrame, cube, granularity: str = "M") -> list:
+    invoice_count = cube.distinct_ids
+    salesperson_count = cube.nunique('salesperson') if cube.has('salesperson') else 0
+    blocks = [_block("metrics", columns=2, items=[
+        _metric("Invoice Count", invoice_count), _metric("Salespeople Count", salesperson_count),
+    ])] + _preview(df)
+
+    blocks += [
+        _block("subheader", text="Key Metrics & Reports (Example)"),
+        _block("text", text=f"Total Invoices: {invoice_count}"),
+        _block("text", text=f"Unique Sales Persons: {salesperson_count}"),
+        _further_analysis(
+            "Total invoice amount over time (if 'Amount' column exists and is numeric)",
+            "Invoices by Reseller/End User",
+            "Top Suppliers and Products in invoices",
+            "Sales performance by Sales Person (based on invoice value)",
+        ),
+    ]
+    if cube.has('salesperson'):
+        blocks.append(_block("heading", text="Invoices by Sales Person:"))
+        blocks.append(_block("chart", spec=bar_chart(
+            cube.frame_by('salesperson', 'Number of Invoices'), x='Number of Invoices', y='Sales Person',
+            title='Invoices by Sales Person', xlabel='Number of Invoices', ylabel='Sales Person',
+            palette='GnBu'
+        )))
+    blocks += _time_blocks(cube, granularity, "Invoices", 'Number of Invoices', 'Invoiced Amount', 'orange')
+    return blocks
+
+
+def meeting_agenda_report(df: pd.DataFrame, cube, granularity: str = "M") -> list:
+    total_approx_order_value = cube.total('value') if cube.has_value else 0
+    blocks = [_block("metrics", columns=2, items=[
+        _metric("Total Meeting Points", cube.distinct_ids),
+        _metric("Total Approximate Order Value", total_approx_order_value, "BHD {:,.0f}"),
+    ])] + _preview(df)
+
+    blocks += [
+        _block("subheader", text="Key Metrics & Reports (Example)"),
+        _block("text", text=f"Total Approximate Order Value: BHD {total_approx_order_value:,.2f}"),
+        _further_analysis(
+            "Average Order Value per meeting point",
+            "Meeting points by Action By person",
+            "Distribution of Margin",
+            "Trends in meeting topics or order values over time",
+        ),
+    ]
+    if cube.has('salesperson'):
+        blocks.append(_block("heading", text="Points by Action By:"))
+        blocks.append(_block("chart", spec=bar_chart(
+            cube.frame_by('salesperson', 'Number of Points'), x='Number of Points', y='Action By',
+            title='Meeting Points by Action By Person', xlabel='Number of Points', ylabel='Action By',
+            palette='Spectral'
+        )))
+    blocks += _time_blocks(cube, granularity, "Meeting Points", 'Number of Points', 'Order Value Approx.', 'teal')
+
+    # A distribution needs the individual values, so this is the one chart read from the sheet itself
+    if 'Margin' in df.columns and pd.api.types.is_numeric_dtype(df['Margin']):
+        blocks.append(_block("heading", text="Margin Distribution:"))
+        blocks.append(_block("chart", spec=hist_chart(
+            df['Margin'].dropna(), title='Margin Distribution', xlabel='Margin', ylabel='Frequency', color='teal'
+        )))
+    return blocks
+
+
+def payment_pending_report(df: pd.DataFrame, cube, granularity: str = "M") -> list:
+    total_pending_amount = cube.total('value')
+    blocks = [_block("metrics", columns=2, items=[
+        _metric("Total Pending Amount", total_pending_amount, "BHD {:,.0f}"),
+        _metric("Parties with Pending Payments", cube.nunique('party')),
+    ])] + _preview(df)
+
+    blocks += [
+        _block("subheader", text="Key Metrics & Reports (Example)"),
+        _block("text", text=f"Total Pending Amount: BHD {total_pending_amount:,.2f}"),
+        _further_analysis(
+            "Top parties with highest pending amounts",
+            "Distribution of pending amounts",
+            "Contact person analysis",
+            "Aging of payments (if a 'Due Date' or similar column is available)",
+        ),
+    ]
+    if cube.has('party'):
+        top_parties = cube.frame_by('party', 'Amount', measure='value').head(10)
+        blocks.append(_block("table", title="Top 10 Parties by Pending Amount:", data=top_parties))
+        blocks.append(_block("chart", spec=bar_chart(
+            top_parties, x='Amount', y='PARTY NAME',
+            title='Top 10 Parties by Pending Amount', xlabel='Amount Pending (BHD)', ylabel='Party Name',
+            palette='coolwarm'
+        )))
+    return blocks
+
+
+def quotation_register_2023_report(df: pd.DataFrame, cube, granularity: str = "M") -> list:
+    # Generic column names, so specific analysis is limited without more info
+    return [
+        _block("warning", text="This sheet has generic column names (e.g., Unnamed: 0), making specific analysis "
+                               "challenging without more context."),
+    ] + _preview(df) + [
+        _block("text", text="Columns detected:", value=df.columns.tolist()),
+        _block("markdown", text="To perform meaningful analysis on this sheet, please provide more information "
+                                "about what each column represents."),
+    ]
+
+
+# --- Cross-sheet reports ---
+
+# Rows shown in the quote-to-cash party tables
+TOP_PARTIES = 20
+
+
+def quote_to_cash_report(links) -> dict:
+    """
+    Report of the linked quotations, invoices and pending payments of a workbook (see dashboard.joins).
+    """
+    summary = links.summary
+    metrics, blocks = [], []
+    if links.has_conversion():
+        rate = summary["converted"] / summary["quotations"] * 100 if summary["quotations"] else 0.0
+        metrics += [
+            _metric("Quotations Invoiced", f"{summary['converted']:,} of {summary['quotations']:,}"),
+            _metric("Conversion Rate", rate, "{:.1f}%"),
+            _metric("Invoiced Amount", summary["invoiced"], "BHD {:,.0f}"),
+        ]
+        by_salesperson = links.by_salesperson
+        blocks += [
+            _block("subheader", text="Conversion by Sales Person"),
+            _block("markdown", text="A quotation counts as converted when the same party is invoiced "
+                                    + ("for the same product " if links.match_product else "")
+                                    + "on or after the quotation date. Party names are matched ignoring case, "
+                                      "punctuation, spacing and legal suffixes (W.L.L., B.S.C., Co., ...)"
+                                    + (", and near-identical spellings are treated as one party." if links.resolved
+                                       else ".")),
+            _block("table", title=None, data=by_salesperson),
+        ]
+        if not by_salesperson.empty:
+            blocks.append(_block("chart", spec=bar_chart(
+                by_salesperson, x='Conversion Rate (%)', y='Sales Person',
+                title='Quotation Conversion Rate by Sales Person', xlabel='Converted Quotations (%)',
+                ylabel='Sales Person', palette='YlGnBu'
+            )))
+        blocks += [
+            _block("subheader", text="Quote-to-Cash by Party"),
+            _block("table", title=f"Top {TOP_PARTIES} Parties by Quoted Value:", data=links.by_party.head(TOP_PARTIES)),
+        ]
+    if links.has_outstanding():
+        metrics.append(_metric("Outstanding Amount", summary["outstanding"], "BHD {:,.0f}"))
+        outstanding = links.outstanding.head(TOP_PARTIES)
+        blocks += [
+            _block("subheader", text="Outstanding Cash"),
+            _block("table", title=f"Top {TOP_PARTIES} Parties by Pending Amount:", data=outstanding),
+        ]
+        if not outstanding.empty:
+            blocks.append(_block("chart", spec=bar_chart(
+                outstanding.head(10), x='Pending Amount', y='Party',
+                title='Top 10 Parties by Outstanding Amount', xlabel='Amount Pending (BHD)', ylabel='Party',
+                palette='coolwarm'
+            )))
+        if summary["unmatched_parties"]:
+            blocks.append(_block("info", text=f"{summary['unmatched_parties']} of {summary['pending_parties']} "
+                                              "parties with pending payments have no matching invoice."))
+    return {"sheet": None, "title": "Quote-to-Cash", "blocks": [_block("metrics", items=metrics, columns=len(metrics))] + blocks}
+
+
+# Sheet kind -> (report title, block builder). Builders that read the cube need one (see aggregates.CUBE_COLUMNS)
+REPORTS = {
+    "qt_register_2025": ("Quotation Register 2025", qt_register_2025_report),
+    "inv_2025": ("Invoices 2025", inv_2025_report),
+    "meeting_agenda": ("Meeting Agenda", meeting_agenda_report),
+    "payment_pending": ("Payment Pending", payment_pending_report),
+    "quotation_register_2023": ("Quotation Register 2023", quotation_register_2023_report),
+}
+
+
+def build_report(sheet_name: str, df: pd.DataFrame, cube=None, granularity: str = "M") -> dict:
+    """
+    Computes the report of a cleaned sheet: {"sheet", "title", "blocks"}. Block types are
+    metrics, subheader, heading, table, chart, text, markdown, info and warning. Sheets without
+    a specific report get an untitled raw data preview. Trends over time are binned per
+    `granularity` (a dashboard.timeseries.GRANULARITIES code).
+    """
+    if sheet_kind(sheet_name) not in REPORTS:
+        return {"sheet": sheet_name, "title": None, "blocks": [
+            _block("text", text=f"No specific processing logic defined for sheet: '{sheet_name}'. Displaying raw data."),
+            _block("table", title=None, data=df.head(PREVIEW_ROWS), preview=True),
+        ]}
+    title, builder = REPORTS[sheet_kind(sheet_name)]
+    return {"sheet": sheet_name, "title": title, "blocks": builder(df, cube, granularity)}
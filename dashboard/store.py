@@ -0,0 +1,127 @@
+"""
+Process-wide store of cleaned sheets shared by every Streamlit session. Frames are stored once,
+treated as immutable and handed out as read-only views; sessions only keep lightweight handles.
+The store keeps within a byte budget by evicting least recently used frames, preferring frames
+no live session references, and handles transparently reload evicted frames.
+"""
+import os
+import threading
+import weakref
+from collections import OrderedDict
+
+import pandas as pd
+
+STORE_MAX_BYTES = int(os.environ.get("MASTERSHEET_STORE_MAX_MB", "1024")) * 1024 * 1024
+
+
+class FrameStore:
+    """
+    Key -> DataFrame store with reference counts, a byte budget and LRU eviction.
+    """
+
+    def __init__(self, max_bytes: int = STORE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._frames = OrderedDict()  # key -> (frame, nbytes)
+        self._refs = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = self._misses = self._evictions = 0
+
+    def put(self, key: str, df: pd.DataFrame):
+        """
+        Stores a frame under `key` (the first frame stored for a key wins) and enforces the budget.
+        """
+        nbytes = int(df.memory_usage(index=True, deep=True).sum())
+        with self._lock:
+            if key not in self._frames:
+                self._frames[key] = (df, nbytes)
+                self._bytes += nbytes
+            self._frames.move_to_end(key)
+            self._evict()
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._frames
+
+    def get(self, key: str):
+        """
+        Returns a read-only view of the stored frame, or None if it is not (or no longer) stored.
+        Views are shallow copies: with pandas' copy-on-write (always on from pandas 3) writes to a
+        view never reach the stored frame.
+        """
+        with self._lock:
+            entry = self._frames.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._frames.move_to_end(key)
+            self._hits += 1
+        return entry[0].copy(deep=False)
+
+    def acquire(self, key: str):
+        with self._lock:
+            self._refs[key] = self._refs.get(key, 0) + 1
+
+    def release(self, key: str):
+        with self._lock:
+            count = self._refs.get(key, 0) - 1
+            if count > 0:
+                self._refs[key] = count
+            else:
+                self._refs.pop(key, None)
+            self._evict()
+
+    def _evict(self):
+        # Unreferenced frames go first; referenced ones only if the budget still cannot be met
+        for only_unreferenced in (True, False):
+            for key in list(self._frames):
+                if self._bytes <= self.max_bytes:
+                    return
+                if only_unreferenced and self._refs.get(key):
+                    continue
+                _, nbytes = self._frames.pop(key)
+                self._bytes -= nbytes
+                self._evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "frames": len(self._frames),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "referenced_frames": sum(1 for key in self._frames if self._refs.get(key)),
+                "references": sum(self._refs.values()),
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+            }
+
+
+FRAME_STORE = FrameStore()
+
+
+class FrameHandle:
+    """
+    A session's reference to a stored frame. `reload` rebuilds the frame (e.g. from the on-disk
+    workbook cache) if it is not stored yet or the store evicted it. The reference is released when
+    the handle is garbage collected, i.e. when the session that holds it drops it or goes away.
+    """
+
+    def __init__(self, key: str, reload, df: pd.DataFrame = None, store: FrameStore = FRAME_STORE):
+        self.key = key
+        self._reload = reload
+        self._store = store
+        store.acquire(key)  # Before put, so the new frame is not the first eviction candidate
+        if df is not None:
+            store.put(key, df)
+        weakref.finalize(self, store.release, key)
+
+    def frame(self) -> pd.DataFrame:
+        df = self._store.get(self.key)
+        if df is None:
+            # Return the reloaded frame itself: the store may evict it again straight away (it can
+            # exceed the budget, or another session's put can push it out)
+            df = self._reload()
+            self._store.put(self.key, df)
+            df = df.copy(deep=False)
+        return df
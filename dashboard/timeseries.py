@@ -0,0 +1,120 @@
+"""
+Time-series engine for the dated sheets. Counts and value sums are binned once per calendar day
+(datetime64[D]) over the sheet's whole date span and stored as prefix sums, so the total of any
+date window is two lookups, and day, week, month or quarter series are differences of the prefix
+sums at the bin edges rather than regroupings of the sheet.
+"""
+import numpy as np
+import pandas as pd
+
+# Granularity code -> (label, adjective, pandas period frequency). Weeks start on Monday.
+GRANULARITIES = {
+    "D": ("Day", "Daily", "D"),
+    "W": ("Week", "Weekly", "W-SUN"),
+    "M": ("Month", "Monthly", "M"),
+    "Q": ("Quarter", "Quarterly", "Q-DEC"),
+}
+
+_ONE_DAY = np.timedelta64(1, "D")
+
+
+class TimeSeries:
+    """
+    Per-day prefix sums of counts and values between the first and last day with data.
+    """
+
+    def __init__(self, days, counts=None, values=None):
+        days = np.asarray(days, dtype="datetime64[D]")
+        valid = ~np.isnat(days)
+        counts = np.ones(len(days)) if counts is None else np.asarray(counts, dtype="float64")
+        values = np.zeros(len(days)) if values is None else np.asarray(values, dtype="float64")
+        days, counts, values = days[valid], counts[valid], np.nan_to_num(values[valid])
+        if len(days):
+            self.start = days.min()
+            length = int((days.max() - self.start) // _ONE_DAY) + 1
+        else:
+            self.start, length = np.datetime64("NaT", "D"), 0
+        offsets = ((days - self.start) // _ONE_DAY).astype(np.int64)
+        self._prefix = {
+            measure: np.concatenate(([0.0], np.cumsum(np.bincount(offsets, weights=weights, minlength=length))))
+            for measure, weights in (("count", counts), ("value", values))
+        }
+        self.length = length
+
+    @classmethod
+    def from_table(cls, table: pd.DataFrame, day: str = "day"):
+        """
+        Series of a pre-aggregated table with a date column and "count"/"value" columns (a cube table).
+        """
+        return cls(table[day].to_numpy(dtype="datetime64[D]"), table["count"].to_numpy(),
+                   table["value"].to_numpy() if "value" in table else None)
+
+    def empty(self) -> bool:
+        return self.length == 0
+
+    def _offset(self, day) -> int:
+        # Position of a day in the prefix sums, clamped to the series span
+        offset = (np.datetime64(pd.Timestamp(day).date(), "D") - self.start) // _ONE_DAY
+        return int(min(max(offset, 0), self.length))
+
+    def window(self, start, end, measure: str = "count") -> float:
+        """
+        Total of `measure` from day `start` through day `end` (inclusive), in O(1).
+        """
+        if self.empty():
+            return 0.0
+        prefix = self._prefix[measure]
+        lo, hi = self._offset(start), self._offset(pd.Timestamp(end) + pd.Timedelta(days=1))
+        return float(prefix[hi] - prefix[lo]) if hi > lo else 0.0
+
+    def bounds(self):
+        if self.empty():
+            return None
+        return pd.Timestamp(self.start), pd.Timestamp(self.start + (self.length - 1) * _ONE_DAY)
+
+    def _edges(self, granularity: str) -> np.ndarray:
+        # Start day of every bin overlapping the span, followed by the end of the last bin
+        last = self.start + (self.length - 1) * _ONE_DAY
+        if granularity == "D":
+            return np.arange(self.start, last + 2 * _ONE_DAY, dtype="datetime64[D]")
+        if granularity == "W":
+            monday = self.start - ((self.start.astype(np.int64) + 3) % 7) * _ONE_DAY  # 1970-01-01 was a Thursday
+            starts = np.arange(monday, last + _ONE_DAY, 7 * _ONE_DAY)
+            return np.append(starts, starts[-1] + 7 * _ONE_DAY)
+        step = np.timedelta64({"M": 1, "Q": 3}[granularity], "M")
+        first = self.start.astype("datetime64[M]")
+        first -= first.astype(np.int64) % step.astype(np.int64) * np.timedelta64(1, "M")  # Quarters start Jan/Apr/Jul/Oct
+        starts = np.arange(first, last.astype("datetime64[M]") + np.timedelta64(1, "M"), step)
+        return np.append(starts, starts[-1] + step).astype("datetime64[D]")
+
+    def binned(self, granularity: str = "M", measure: str = "count", keep_empty: bool = False) -> pd.Series:
+        """
+        Totals of `measure` per day, week, month or quarter, indexed by period. Periods without
+        rows are left out unless `keep_empty`.
+        """
+        _, _, freq = GRANULARITIES[granularity]
+        if self.empty():
+            return pd.Series(dtype="float64", index=pd.PeriodIndex([], freq=freq))
+        edges = self._edges(granularity)
+        positions = np.clip((edges - self.start) // _ONE_DAY, 0, self.length).astype(np.int64)
+        totals = np.diff(self._prefix[measure][positions])
+        if measure == "count":
+            totals = totals.astype(np.int64)
+        index = pd.DatetimeIndex(edges[:-1].astype("datetime64[ns]")).to_period(freq)
+        if not keep_empty:
+            keep = np.diff(self._prefix["count"][positions]) != 0
+            totals, index = totals[keep], index[keep]
+        return pd.Series(totals, index=index)
+
+    def cumulative(self, measure: str = "count") -> pd.Series:
+        """
+        Running total of `measure` at the end of every day with rows, indexed by day.
+        """
+        if self.empty():
+            return pd.Series(dtype="float64", index=pd.DatetimeIndex([]))
+        counts = np.diff(self._prefix["count"])
+        active = np.flatnonzero(counts)
+        days = self.start + active * _ONE_DAY
+        totals = self._prefix[measure][active + 1]
+        return pd.Series(totals.astype(np.int64) if measure == "count" else totals,
+                         index=pd.DatetimeIndex(days.astype("datetime64[ns]")))
@@ -0,0 +1,76 @@
+import datetime
+import io
+import random
+
+import pytest
+from openpyxl import Workbook
+
+from dashboard.cache import WorkbookCache
+
+SALES_PEOPLE = ["Ali", "Sara ", "John", "Fatima", "Omar"]
+PRODUCTS = ["Firewall", "Switch", "Router", "AP", "License", "UPS", "Server"]
+COMPANIES = ["Alpha W.L.L.", "alpha wll", "Beta Co", "Gamma Trading", "Delta  Group", "Epsilon"]
+
+
+def _day(i: int) -> datetime.datetime:
+    return datetime.datetime(2025, 1, 1) + datetime.timedelta(days=i % 200)
+
+
+def build_workbook(rows: int = 120, seed: int = 1) -> Workbook:
+    """
+    A small workbook shaped like the master sheet: every sheet kind the dashboard cleans, text
+    dates in the quotation register, a title row above the agenda header and mixed-type amounts.
+    """
+    rng = random.Random(seed)
+    wb = Workbook()
+    wb.remove(wb.active)
+
+    ws = wb.create_sheet("QT Register 2025")
+    ws.append(["Date", "Quotation ID", "Company  Name", "Product", "Sales Person", "Value"])
+    for i in range(rows):
+        date = _day(i).strftime("%d//%m/%Y") if i % 17 == 0 else _day(i)
+        ws.append([date, f"Q{i}", rng.choice(COMPANIES), rng.choice(PRODUCTS), rng.choice(SALES_PEOPLE),
+                   rng.randint(100, 9000)])
+    ws.append([None, "bad", None, None, None, None])
+
+    ws = wb.create_sheet("2025 INV")
+    ws.append(["Date", "INV No.", "PARTY NAME", "Product", "Sales Person ", "Amount"])
+    for i in range(rows // 2):
+        ws.append([_day(i), f"INV{i}", rng.choice(COMPANIES), rng.choice(PRODUCTS), rng.choice(SALES_PEOPLE),
+                   rng.randint(100, 9000)])
+
+    ws = wb.create_sheet("Meeting Agenda")
+    ws.append(["SSS Meeting Agenda"])
+    ws.append([])
+    ws.append(["No:", "Date", "Customer", "Order Value Approx.", "Margin", "Action By"])
+    for i in range(rows // 3):
+        ws.append([i + 1, _day(i), rng.choice(COMPANIES), f"{rng.randint(1, 90)},{rng.randint(100, 999)}",
+                   rng.random(), rng.choice(SALES_PEOPLE)])
+
+    ws = wb.create_sheet("Payment Pending")
+    ws.append(["Payment pending as of today"])
+    ws.append(["PARTY NAME", "Contact Person", "Amount"])
+    for i in range(rows // 4):
+        ws.append([rng.choice(COMPANIES), "x", rng.choice([rng.randint(10, 5000), "TBD"])])
+
+    ws = wb.create_sheet("Archive")
+    ws.append(["a", "b", "c"])
+    for i in range(10):
+        ws.append([i, ["x", 1.5, None][i % 3], _day(i)])
+    return wb
+
+
+def workbook_bytes(wb: Workbook) -> bytes:
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def workbook():
+    return workbook_bytes(build_workbook())
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return WorkbookCache(str(tmp_path / "cache"), max_bytes=1 << 30)
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard.aggregates import build_cube
+from dashboard.cleaning import clean_sheet
+from dashboard.report import build_report
+
+PEOPLE = ["Ali", "Sara", "John", "Fatima", None]
+PRODUCTS = ["Firewall", "Switch", "Router", "AP", "UPS"]
+PARTIES = ["Alpha", "Beta", "Gamma", "Delta"]
+
+
+@pytest.fixture
+def quotations():
+    rng = np.random.default_rng(12)
+    n = 5000
+    raw = pd.DataFrame({
+        "Date": pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 150, n), unit="D"),
+        "Quotation ID": [f"Q{i}" for i in rng.integers(0, 4000, n)],  # Revised quotations repeat their id
+        "Company  Name": rng.choice(PARTIES, n),
+        "Product": rng.choice(PRODUCTS, n),
+        "Sales Person": rng.choice(np.array(PEOPLE, dtype=object), n),
+        "Value": rng.integers(100, 9000, n),
+    })
+    return clean_sheet("QT Register 2025", raw)
+
+
+@pytest.mark.parametrize("dimension, column", [("salesperson", "Sales Person"), ("product", "Product"),
+                                               ("party", "Company  Name")])
+def test_cube_totals_match_groupbys_of_the_sheet(quotations, dimension, column):
+    cube = build_cube("QT Register 2025", quotations)
+    counts = quotations[column].astype(object).value_counts()
+    sums = quotations.groupby(quotations[column].astype(object))["Value"].sum()
+    assert cube.by(dimension).to_dict() == counts.to_dict()
+    assert cube.by(dimension).is_monotonic_decreasing
+    assert cube.by(dimension, "value").to_dict() == pytest.approx(sums.to_dict())
+    assert cube.nunique(dimension) == quotations[column].nunique()
+    assert cube.frame_by(dimension, "Number").columns.tolist() == [column, "Number"]
+
+
+def test_cube_summary_figures_and_size(quotations):
+    cube = build_cube("QT Register 2025", quotations)
+    assert cube.total() == cube.rows == len(quotations)
+    assert cube.total("value") == pytest.approx(quotations["Value"].sum())
+    assert cube.distinct_ids == quotations["Quotation ID"].nunique()
+    # One row per occurring (sales person, product, party, day), however many rows the sheet has
+    keys = quotations[["Sales Person", "Product", "Company  Name", "Date"]].astype(object)
+    assert len(cube.table) == len(keys.drop_duplicates()) < len(quotations)
+
+
+def test_report_tables_are_answered_from_the_cube(quotations):
+    cube = build_cube("QT Register 2025", quotations)
+    blocks = build_report("QT Register 2025", quotations, cube)["blocks"]
+    tables = {b["title"]: b["data"] for b in blocks if b["type"] == "table" and b.get("title")}
+    metrics = {m["label"]: m["value"] for b in blocks if b["type"] == "metrics" for m in b["items"]}
+
+    by_person = tables["Number of Quotations by Sales Person:"].set_index("Sales Person")["Number of Quotations"]
+    assert by_person.to_dict() == quotations["Sales Person"].astype(object).value_counts().to_dict()
+    by_product = tables["Number of Quotations by Product:"].set_index("Product")["Number of Quotations"]
+    assert by_product.to_dict() == quotations["Product"].astype(object).value_counts().head(10).to_dict()
+    assert metrics["Number of Quotations"] == quotations["Quotation ID"].nunique()
+    assert metrics["Total Quotation Value"] == pytest.approx(quotations["Value"].sum())
+    assert metrics["Top Salesperson"] == quotations["Sales Person"].astype(object).value_counts().index[0]
+
+
+def test_sheets_without_a_cube_layout():
+    assert build_cube("Archive", pd.DataFrame({"a": [1, 2]})) is None
+    pending = build_cube("Payment Pending", pd.DataFrame({"PARTY NAME": ["A", "B", "A"], "Amount": [1.0, 2.0, 3.0]}))
+    assert pending.by("party", "value").to_dict() == {"A": 4.0, "B": 2.0}
+    assert not pending.has("day")
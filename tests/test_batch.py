@@ -0,0 +1,63 @@
+import json
+import os
+
+import pytest
+
+from dashboard import loader
+from dashboard.batch import INDEX_FILE, QUOTE_TO_CASH_DIR, report_workbook, run_batch
+from tests.conftest import build_workbook
+
+
+def test_unreadable_workbook_is_recorded_per_sheet(tmp_path):
+    source = tmp_path / "snapshots"
+    source.mkdir()
+    build_workbook(rows=40).save(source / "good.xlsx")
+    (source / "broken.xlsx").write_bytes(b"not a workbook")
+
+    summaries = run_batch(str(source), str(tmp_path / "reports"), workers=1, per_sheet=True,
+                          cache_dir=str(tmp_path / "cache"))
+    failed = [s for s in summaries if "error" in s]
+    assert [os.path.basename(s["workbook"]) for s in failed] == ["broken.xlsx"]
+    assert len(summaries) - len(failed) == 5  # One job per known sheet of the good workbook, plus quote-to-cash
+    with open(tmp_path / "reports" / INDEX_FILE, encoding="utf-8") as fh:
+        assert json.load(fh) == json.loads(json.dumps(summaries, default=str))
+
+
+def test_batch_jobs_do_not_start_an_ingest_pool(tmp_path, monkeypatch):
+    path = tmp_path / "book.xlsx"
+    build_workbook(rows=40).save(path)
+    monkeypatch.setattr(loader, "PARALLEL_MIN_BYTES", 0)
+    monkeypatch.setattr(loader, "INGEST_WORKERS", 4)
+
+    def no_pool(workers):
+        pytest.fail(f"batch job started an ingest pool of {workers}")
+
+    monkeypatch.setattr(loader, "_ingest_pool", no_pool)
+    summary = report_workbook(str(path), str(tmp_path / "reports"), cache_dir=str(tmp_path / "cache"))
+    assert len(summary["sheets"]) == 5  # Four sheet reports plus quote-to-cash
+
+
+def _reports(summaries) -> dict:
+    written = {}
+    for summary in summaries:
+        for entry in summary["sheets"]:
+            name = entry["sheet"] or entry["report"]
+            with open(os.path.join(entry["directory"], "report.json"), encoding="utf-8") as fh:
+                written[name] = json.load(fh)
+    return written
+
+
+def test_per_sheet_batches_build_the_quote_to_cash_report(tmp_path):
+    source = tmp_path / "snapshots"
+    source.mkdir()
+    build_workbook(rows=60).save(source / "book.xlsx")
+
+    per_workbook = run_batch(str(source), str(tmp_path / "whole"), workers=1, cache_dir=str(tmp_path / "cache"))
+    per_sheet = run_batch(str(source), str(tmp_path / "split"), workers=2, per_sheet=True,
+                          cache_dir=str(tmp_path / "cache-split"))
+    assert not any("error" in s for s in per_workbook + per_sheet)
+    assert len(per_sheet) == 5
+    follow_up = [s for s in per_sheet if any(e.get("report") == "quote-to-cash" for e in s["sheets"])]
+    assert len(follow_up) == 1 and len(follow_up[0]["sheets"]) == 1
+    assert os.path.isdir(tmp_path / "split" / "book" / QUOTE_TO_CASH_DIR)
+    assert _reports(per_sheet) == _reports(per_workbook)
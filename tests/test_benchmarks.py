@@ -0,0 +1,56 @@
+import json
+
+import pandas as pd
+
+from benchmarks.generate import QR2023_PREAMBLE_ROWS, SHEET_WRITERS, generate_workbook, sheet_rows
+from benchmarks.run import STAGES, main
+from dashboard.headers import SKIPROWS_OVERRIDES, header_signature
+from dashboard.ingest import WorkbookReader
+
+
+def _read(path) -> dict:
+    with WorkbookReader(str(path)) as reader:
+        return {name: reader.read_sheet(name, skiprows=SKIPROWS_OVERRIDES.get(name),
+                                        header_signature=header_signature(name))
+                for name in reader.sheet_names}
+
+
+def test_generated_workbooks_follow_the_real_layouts(tmp_path):
+    counts = generate_workbook(str(tmp_path / "a.xlsx"), 300, seed=5)
+    assert counts == sheet_rows(300)
+    assert counts["QT Register 2025"] == 300 and counts["2025 INV"] == 150
+    sheets = _read(tmp_path / "a.xlsx")
+    assert list(sheets) == list(SHEET_WRITERS)
+    assert {name: len(df) for name, df in sheets.items()} == counts
+    assert SKIPROWS_OVERRIDES["Quotation Register 2023"] == QR2023_PREAMBLE_ROWS
+    assert list(sheets["Quotation Register 2023"].columns) == ["Ref", "Client", "Date", "Value"]
+    for name in ("QT Register 2025", "2025 INV", "Meeting Agenda", "Payment Pending"):
+        assert header_signature(name) <= {str(c).strip() for c in sheets[name].columns}, name
+
+
+def test_generation_is_deterministic_per_seed(tmp_path):
+    generate_workbook(str(tmp_path / "a.xlsx"), 200, seed=1)
+    generate_workbook(str(tmp_path / "b.xlsx"), 200, seed=1)
+    generate_workbook(str(tmp_path / "c.xlsx"), 200, seed=2)
+    a, b, c = (_read(tmp_path / f"{name}.xlsx") for name in "abc")
+    for name in a:
+        pd.testing.assert_frame_equal(a[name], b[name])
+    assert not a["QT Register 2025"].equals(c["QT Register 2025"])
+
+
+def test_the_suite_writes_a_report_per_size_and_stage(tmp_path):
+    output = tmp_path / "bench.json"
+    main(["--sizes", "100", "--output", str(output), "--workdir", str(tmp_path / "work")])
+    with open(output, encoding="utf-8") as fh:
+        report = json.load(fh)
+    assert {"revision", "timestamp", "pandas", "engine", "memory_traced", "max_rss"} <= set(report["meta"])
+    assert [r["rows"] for r in report["results"]] == [100]
+    for result in report["results"]:
+        generated = sheet_rows(result["rows"])
+        assert result["sheet_rows"]["QT Register 2025"] == generated["QT Register 2025"]
+        assert all(0 < rows <= generated[name] for name, rows in result["sheet_rows"].items())  # Cleaned
+        assert list(result["stages"]) == STAGES
+        for stage in result["stages"].values():
+            assert stage["wall_s"] >= 0 and stage["cpu_s"] >= 0 and stage["peak_bytes"] > 0
+        assert result["charts"] > 0 and result["chart_bytes"] > 0
+        assert result["tables"] > 0 and result["table_bytes"] > 0
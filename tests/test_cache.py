@@ -0,0 +1,62 @@
+import os
+
+import pandas as pd
+import pytest
+
+from dashboard import loader
+from dashboard.cache import WorkbookCache, _sheet_file, workbook_key
+from dashboard.loader import load_sheets, workbook_sheet_names
+
+
+def test_workbook_key_depends_on_content_and_settings(workbook):
+    key = workbook_key(workbook, {"Quotation Register 2023": 879}, "4")
+    assert workbook_key(bytes(workbook), {"Quotation Register 2023": 879}, "4") == key
+    assert workbook_key(workbook, {"Quotation Register 2023": 880}, "4") != key
+    assert workbook_key(workbook, {"Quotation Register 2023": 879}, "5") != key
+    assert workbook_key(workbook + b"\0", {"Quotation Register 2023": 879}, "4") != key
+
+
+def test_a_second_session_loads_from_the_cache_without_parsing(workbook, tmp_path, monkeypatch):
+    directory = str(tmp_path / "cache")
+    key = workbook_key(workbook)
+    first = WorkbookCache(directory)
+    names = workbook_sheet_names(workbook, first, key)
+    sheets, timings = load_sheets(workbook, names, {}, first, key, workers=1)
+    assert set(timings) == set(names)
+
+    def no_parse(*args, **kwargs):
+        pytest.fail("a cached workbook was parsed again")
+
+    monkeypatch.setattr(loader, "WorkbookReader", no_parse)
+    monkeypatch.setattr(loader, "list_sheets", no_parse)
+    second = WorkbookCache(directory)  # Another session, or a restarted server, on the same directory
+    assert workbook_sheet_names(workbook, second, key) == names
+    cached, timings = load_sheets(workbook, names, {}, second, key, workers=1)
+    assert timings == {}
+    for name in names:
+        pd.testing.assert_frame_equal(cached[name], sheets[name])
+
+
+def test_missing_or_damaged_sheet_files_are_misses(tmp_path):
+    cache = WorkbookCache(str(tmp_path))
+    assert cache.sheet_names("key") is None and cache.get_sheet("key", "Sheet1") is None
+    cache.put_sheet("key", "Sheet1", pd.DataFrame({"a": [1, 2]}))
+    with open(os.path.join(str(tmp_path), "key", _sheet_file("Sheet1")), "wb") as fh:
+        fh.write(b"truncated")
+    assert cache.get_sheet("key", "Sheet1") is None
+
+
+def test_least_recently_used_workbooks_are_evicted(tmp_path):
+    frame = pd.DataFrame({"a": range(1000)})
+    cache = WorkbookCache(str(tmp_path), max_bytes=1 << 30)
+    for i, key in enumerate(["old", "used", "new"]):
+        cache.put_sheet(key, "Sheet1", frame)
+        os.utime(os.path.join(str(tmp_path), key), (1000 + i, 1000 + i))
+    entry = cache.stats()["bytes"] // 3
+    assert cache.get_sheet("used", "Sheet1") is not None  # Touches "used"
+
+    cache.max_bytes = 2 * entry
+    cache.evict()
+    assert cache.get_sheet("old", "Sheet1") is None
+    assert cache.get_sheet("used", "Sheet1") is not None and cache.get_sheet("new", "Sheet1") is not None
+    assert cache.stats()["bytes"] <= cache.max_bytes
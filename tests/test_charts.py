@@ -0,0 +1,82 @@
+import warnings
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pandas as pd
+import pytest
+
+from dashboard import charts
+from dashboard.charts import bar_chart, draw_image, hist_chart, line_chart, render_many
+
+
+def _specs():
+    totals = pd.DataFrame({"Sales Person": ["Ali", "Sara", "John"], "Quotations": [5, 3, 2]})
+    daily = pd.DataFrame({"Date": pd.date_range("2025-01-01", periods=5), "Count": [1, 4, 2, 5, 3]})
+    return [
+        bar_chart(totals, "Quotations", "Sales Person", "By sales person", "Quotations", "Sales Person"),
+        line_chart(daily, "Date", "Count", "Daily", "Date", "Count"),
+        hist_chart(pd.Series([0.1, 0.2, 0.2, 0.4], name="Margin"), "Margins", "Margin", "Frequency"),
+    ]
+
+
+class FailingPool:
+    """
+    Stands in for the render pool: every chart fails with `error`.
+    """
+
+    def __init__(self, error):
+        self.error = error
+        self.shut_down = False
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_exception(self.error)
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shut_down = True
+
+
+@pytest.fixture(autouse=True)
+def empty_chart_cache(monkeypatch):
+    monkeypatch.setattr(charts, "_CHART_CACHE", type(charts._CHART_CACHE)())
+    monkeypatch.setattr(charts, "_CHART_CACHE_BYTES", 0)
+
+
+@pytest.mark.parametrize("error", [BrokenProcessPool("worker died"), RuntimeError("render failed")])
+def test_render_many_falls_back_to_rendering_here(monkeypatch, error):
+    pool = FailingPool(error)
+    monkeypatch.setattr(charts, "_POOLS", {2: pool})
+    images = dict(render_many(_specs(), workers=2))
+    assert sorted(images) == [0, 1, 2]
+    assert all(image.startswith(b"\x89PNG") for image in images.values())
+    # Only a broken pool is replaced; a chart that failed in a worker leaves the pool in place
+    assert pool.shut_down == isinstance(error, BrokenProcessPool)
+    assert (2 in charts._POOLS) != isinstance(error, BrokenProcessPool)
+
+
+def test_bar_chart_draws_without_deprecation_warnings():
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", FutureWarning)
+        assert draw_image(_specs()[0]).startswith(b"\x89PNG")
+
+
+@pytest.mark.parametrize("label", ["Cumulative Order Value Approx.", "Value [BHD]", "Ratio: won/lost"])
+def test_altair_charts_escape_field_names(label):
+    pytest.importorskip("altair")
+    daily = pd.DataFrame({"Date": pd.date_range("2025-01-01", periods=3), label: [1.0, 3.0, 6.0]})
+    escaped = label.replace(".", "\\.").replace("[", "\\[").replace("]", "\\]")
+    specs = [
+        line_chart(daily, "Date", label, "Cumulative", "Date", label),
+        bar_chart(daily.assign(Date=["a", "b", "c"]), label, "Date", "Bars", label, "Date"),
+        hist_chart(daily[label], "Spread", label, "Frequency"),
+    ]
+    for spec in specs:
+        encoding = charts.altair_chart(spec).to_dict()["encoding"]
+        channel = encoding["y" if spec["kind"] == "line" else "x"]
+        assert channel["field"] == escaped
+        assert channel["type"] == "quantitative"
+        assert channel["title"] == label
+    heatmap = charts.heatmap_chart(pd.DataFrame([[1, 2]], index=["Ali"], columns=["a", "b"]), "Heat", label, "Who")
+    for layer in charts.altair_chart(heatmap).to_dict()["layer"]:
+        assert layer["encoding"]["x"]["field"] == escaped
@@ -0,0 +1,109 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard.cleaning import _fix_double_slash, clean_sheet, parse_dates
+
+DATE_CELLS = [
+    datetime.datetime(2025, 1, 2),
+    "05//03/2025",
+    "13/01/2025",
+    "01/02/2025",
+    "2025-04-30",
+    "2025-04-30 10:15:00",
+    "07.08.2025",
+    "2025/03/05",
+    "March 6, 2025",
+    "TBD",
+    "31/02/2025",
+    np.nan,
+    None,
+]
+
+
+def test_parse_dates_is_day_first_and_coerces_unknown_text():
+    parsed = parse_dates(pd.Series(DATE_CELLS, dtype=object), clean_text=_fix_double_slash)
+    assert list(parsed) == [
+        pd.Timestamp("2025-01-02"),
+        pd.Timestamp("2025-03-05"),
+        pd.Timestamp("2025-01-13"),
+        pd.Timestamp("2025-02-01"),
+        pd.Timestamp("2025-04-30"),
+        pd.Timestamp("2025-04-30 10:15"),
+        pd.Timestamp("2025-08-07"),
+        pd.Timestamp("2025-03-05"),
+        pd.Timestamp("2025-03-06"),
+        pd.NaT, pd.NaT, pd.NaT, pd.NaT,
+    ]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("2025/03/05", "2025-03-05"),
+    ("2025.03.05", "2025-03-05"),
+    ("2025/03/05 14:30:00", "2025-03-05 14:30"),
+    ("05/03/25", "2025-03-05"),
+    ("05-03-25", "2025-03-05"),
+    ("5.3.25", "2025-03-05"),
+    ("5 Mar 2025", "2025-03-05"),
+    ("05-Mar-2025", "2025-03-05"),
+    ("05-MAR-25", "2025-03-05"),
+    ("5 March 2025", "2025-03-05"),
+    ("March 5, 2025", "2025-03-05"),
+    ("5th March 2025", "2025-03-05"),
+    ("TBD", None),
+    ("1.5", None),
+    ("Mar 2025", None),
+    ("45678", None),
+    ("2025-03-05T10:00:00+03:00", None),
+])
+def test_parse_dates_accepts_common_register_spellings(text, expected):
+    parsed = parse_dates(pd.Series([text, datetime.datetime(2025, 1, 1)], dtype=object))
+    assert parsed.iloc[0] == pd.Timestamp(expected) if expected else pd.isna(parsed.iloc[0])
+    assert parsed.iloc[1] == pd.Timestamp("2025-01-01")
+
+
+def test_parse_dates_does_not_depend_on_row_order():
+    series = pd.Series(DATE_CELLS * 3, dtype=object)
+    expected = parse_dates(series, clean_text=_fix_double_slash)
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        shuffled = series.sample(frac=1, random_state=rng)
+        parsed = parse_dates(shuffled, clean_text=_fix_double_slash)
+        pd.testing.assert_series_equal(parsed.sort_index(), expected)
+
+
+def test_cleaned_sheet_does_not_depend_on_row_order():
+    raw = pd.DataFrame({
+        "Date": pd.Series(DATE_CELLS * 2, dtype=object),
+        "Quotation ID": [f"Q{i}" for i in range(len(DATE_CELLS) * 2)],
+        "Company  Name": ["Alpha", "Beta "] * len(DATE_CELLS),
+        "Product": ["Switch"] * (len(DATE_CELLS) * 2),
+        "Sales Person": ["Ali"] * (len(DATE_CELLS) * 2),
+        "Value": range(len(DATE_CELLS) * 2),
+    })
+    expected = clean_sheet("QT Register 2025", raw)
+    shuffled = clean_sheet("QT Register 2025", raw.sample(frac=1, random_state=3)).sort_index()
+    pd.testing.assert_frame_equal(shuffled, expected)
+
+
+def test_clean_sheet_is_pure_and_does_not_hash_the_raw_sheet(monkeypatch):
+    raw = pd.DataFrame({
+        "Date": pd.Series(DATE_CELLS, dtype=object),
+        "Quotation ID": [f"Q{i}" for i in range(len(DATE_CELLS))],
+        "Company  Name": ["Alpha "] * len(DATE_CELLS),
+        "Product": ["Switch"] * len(DATE_CELLS),
+        "Sales Person": ["Ali"] * len(DATE_CELLS),
+        "Value": range(len(DATE_CELLS)),
+    })
+    before = raw.copy()
+
+    def no_hash(*args, **kwargs):
+        pytest.fail("clean_sheet hashed the raw sheet")
+
+    monkeypatch.setattr(pd.util, "hash_pandas_object", no_hash)
+    cleaned = clean_sheet("QT Register 2025", raw)
+    pd.testing.assert_frame_equal(raw, before)
+    pd.testing.assert_frame_equal(clean_sheet("QT Register 2025", raw), cleaned)
+    assert clean_sheet("Some Other Sheet", raw) is raw
@@ -0,0 +1,49 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from dashboard.cleaning import clean_sheet
+from dashboard.columnar import read_frame, write_frame
+from dashboard.headers import header_signature
+from dashboard.ingest import WorkbookReader
+from dashboard.loader import load_sheets
+
+
+def _assert_identical(expected: pd.DataFrame, actual: pd.DataFrame):
+    pd.testing.assert_frame_equal(expected, actual, check_exact=True)
+    for col in expected.columns[expected.dtypes == object]:
+        assert [type(v) for v in expected[col]] == [type(v) for v in actual[col]], col
+
+
+def test_round_trip_keeps_mixed_columns_and_labels(tmp_path):
+    index = [3, 7, 9]
+    df = pd.DataFrame({
+        "Text": ["x", np.nan, "y"],
+        "Amount": pd.Series([1, "TBD", np.nan], index=index, dtype=object),
+        "Date": pd.Series([datetime.datetime(2024, 1, 2), "n/a", 3.5], index=index, dtype=object),
+        "Kind": pd.Categorical(["a", "b", "a"]),
+        5: [1.5, np.nan, 2.0],
+        "When": pd.to_datetime(["2024-01-01", None, "2024-03-01"]),
+        "Small": pd.Series([1, 2, 3], index=index, dtype="int8"),
+        "Odd": pd.Series([None, True, datetime.time(3, 4)], index=index, dtype=object),
+        "Ints": pd.Series([1, 2, 3], index=index, dtype=object),
+        "Spans": pd.Series([pd.Timestamp("2024-01-01"), pd.NaT, datetime.timedelta(days=1)], index=index, dtype=object),
+    }, index=index)
+    path = str(tmp_path / "sheet.arrow")
+    write_frame(path, df)
+    _assert_identical(df, read_frame(path))
+
+
+def test_cached_sheets_match_a_cold_load(workbook, cache):
+    with WorkbookReader(workbook) as reader:
+        names = reader.sheet_names
+        cold = {name: clean_sheet(name, reader.read_sheet(name, header_signature=header_signature(name))) for name in names}
+
+    first, timings = load_sheets(workbook, names, {}, cache, "key")
+    assert set(timings) == set(names)
+    cached, timings = load_sheets(workbook, names, {}, cache, "key")
+    assert timings == {}
+    for name in names:
+        _assert_identical(cold[name], cached[name])
+        _assert_identical(first[name], cached[name])
@@ -0,0 +1,87 @@
+import itertools
+import random
+
+import numpy as np
+
+from dashboard.entities import EntityIndex, entity_index
+from dashboard.joins import normalize_names
+
+NAMES = [
+    "Al Noor Trading W.L.L.", "Al Nour Trading", "AL NOOR TRADING WLL",
+    "Gulf Tech Branch 1", "Gulf Tech Branch 2",
+    "Beta", "Bata",
+    "Alpha Systems B.S.C.", "alpha systems", "Alpha Sistems",
+    "Delta Group", "Delta  group",
+    "Epsilon Industries", None, "",
+]
+
+
+def _groups(names, ids) -> set:
+    groups = {}
+    for name, entity in zip(names, ids):
+        if entity is not None:
+            groups.setdefault(entity, set()).add(name)
+    return {frozenset(group) for group in groups.values()}
+
+
+def test_variants_merge_and_different_parties_do_not():
+    ids = dict(zip(NAMES, EntityIndex().resolve(NAMES)))
+    # Spelling, case, spacing and legal-suffix variants are one party
+    assert ids["Al Noor Trading W.L.L."] == ids["Al Nour Trading"] == ids["AL NOOR TRADING WLL"]
+    assert ids["Alpha Systems B.S.C."] == ids["alpha systems"] == ids["Alpha Sistems"]
+    assert ids["Delta Group"] == ids["Delta  group"]
+    # Different numbers are different parties, and short names only match exactly
+    assert ids["Gulf Tech Branch 1"] != ids["Gulf Tech Branch 2"]
+    assert ids["Beta"] != ids["Bata"]
+    assert len({ids[name] for name in NAMES if ids[name] is not None}) == 8
+    assert ids[None] is None and ids[""] is None
+
+
+def _typo(rng, name):
+    i = rng.randrange(len(name))
+    return name[:i] + rng.choice("aeiou") + name[i + 1:]
+
+
+def test_blocking_finds_the_same_entities_as_comparing_every_pair():
+    rng = random.Random(4)
+    words = ["Gulf", "National", "Trading", "Systems", "Noor", "Bahrain", "Delmon", "Kanoo", "Zayani", "Almoayyed"]
+    bases = {" ".join(rng.sample(words, 3)) for _ in range(40)}
+    names = sorted(bases) + [_typo(rng, name) for name in sorted(bases) for _ in range(2)]
+    index = EntityIndex()
+    blocked = _groups(names, index.resolve(names))
+
+    keys = list(dict.fromkeys(normalize_names(names)))
+    parent = list(range(len(keys)))
+
+    def find(i):
+        while parent[i] != i:
+            i = parent[i]
+        return i
+
+    for a, b in itertools.combinations(range(len(keys)), 2):
+        if index._matches(keys[a], keys[b]):
+            parent[max(find(a), find(b))] = min(find(a), find(b))
+    entity_of_key = {key: find(i) for i, key in enumerate(keys)}
+    brute = _groups(names, [entity_of_key[key] for key in normalize_names(names)])
+    assert blocked == brute
+    assert index.stats()["compared_pairs"] < index.stats()["all_pairs"]
+
+
+def test_incremental_resolution_keeps_ids_and_matches_one_pass():
+    first, second = NAMES[:8], NAMES[8:]
+    incremental = EntityIndex()
+    before = incremental.resolve(first)
+    assert incremental.add(second) == len([n for n in second if n is not None])
+    assert list(incremental.resolve(first)) == list(before)
+    assert _groups(NAMES, incremental.resolve(NAMES)) == _groups(NAMES, EntityIndex().resolve(NAMES))
+
+
+def test_revisions_start_from_a_copy_of_the_previous_index():
+    base = entity_index("test-entities:r1")
+    base.resolve(["Al Noor Trading"])
+    revision = entity_index("test-entities:r2", base_key="test-entities:r1")
+    assert revision is not base and revision.stats()["names"] == 1
+    assert revision.add(["Al Noor Trading", "Al Nour Trading"]) == 1
+    assert base.stats()["names"] == 1  # The previous revision's index is left unchanged
+    ids = revision.resolve(np.array(["Al Noor Trading", "Al Nour Trading"], dtype=object))
+    assert ids[0] == ids[1]
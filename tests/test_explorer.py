@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard import explorer
+from dashboard.explorer import filter_mask, page, page_count, query_positions, sort_positions
+
+
+@pytest.fixture(autouse=True)
+def empty_view_cache(monkeypatch):
+    monkeypatch.setattr(explorer, "_VIEW_CACHE", type(explorer._VIEW_CACHE)())
+    monkeypatch.setattr(explorer, "_VIEW_CACHE_BYTES", 0)
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(5)
+    rows = 500
+    frame = pd.DataFrame({
+        "Date": pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 200 * 24, rows), unit="h"),
+        "Party": pd.Categorical(rng.choice(["Alpha W.L.L.", "beta co", "Gamma", "ALPHA trading"], rows)),
+        "Value": rng.integers(0, 50, rows).astype("float64"),
+        "Note": pd.Series(rng.choice(["TBD", 5, 7.5, None, "paid"], rows), dtype=object),
+    }, index=rng.permutation(rows) * 3)  # Cleaned sheets keep raw row labels
+    frame.loc[frame.sample(frac=0.05, random_state=1).index, "Value"] = np.nan
+    frame.loc[frame.sample(frac=0.05, random_state=2).index, "Date"] = pd.NaT
+    return frame
+
+
+@pytest.mark.parametrize("column", ["Date", "Party", "Value"])
+@pytest.mark.parametrize("ascending", [True, False])
+def test_sort_matches_pandas(frame, column, ascending):
+    positions = sort_positions("test", frame, column, ascending)
+    expected = frame.reset_index(drop=True).sort_values(column, ascending=ascending, kind="stable", na_position="last")
+    assert positions.tolist() == expected.index.tolist()
+
+
+def test_mixed_columns_sort_by_their_text(frame):
+    ordered = frame["Note"].iloc[sort_positions("test", frame, "Note")]
+    present = ordered.dropna().astype(str).tolist()
+    assert present == sorted(present)
+    assert ordered.iloc[len(present):].isna().all()
+
+
+def test_filters_match_pandas(frame):
+    mask = filter_mask(frame, "alpha", "Party")
+    assert mask.tolist() == frame["Party"].astype(str).str.lower().str.contains("alpha").tolist()
+
+    any_column = filter_mask(frame, "tbd")
+    assert any_column.tolist() == (frame["Note"] == "TBD").tolist()
+
+    dated = filter_mask(frame, date_column="Date", date_range=(pd.Timestamp("2025-03-01"), pd.Timestamp("2025-03-31")))
+    day = frame["Date"].dt.normalize()
+    assert dated.tolist() == ((day >= "2025-03-01") & (day <= "2025-03-31")).tolist()
+
+
+def test_paged_query_matches_filter_then_sort(frame):
+    date_range = (pd.Timestamp("2025-02-01"), pd.Timestamp("2025-05-31"))
+    positions = query_positions("test", frame, sort_by="Value", ascending=False, text="a", text_column="Party",
+                                date_column="Date", date_range=date_range)
+    day = frame["Date"].dt.normalize()
+    expected = frame[frame["Party"].astype(str).str.contains("a", case=False)
+                     & (day >= date_range[0]) & (day <= date_range[1])]
+    expected = expected.sort_values("Value", ascending=False, kind="stable", na_position="last")
+
+    size = 25
+    pages = [page(frame, positions, number, size) for number in range(1, page_count(len(positions), size) + 1)]
+    assert all(len(p) == size for p in pages[:-1]) and 0 < len(pages[-1]) <= size
+    pd.testing.assert_frame_equal(pd.concat(pages), expected)
+    assert page(frame, positions, 0, size).equals(pages[0])  # Page numbers below 1 show the first page
+    assert page(frame, positions, len(pages) + 1, size).empty
+
+    again = query_positions("test", frame, sort_by="Value", ascending=False, text="A", text_column="Party",
+                            date_column="Date", date_range=date_range)
+    assert again is positions  # Cached per query; the search is case-insensitive
+
+
+def test_unfiltered_unsorted_view_is_sheet_order(frame):
+    assert query_positions("test", frame).tolist() == list(range(len(frame)))
+    assert page_count(0, 25) == 1 and page_count(51, 25) == 3
@@ -0,0 +1,69 @@
+import threading
+
+import pytest
+
+from dashboard import export
+from dashboard.aggregates import build_cube
+from dashboard.cache import WorkbookCache
+from dashboard.export import PdfExport, export_reports
+from dashboard.jobs import Job
+from dashboard.loader import load_sheets
+from dashboard.report import build_report
+
+
+class CountingLock:
+    """
+    Wraps a lock and records whether it was held while matplotlib objects were created or saved.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.acquired = 0
+
+    def __enter__(self):
+        self._lock.acquire()
+        self.acquired += 1
+        return self
+
+    def __exit__(self, *exc):
+        self._lock.release()
+
+    def locked(self):
+        return self._lock.locked()
+
+
+@pytest.fixture
+def sheets(workbook, tmp_path):
+    cache = WorkbookCache(str(tmp_path / "cache"))
+    names = ["QT Register 2025", "Payment Pending"]
+    frames, _ = load_sheets(workbook, names, {}, cache, "key")
+    return {name: (f"key:{name}", df, build_cube(name, df)) for name, df in frames.items()}
+
+
+def test_pdf_pages_are_built_under_the_render_lock(sheets, tmp_path, monkeypatch):
+    lock = CountingLock()
+    monkeypatch.setattr(export, "_RENDER_LOCK", lock)
+    original_savefig = export.PdfPages.savefig
+
+    def savefig(self, figure, **kwargs):
+        assert lock.locked()
+        return original_savefig(self, figure, **kwargs)
+
+    monkeypatch.setattr(export.PdfPages, "savefig", savefig)
+    name, (_, df, cube) = next(iter(sheets.items()))
+    writer = PdfExport(str(tmp_path / "report.pdf"), "Report")
+    writer.write(build_report(name, df, cube), {})
+    writer.close()
+    assert lock.acquired > 0 and not lock.locked()
+    assert (tmp_path / "report.pdf").read_bytes().startswith(b"%PDF")
+
+
+@pytest.mark.parametrize("fmt", ["xlsx", "html", "pdf"])
+def test_export_reports_writes_every_format(sheets, tmp_path, monkeypatch, fmt):
+    monkeypatch.setattr(export, "EXPORT_DIR", str(tmp_path / "exports"))
+    result = export_reports(Job("export:test", "export"), sheets, fmt, granularity="W")
+    assert result["file_name"] == f"Dashboard-Report.{fmt}"
+    assert result["bytes"] > 0
+    with open(result["path"], "rb") as fh:
+        head = fh.read(5)
+    assert head == {"xlsx": b"PK\x03\x04\x14", "html": b"<!DOC", "pdf": b"%PDF-"}[fmt][:len(head)]
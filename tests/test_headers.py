@@ -0,0 +1,21 @@
+from dashboard import headers
+from dashboard.headers import cached_header_row, header_signature, locate_header, remember_header_row
+
+
+def test_header_rows_are_bounded_and_least_recently_used_go_first(monkeypatch):
+    monkeypatch.setattr(headers, "_HEADER_ROWS", type(headers._HEADER_ROWS)())
+    monkeypatch.setattr(headers, "HEADER_ROWS_MAX", 3)
+    for i in range(3):
+        remember_header_row(f"key{i}", "Meeting Agenda", i)
+    assert cached_header_row("key0", "Meeting Agenda") == 0  # key0 is now the most recently used
+    remember_header_row("key3", "Meeting Agenda", 3)
+    assert len(headers._HEADER_ROWS) == 3
+    assert cached_header_row("key1", "Meeting Agenda") is None
+    assert [cached_header_row(f"key{i}", "Meeting Agenda") for i in (0, 2, 3)] == [0, 2, 3]
+
+
+def test_locate_header_finds_the_signature_row():
+    rows = [("SSS Meeting Agenda",), (), ("No:", "Date", "Customer", "Order Value Approx.", "Action By"), (1, 2)]
+    index, rest = locate_header(rows, header_signature("Meeting Agenda"))
+    assert index == 2
+    assert list(rest) == rows[2:]
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard.aggregates import OTHER_LABEL, build_cube, top_n_crosstab
+from dashboard.charts import MAX_ANNOTATED_CELLS, heatmap_chart
+
+
+@pytest.fixture
+def register():
+    rng = np.random.default_rng(4)
+    n = 20000
+    # Skewed label frequencies, hundreds of products
+    products = [f"P{i}" for i in rng.zipf(1.3, n) % 600]
+    people = [f"S{i}" for i in rng.zipf(1.5, n) % 40]
+    return pd.DataFrame({"Product": products, "Sales Person": people})
+
+
+def _dense_bucketed(df, row, col, top_rows, top_cols):
+    # The unbounded dense crosstab, then labels outside the top N folded into "Other" by hand
+    dense = pd.crosstab(df[row], df[col])
+    keep_rows = dense.sum(axis=1).sort_values(ascending=False, kind="stable").index[:top_rows]
+    keep_cols = dense.sum(axis=0).sort_values(ascending=False, kind="stable").index[:top_cols]
+    rows = dense.index.where(dense.index.isin(keep_rows), OTHER_LABEL)
+    dense = dense.groupby(rows).sum()
+    cols = dense.columns.where(dense.columns.isin(keep_cols), OTHER_LABEL)
+    return dense.T.groupby(cols).sum().T
+
+
+@pytest.mark.parametrize("top_rows, top_cols", [(15, 20), (5, 3), (100, 1000)])
+def test_top_n_crosstab_matches_a_bucketed_dense_crosstab(register, top_rows, top_cols):
+    matrix = top_n_crosstab(register, "Sales Person", "Product", top_rows=top_rows, top_cols=top_cols)
+    expected = _dense_bucketed(register, "Sales Person", "Product", top_rows, top_cols)
+
+    assert matrix.shape[0] <= top_rows + 1 and matrix.shape[1] <= top_cols + 1
+    assert matrix.to_numpy().sum() == len(register)
+    pd.testing.assert_frame_equal(
+        matrix, expected.loc[matrix.index, matrix.columns], check_names=False, check_dtype=False)
+    assert sorted(matrix.index) == sorted(expected.index)
+    assert sorted(matrix.columns) == sorted(expected.columns)
+
+    # Ordered by total, "Other" last
+    for totals in (matrix.drop(index=OTHER_LABEL, errors="ignore").sum(axis=1),
+                   matrix.drop(columns=OTHER_LABEL, errors="ignore").sum(axis=0)):
+        assert totals.is_monotonic_decreasing
+    if OTHER_LABEL in matrix.index:
+        assert matrix.index[-1] == OTHER_LABEL
+
+
+def test_cube_crosstab_equals_the_row_level_crosstab(register):
+    df = register.assign(
+        **{"Date": pd.Timestamp("2025-01-01"), "Quotation ID": range(len(register)), "Value": 1.0})
+    cube = build_cube("QT Register 2025", df)
+    matrix = cube.crosstab("salesperson", "product")
+    pd.testing.assert_frame_equal(matrix, top_n_crosstab(df, "Sales Person", "Product"), check_names=False)
+    assert (matrix.index.name, matrix.columns.name) == ("Sales Person", "Product")
+
+
+def test_heatmap_annotations_and_size_stay_bounded(register):
+    bounded = top_n_crosstab(register, "Sales Person", "Product")
+    spec = heatmap_chart(bounded, "Heat", "Product", "Sales Person")
+    assert spec["params"]["annotate"] == (bounded.size <= MAX_ANNOTATED_CELLS)
+    assert spec["figsize"][1] <= 16 * 0.7 + 21 * 0.2 + 2
+
+    large = top_n_crosstab(register, "Sales Person", "Product", top_rows=40, top_cols=600)
+    assert large.size > MAX_ANNOTATED_CELLS
+    assert not heatmap_chart(large, "Heat", "Product", "Sales Person")["params"]["annotate"]
+
+
+def test_empty_selection_gives_an_empty_matrix():
+    empty = pd.DataFrame({"Product": pd.Series([], dtype=object), "Sales Person": pd.Series([], dtype=object)})
+    assert top_n_crosstab(empty, "Sales Person", "Product").empty
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard.aggregates import build_cube
+from dashboard.cache import WorkbookCache
+from dashboard.indexes import DateIndex, PostingIndex, SheetIndex, filter_sheet
+from dashboard.loader import load_sheets
+
+PEOPLE = ["Ali", "Sara", "John", "Fatima", None]
+PARTIES = ["Alpha", "Beta", "Gamma", "Delta", "Epsilon", None]
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(11)
+    rows = 3000
+    dates = pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 365 * 24, rows), unit="h")
+    frame = pd.DataFrame({
+        "Date": dates,
+        "Sales Person": pd.Categorical(rng.choice(PEOPLE, rows)),
+        "Party": pd.Series(rng.choice(PARTIES, rows), dtype=object),
+        "ID": [f"Q{i}" for i in rng.integers(0, rows // 2, rows)],
+    })
+    frame.loc[frame.sample(frac=0.03, random_state=4).index, "Date"] = pd.NaT
+    return frame
+
+
+def _random_filters(rng):
+    start = pd.Timestamp("2024-12-15") + pd.Timedelta(days=int(rng.integers(0, 400)), hours=int(rng.integers(0, 24)))
+    end = start + pd.Timedelta(days=int(rng.integers(0, 90)), hours=int(rng.integers(0, 24)))
+    return {
+        "day": (start, end) if rng.random() < 0.7 else None,
+        "salesperson": list(rng.choice(PEOPLE[:-1] + ["Nobody"], int(rng.integers(0, 4)), replace=False)) or None,
+        "party": list(rng.choice(PARTIES[:-1], int(rng.integers(1, 3)), replace=False)) if rng.random() < 0.5 else None,
+    }
+
+
+def _baseline_mask(frame, filters):
+    mask = pd.Series(True, index=frame.index)
+    if filters.get("day") is not None:
+        start, end = filters["day"]
+        day = frame["Date"].dt.normalize()
+        mask &= (day >= start.normalize()) & (day <= end.normalize())
+    if filters.get("salesperson") is not None:
+        mask &= frame["Sales Person"].isin(filters["salesperson"])
+    if filters.get("party") is not None:
+        mask &= frame["Party"].isin(filters["party"])
+    return mask.to_numpy()
+
+
+def test_date_index_matches_a_range_mask(frame):
+    index = DateIndex(frame["Date"])
+    rng = np.random.default_rng(1)
+    for _ in range(100):
+        filters = _random_filters(rng)
+        if filters["day"] is None:
+            continue
+        expected = np.flatnonzero(_baseline_mask(frame, {"day": filters["day"]}))
+        assert sorted(index.positions(*filters["day"])) == expected.tolist()
+    assert index.bounds() == (frame["Date"].min(), frame["Date"].max())
+
+
+@pytest.mark.parametrize("column", ["Sales Person", "Party"])
+def test_posting_index_matches_isin(frame, column):
+    index = PostingIndex(frame[column])
+    for labels in (["Ali"], ["Alpha", "Beta"], ["Sara", "John", "Nobody"], [], ["Epsilon", "Fatima"]):
+        positions = index.positions(labels)
+        found = np.sort(np.concatenate(positions)) if positions else np.array([], dtype=np.int64)
+        assert found.tolist() == np.flatnonzero(frame[column].isin(labels)).tolist()
+
+
+def test_sheet_index_masks_match_boolean_masks(frame):
+    index = SheetIndex(frame, {"day": "Date", "salesperson": "Sales Person", "party": "Party"}, id_column="ID")
+    rng = np.random.default_rng(2)
+    for _ in range(200):
+        filters = _random_filters(rng)
+        expected = _baseline_mask(frame, filters)
+        mask = index.mask(filters)
+        if not index.applicable(filters):
+            assert mask is None
+            continue
+        assert np.array_equal(mask, expected)
+        assert index.distinct_ids(mask) == frame.loc[expected, "ID"].nunique()
+
+
+def test_filter_sheet_matches_filtering_the_frame(workbook, tmp_path):
+    name = "QT Register 2025"
+    df = load_sheets(workbook, [name], {}, WorkbookCache(str(tmp_path / "cache")), "key")[0][name]
+    cube = build_cube(name, df)
+    filters = {"day": (pd.Timestamp("2025-02-01"), pd.Timestamp("2025-04-15")), "salesperson": ["Ali", "John"]}
+    filtered, filtered_cube, applied = filter_sheet("test:qt", df, cube, filters)
+
+    day = df["Date"].dt.normalize()
+    expected = df[(day >= "2025-02-01") & (day <= "2025-04-15") & df["Sales Person"].isin(["Ali", "John"])]
+    assert applied == ["day", "salesperson"]
+    pd.testing.assert_frame_equal(filtered, expected)
+    rebuilt = build_cube(name, expected)
+    assert (filtered_cube.rows, filtered_cube.distinct_ids) == (rebuilt.rows, rebuilt.distinct_ids)
+    assert filtered_cube.total() == rebuilt.total()
+    assert filtered_cube.total("value") == pytest.approx(rebuilt.total("value"))
+    pd.testing.assert_series_equal(filtered_cube.by("product"), rebuilt.by("product"))
@@ -0,0 +1,72 @@
+import datetime
+import io
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from dashboard.headers import header_signature
+from dashboard.ingest import WorkbookReader, python_calamine, read_workbook
+
+from tests.conftest import workbook_bytes
+
+ENGINES = ["openpyxl", pytest.param("calamine", marks=pytest.mark.skipif(
+    python_calamine is None, reason="python-calamine is not installed"))]
+
+
+def _ragged_workbook() -> bytes:
+    """
+    Sheets that trip up a naive reader: blank rows inside the table, booleans among numbers,
+    missing-value strings, dates next to text, a wide title row and an empty first column.
+    """
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Mixed"
+    ws.append(["Title spanning", None, None, None, None, None, "wide note"])
+    ws.append([])
+    ws.append(["Date", "Amount", "Flag", "Note", "Amount", None])
+    ws.append([datetime.datetime(2025, 1, 2), 10, True, "a"])
+    ws.append([])
+    ws.append([datetime.date(2025, 1, 3), 2.5, 1, "NA", 7])
+    ws.append(["TBD", True, False, None, 8.0])
+    ws.append([None, None, None, None, None])
+    ws.append([datetime.datetime(2025, 1, 5, 9, 30), "n/a", None, 3, None, "tail"])
+    ws.append([])
+    ws.append([])
+
+    ws = wb.create_sheet("Offset")
+    ws["C3"], ws["D3"] = "Party", "Amount"
+    ws["C4"], ws["D4"] = "Alpha", 5
+    ws["C6"], ws["D6"] = "Beta", False
+    return workbook_bytes(wb)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("sheet, skiprows", [("Mixed", 0), ("Mixed", 1), ("Mixed", 2), ("Mixed", 4),
+                                             ("Offset", 0), ("Offset", 2)])
+def test_read_sheet_matches_read_excel(engine, sheet, skiprows):
+    data = _ragged_workbook()
+    with WorkbookReader(data, engine=engine) as reader:
+        df = reader.read_sheet(sheet, skiprows=skiprows)
+    expected = pd.read_excel(io.BytesIO(data), sheet_name=sheet, skiprows=skiprows, engine=engine)
+    pd.testing.assert_frame_equal(df, expected)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_located_header_matches_read_excel_from_that_row(engine, workbook):
+    with WorkbookReader(workbook, engine=engine) as reader:
+        for sheet in ("Meeting Agenda", "Payment Pending"):
+            df = reader.read_sheet(sheet, header_signature=header_signature(sheet))
+            skiprows = reader.header_rows[sheet]
+            assert skiprows > 0
+            expected = pd.read_excel(io.BytesIO(workbook), sheet_name=sheet, skiprows=skiprows, engine=engine)
+            pd.testing.assert_frame_equal(df, expected)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_read_workbook_matches_read_excel_for_every_sheet(engine, workbook):
+    sheets, timings = read_workbook(workbook, engine=engine)
+    expected = pd.read_excel(io.BytesIO(workbook), sheet_name=None, engine=engine)
+    assert list(sheets) == list(expected) == list(timings)
+    for name, df in sheets.items():
+        pd.testing.assert_frame_equal(df, expected[name])
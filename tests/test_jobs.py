@@ -0,0 +1,42 @@
+import time
+
+from dashboard.jobs import get_job, submit
+from dashboard.profiling import Recorder, stage
+
+
+def _wait(job, timeout=10):
+    deadline = time.time() + timeout
+    while not job.finished and time.time() < deadline:
+        time.sleep(0.01)
+    assert job.finished
+
+
+def _staged_work(job, name):
+    with stage("parse", sheet=name):
+        job.publish(name, len(name))
+    return name
+
+
+def test_jobs_record_their_stages_when_started_from_a_recorded_run():
+    recorder = Recorder(session="test").start()
+    try:
+        job = submit("test:recorded", "ingest", _staged_work, "Sheet1")
+    finally:
+        recorder.stop()
+    _wait(job)
+    assert job.status == "done" and job.result == "Sheet1"
+    assert [(r["stage"], r["sheet"]) for r in job.stages()] == [("parse", "Sheet1")]
+    assert recorder.records == []  # The run's own recorder is left alone
+
+
+def test_jobs_without_a_recorder_record_nothing():
+    job = submit("test:unrecorded", "ingest", _staged_work, "Sheet1")
+    _wait(job)
+    assert job.stages() == []
+
+
+def test_jobs_are_deduplicated_by_key():
+    job = submit("test:dedupe", "ingest", _staged_work, "Sheet1")
+    assert submit("test:dedupe", "ingest", _staged_work, "Sheet2") is job
+    _wait(job)
+    assert get_job("test:dedupe").partial_results() == {"Sheet1": 6}
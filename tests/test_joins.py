@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard.entities import EntityIndex
+from dashboard.joins import link_sheets, normalize_names
+
+PARTIES = ["Gulf Trading W.L.L.", "gulf trading", "Delmon Co", "Kanoo Systems B.S.C.", "Zayani", None]
+PRODUCTS = ["Switch", "switch ", "Router", "UPS"]
+PEOPLE = ["Ali", "ali", "Sara", "John"]
+
+
+@pytest.fixture
+def sheets():
+    rng = np.random.default_rng(9)
+    day = lambda n: pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 120, n), unit="D")
+    quotes = pd.DataFrame({
+        "Date": day(300), "Quotation ID": [f"Q{i}" for i in range(300)],
+        "Company  Name": rng.choice(PARTIES, 300), "Product": rng.choice(PRODUCTS, 300),
+        "Sales Person": rng.choice(PEOPLE, 300), "Value": rng.integers(100, 5000, 300).astype("float64"),
+    })
+    invoices = pd.DataFrame({
+        "Date": day(120), "INV No.": [f"INV{i}" for i in range(120)],
+        "PARTY NAME": rng.choice(PARTIES, 120), "Product": rng.choice(PRODUCTS, 120),
+        "Sales Person": rng.choice(PEOPLE, 120), "Amount": rng.integers(100, 5000, 120).astype("float64"),
+    })
+    pending = pd.DataFrame({
+        "PARTY NAME": ["GULF TRADING", "Delmon Co.", "Unknown Party", "Zayani"],
+        "Contact Person": ["x"] * 4, "Amount": [100.0, 250.0, 75.0, 30.0],
+    })
+    return {"QT Register 2025": quotes, "2025 INV": invoices, "Payment Pending": pending}
+
+
+def _key(names, legal_suffixes=True):
+    return pd.Series(normalize_names(list(names), legal_suffixes), dtype=object)
+
+
+def test_quotations_convert_when_the_party_is_invoiced_the_product_on_or_after(sheets):
+    quotes, invoices = sheets["QT Register 2025"], sheets["2025 INV"]
+    links = link_sheets(sheets)
+    q_party, q_product = _key(quotes["Company  Name"]), _key(quotes["Product"], False)
+    i_party, i_product = _key(invoices["PARTY NAME"]), _key(invoices["Product"], False)
+    expected = [
+        party is not None and product is not None
+        and bool(((i_party == party) & (i_product == product) & (invoices["Date"] >= date)).any())
+        for party, product, date in zip(q_party, q_product, quotes["Date"])
+    ]
+    assert links.quotes["converted"].tolist() == expected
+    assert links.summary["converted"] == sum(expected)
+    assert links.summary["converted_value"] == pytest.approx(quotes.loc[expected, "Value"].sum())
+
+
+def test_party_and_outstanding_views_match_groupbys(sheets):
+    quotes, invoices, pending = sheets["QT Register 2025"], sheets["2025 INV"], sheets["Payment Pending"]
+    links = link_sheets(sheets)
+
+    by_party = links.by_party.set_index("Party")
+    quoted = quotes.groupby(_key(quotes["Company  Name"]).to_numpy())["Value"].sum()
+    invoiced = invoices.groupby(_key(invoices["PARTY NAME"]).to_numpy())["Amount"].sum()
+    assert len(by_party) == len(quoted)
+    for party, row in by_party.iterrows():
+        key = normalize_names([party])[0]
+        assert row["Quoted Value"] == pytest.approx(quoted[key])
+        assert row["Invoiced Amount"] == pytest.approx(invoiced.get(key, 0.0))
+
+    outstanding = links.outstanding.set_index("Party")
+    keys = _key(pending["PARTY NAME"])
+    assert sorted(normalize_names(list(outstanding.index))) == sorted(keys)
+    for party, row in outstanding.iterrows():
+        key = normalize_names([party])[0]
+        assert row["Pending Amount"] == pytest.approx(pending.loc[(keys == key).to_numpy(), "Amount"].sum())
+        assert row["Invoiced Amount"] == pytest.approx(invoiced.get(key, 0.0))
+    assert links.summary["unmatched_parties"] == 1  # "Unknown Party" was never invoiced
+
+
+def test_by_salesperson_matches_a_groupby(sheets):
+    links = link_sheets(sheets)
+    quotes = links.quotes
+    table = links.by_salesperson.set_index("Sales Person")
+    assert table["Quotations"].sum() == (quotes["salesperson_code"] >= 0).sum()
+    assert table["Converted"].sum() == quotes.loc[quotes["salesperson_code"] >= 0, "converted"].sum()
+    assert len(table) == 3  # "Ali" and "ali" are one sales person
+    assert (table["Conversion Rate (%)"].diff().dropna() <= 0).all()
+
+
+def test_link_needs_invoices_and_another_sheet(sheets):
+    assert link_sheets({"2025 INV": sheets["2025 INV"]}) is None
+    assert link_sheets({"QT Register 2025": sheets["QT Register 2025"],
+                        "Payment Pending": sheets["Payment Pending"]}) is None
+    assert link_sheets({"2025 INV": sheets["2025 INV"], "Payment Pending": sheets["Payment Pending"]}) is not None
+
+
+def test_entity_resolution_links_misspelt_parties(sheets):
+    pending = sheets["Payment Pending"].copy()
+    pending.loc[0, "PARTY NAME"] = "Gulf Tradeing"
+    sheets = {**sheets, "Payment Pending": pending}
+    exact = link_sheets(sheets)
+    resolved = link_sheets(sheets, EntityIndex())
+    assert resolved.resolved and not exact.resolved
+    assert exact.summary["unmatched_parties"] == 2
+    assert resolved.summary["unmatched_parties"] == 1
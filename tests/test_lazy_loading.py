@@ -0,0 +1,42 @@
+import pytest
+
+from dashboard import ingest
+from dashboard.cache import workbook_key
+from dashboard.loader import load_sheets, workbook_sheet_names
+
+
+@pytest.fixture
+def no_cells(monkeypatch):
+    def fail(self, sheet_name, *args, **kwargs):
+        pytest.fail(f"cells of {sheet_name!r} were read")
+
+    monkeypatch.setattr(ingest.WorkbookReader, "iter_rows", fail)
+
+
+def test_sheet_list_comes_from_metadata_alone(workbook, cache, no_cells):
+    key = workbook_key(workbook)
+    names = workbook_sheet_names(workbook, cache, key)
+    assert names == ["QT Register 2025", "2025 INV", "Meeting Agenda", "Payment Pending", "Archive"]
+    assert cache.sheet_names(key) == names
+    assert all(cache.get_sheet(key, name) is None for name in names)
+
+
+def test_only_selected_sheets_are_parsed_and_each_only_once(workbook, cache, monkeypatch):
+    key = workbook_key(workbook)
+    parsed = []
+    read_sheet = ingest.WorkbookReader.read_sheet
+
+    def counting(self, sheet_name, *args, **kwargs):
+        parsed.append(sheet_name)
+        return read_sheet(self, sheet_name, *args, **kwargs)
+
+    monkeypatch.setattr(ingest.WorkbookReader, "read_sheet", counting)
+    sheets, timings = load_sheets(workbook, ["2025 INV"], {}, cache, key, workers=1)
+    assert list(sheets) == list(timings) == parsed == ["2025 INV"]
+    assert cache.get_sheet(key, "QT Register 2025") is None
+
+    # Selecting another sheet later parses just that one; the first comes from the cache
+    sheets, timings = load_sheets(workbook, ["2025 INV", "Payment Pending"], {}, cache, key, workers=1)
+    assert list(sheets) == ["2025 INV", "Payment Pending"]
+    assert list(timings) == ["Payment Pending"]
+    assert parsed == ["2025 INV", "Payment Pending"]
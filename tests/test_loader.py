@@ -0,0 +1,35 @@
+import pandas as pd
+import pytest
+
+from dashboard import loader
+from dashboard.cache import WorkbookCache
+from dashboard.loader import _ingest_pool, _reset_pool, refresh_sheets
+from tests.conftest import build_workbook, workbook_bytes
+
+
+@pytest.fixture
+def pooled(monkeypatch):
+    monkeypatch.setattr(loader, "PARALLEL_MIN_BYTES", 0)
+    yield
+    _reset_pool()
+
+
+def test_serial_and_parallel_ingest_return_the_same_frames(tmp_path, pooled):
+    data = workbook_bytes(build_workbook(rows=300))
+    names = ["QT Register 2025", "2025 INV", "Meeting Agenda", "Payment Pending", "Archive"]
+    assert loader._use_pool(data, names, 2)
+
+    serial, serial_timings, _ = refresh_sheets(data, names, {}, WorkbookCache(str(tmp_path / "serial")), "key", workers=1)
+    parallel, parallel_timings, _ = refresh_sheets(data, names, {}, WorkbookCache(str(tmp_path / "pool")), "key", workers=2)
+    assert set(serial_timings) == set(parallel_timings) == set(names)
+    assert list(serial) == list(parallel) == names
+    for name in names:
+        pd.testing.assert_frame_equal(serial[name], parallel[name], check_exact=True)
+        for col in serial[name].columns[serial[name].dtypes == object]:
+            assert [type(v) for v in serial[name][col]] == [type(v) for v in parallel[name][col]]
+
+
+def test_pools_are_kept_per_size(pooled):
+    assert _ingest_pool(2) is _ingest_pool(2)
+    assert _ingest_pool(3) is not _ingest_pool(2)
+    assert _ingest_pool(3)._max_workers == 3
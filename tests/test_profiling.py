@@ -0,0 +1,110 @@
+import json
+import time
+
+import pandas as pd
+import pytest
+
+from dashboard.cache import workbook_key
+from dashboard.charts import bar_chart, render_png
+from dashboard.loader import load_sheets
+from dashboard.profiling import ProfileCapture, Recorder, current_recorder, stage, write_log
+
+
+def _busy(seconds: float):
+    # Spins for `seconds` of this thread's CPU time, however loaded the machine is
+    end = time.thread_time() + seconds
+    while time.thread_time() < end:
+        pass
+
+
+def test_stages_record_wall_and_cpu_time_with_nesting():
+    recorder = Recorder(session="s1").start()
+    try:
+        with stage("report", sheet="QT"):
+            with stage("sleep"):
+                time.sleep(0.05)
+            with stage("busy"):
+                _busy(0.05)
+    finally:
+        recorder.stop()
+    assert current_recorder() is None
+    records = {r["stage"]: r for r in recorder.ordered()}
+    assert [r["stage"] for r in recorder.ordered()] == ["report", "sleep", "busy"]
+    assert records["report"]["sheet"] == "QT"
+    assert (records["report"]["depth"], records["sleep"]["depth"], records["busy"]["depth"]) == (0, 1, 1)
+    assert records["sleep"]["wall_s"] >= 0.05 and records["sleep"]["cpu_s"] < 0.04
+    assert records["busy"]["cpu_s"] >= 0.05 and records["busy"]["wall_s"] >= 0.05
+    assert records["report"]["wall_s"] >= records["sleep"]["wall_s"] + records["busy"]["wall_s"]
+
+
+def test_traced_stages_record_allocated_memory():
+    recorder = Recorder(trace_memory=True).start()
+    try:
+        with stage("outer"):
+            with stage("allocate"):
+                block = bytearray(8 * 1024 * 1024)
+                del block
+            kept = bytearray(1024 * 1024)
+    finally:
+        recorder.stop()
+    records = {r["stage"]: r for r in recorder.records}
+    assert records["allocate"]["alloc_peak_bytes"] >= 8 * 1024 * 1024
+    assert records["allocate"]["alloc_net_bytes"] < 1024 * 1024
+    assert records["outer"]["alloc_peak_bytes"] >= 8 * 1024 * 1024  # Includes the nested peak
+    assert records["outer"]["alloc_net_bytes"] >= len(kept)
+
+
+def test_stages_without_a_recorder_record_nothing():
+    assert current_recorder() is None
+    with stage("parse"):
+        pass
+    assert current_recorder() is None
+
+
+def test_a_new_run_stops_a_recorder_left_running():
+    first = Recorder().start()
+    second = Recorder().start()
+    try:
+        with stage("report"):
+            pass
+    finally:
+        second.stop()
+    assert first.records == [] and [r["stage"] for r in second.records] == ["report"]
+
+
+def test_hot_paths_are_instrumented(workbook, cache):
+    recorder = Recorder().start()
+    try:
+        names = ["QT Register 2025", "2025 INV"]
+        load_sheets(workbook, names, {}, cache, workbook_key(workbook), workers=1)
+        totals = pd.DataFrame({"Sales Person": ["Ali", "Sara"], "Quotations": [5, 3]})
+        render_png(bar_chart(totals, "Quotations", "Sales Person", "By sales person", "Quotations", "Sales Person"))
+    finally:
+        recorder.stop()
+    recorded = {(r["stage"], r.get("sheet")) for r in recorder.records}
+    for name in names:
+        assert {("parse", name), ("clean", name), ("cache write", name)} <= recorded
+    assert ("chart render", None) in recorded
+
+
+def test_runs_are_appended_to_the_json_log(tmp_path):
+    path = str(tmp_path / "profile.jsonl")
+    for session in ("a", "b"):
+        recorder = Recorder(session=session).start()
+        with stage("report", sheet="QT"):
+            pass
+        write_log(recorder.stop(), path)
+    write_log(Recorder(), None)  # No log configured
+    with open(path, encoding="utf-8") as fh:
+        lines = [json.loads(line) for line in fh]
+    assert [line["session"] for line in lines] == ["a", "b"]
+    assert [(s["stage"], s["sheet"]) for s in lines[0]["stages"]] == [("report", "QT")]
+    assert "timestamp" in lines[0]
+
+
+@pytest.mark.parametrize("profiler", ["cProfile", "pyinstrument"])
+def test_profile_capture_reports_the_profiled_calls(profiler):
+    capture = ProfileCapture(profiler).start()
+    _busy(0.05)
+    report = capture.stop()
+    assert "_busy" in report
@@ -0,0 +1,62 @@
+import datetime
+
+import pandas as pd
+import pytest
+
+from dashboard.aggregates import build_cube
+from dashboard.cache import WorkbookCache
+from dashboard.loader import load_sheets, refresh_sheets
+from dashboard.refresh import update_cube
+from tests.conftest import build_workbook, workbook_bytes
+
+
+def _revise(wb, edit=True, add=True, remove=True):
+    qt, inv, agenda, pending = wb["QT Register 2025"], wb["2025 INV"], wb["Meeting Agenda"], wb["Payment Pending"]
+    if edit:
+        qt.cell(row=12, column=6).value = 123456  # Needs a wider integer type
+        qt.cell(row=20, column=3).value = "Brand New Party"
+        pending.cell(row=5, column=3).value = 999
+        agenda.cell(row=8, column=4).value = "12,345"
+    if remove:
+        qt.delete_rows(30)
+        inv.delete_rows(2, 3)
+        agenda.delete_rows(10)
+    if add:
+        for i in range(5):
+            qt.append([datetime.datetime(2025, 9, 1 + i), f"QN{i}", "New Co", "Laptop", "Zed", 777])
+        qt.append(["09/10/2025", "QN-text", "New Co", "Laptop", "Zed", 10])
+        inv.append([datetime.datetime(2025, 9, 9), "INVN", "New Co", "Laptop", "Zed", 50.5])
+        pending.append(["New Co", "y", "TBD"])
+    return wb
+
+
+def _sorted_table(cube):
+    table = cube.table
+    return table.sort_values(cube.dimensions, kind="stable").reset_index(drop=True) if cube.dimensions else table
+
+
+@pytest.mark.parametrize("change", ["edit", "add", "remove", "all"])
+def test_refresh_matches_a_full_reload(tmp_path, change):
+    before = workbook_bytes(build_workbook())
+    options = {"edit": change in ("edit", "all"), "add": change in ("add", "all"), "remove": change in ("remove", "all")}
+    after = workbook_bytes(_revise(build_workbook(), **options))
+
+    cache = WorkbookCache(str(tmp_path / "incremental"))
+    names = ["QT Register 2025", "2025 INV", "Meeting Agenda", "Payment Pending", "Archive"]
+    previous, _ = load_sheets(before, names, {}, cache, "before")
+    refreshed, timings, deltas = refresh_sheets(after, names, {}, cache, "after", previous_key="before", workers=1)
+    assert set(deltas) == set(names)
+
+    full, _ = load_sheets(after, names, {}, WorkbookCache(str(tmp_path / "full")), "after")
+    for name in names:
+        pd.testing.assert_frame_equal(refreshed[name], full[name], check_exact=True)
+
+        cube = build_cube(name, previous[name])
+        if cube is None:
+            continue
+        updated = update_cube(cube, name, refreshed[name], deltas[name])
+        rebuilt = build_cube(name, full[name])
+        assert updated is not None
+        assert updated.dimensions == rebuilt.dimensions
+        assert (updated.rows, updated.distinct_ids, updated.has_value) == (rebuilt.rows, rebuilt.distinct_ids, rebuilt.has_value)
+        pd.testing.assert_frame_equal(_sorted_table(updated), _sorted_table(rebuilt))
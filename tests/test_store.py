@@ -0,0 +1,112 @@
+import gc
+
+import pandas as pd
+
+from dashboard.store import FrameHandle, FrameStore
+
+
+def _frame(rows: int, value: int = 0) -> pd.DataFrame:
+    return pd.DataFrame({"a": [value] * rows, "b": [float(value)] * rows})
+
+
+def _nbytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def _check_invariants(store: FrameStore):
+    stats = store.stats()
+    assert stats["bytes"] == sum(nbytes for _, nbytes in store._frames.values())
+    assert all(count > 0 for count in store._refs.values())
+    assert stats["references"] == sum(store._refs.values())
+
+
+def test_first_frame_stored_for_a_key_wins():
+    store = FrameStore()
+    store.put("k", _frame(10, 1))
+    store.put("k", _frame(10, 2))
+    assert store.get("k")["a"].iloc[0] == 1
+    assert store.stats()["bytes"] == _nbytes(_frame(10))
+    _check_invariants(store)
+
+
+def test_views_do_not_write_through():
+    store = FrameStore()
+    store.put("k", _frame(5, 1))
+    view = store.get("k")
+    view.loc[0, "a"] = 99
+    view["c"] = 1
+    assert store.get("k")["a"].tolist() == [1] * 5
+    assert list(store.get("k").columns) == ["a", "b"]
+
+
+def test_eviction_prefers_unreferenced_frames_in_lru_order():
+    size = _nbytes(_frame(100))
+    store = FrameStore(max_bytes=3 * size)
+    store.acquire("a")
+    for key in "abc":
+        store.put(key, _frame(100))
+    store.get("b")  # b is now more recently used than c
+    store.put("d", _frame(100))
+    assert "c" not in store and {"a", "b", "d"} <= set(store._frames)  # a is referenced, c was least recent
+    _check_invariants(store)
+
+    store.put("e", _frame(100))
+    store.put("f", _frame(100))
+    assert set(store._frames) == {"a", "e", "f"}
+    assert store.stats()["bytes"] <= store.max_bytes
+    _check_invariants(store)
+
+
+def test_referenced_frames_are_evicted_only_when_the_budget_requires_it():
+    size = _nbytes(_frame(100))
+    store = FrameStore(max_bytes=2 * size)
+    for key in "abc":
+        store.acquire(key)
+        store.put(key, _frame(100))
+    assert set(store._frames) == {"b", "c"}
+    assert store.stats()["evictions"] == 1
+    _check_invariants(store)
+
+
+def test_references_are_counted_and_released():
+    store = FrameStore()
+    store.acquire("k")
+    store.acquire("k")
+    store.release("k")
+    assert store._refs == {"k": 1}
+    store.release("k")
+    store.release("k")  # An extra release never goes negative
+    assert store._refs == {}
+    _check_invariants(store)
+
+
+def test_handles_reload_evicted_frames_and_release_when_collected():
+    size = _nbytes(_frame(100))
+    store = FrameStore(max_bytes=size)
+    reloads = []
+
+    def reload():
+        reloads.append(1)
+        return _frame(100, 7)
+
+    handle = FrameHandle("k", reload, df=_frame(100, 7), store=store)
+    assert store.stats()["references"] == 1
+    other = FrameHandle("other", reload, df=_frame(100), store=store)  # Over budget: the older one goes
+    assert "k" not in store and "other" in store
+    assert handle.frame()["a"].iloc[0] == 7
+    assert len(reloads) == 1
+
+    del handle, other
+    gc.collect()
+    assert store.stats()["references"] == 0
+    _check_invariants(store)
+
+
+def test_handles_return_reloaded_frames_the_store_cannot_keep():
+    store = FrameStore(max_bytes=100)
+    handle = FrameHandle("k", lambda: _frame(100, 3), store=store)
+    for _ in range(2):
+        df = handle.frame()
+        assert df is not None and df["a"].tolist() == [3] * 100
+    assert "k" not in store  # Larger than the whole budget
+    _check_invariants(store)
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard.timeseries import GRANULARITIES, TimeSeries
+
+
+@pytest.fixture
+def rows():
+    rng = np.random.default_rng(7)
+    days = pd.Timestamp("2024-11-27") + pd.to_timedelta(rng.integers(0, 500, 2000), unit="D")
+    frame = pd.DataFrame({"day": days, "value": rng.integers(1, 1000, 2000).astype("float64")})
+    frame.loc[frame.sample(frac=0.05, random_state=1).index, "day"] = pd.NaT
+    frame.loc[frame.sample(frac=0.05, random_state=2).index, "value"] = np.nan
+    return frame
+
+
+@pytest.mark.parametrize("granularity", list(GRANULARITIES))
+@pytest.mark.parametrize("measure", ["count", "value"])
+def test_binned_matches_a_groupby(rows, granularity, measure):
+    series = TimeSeries(rows["day"], values=rows["value"])
+    dated = rows.dropna(subset=["day"])
+    periods = dated["day"].dt.to_period(GRANULARITIES[granularity][2])
+    if measure == "count":
+        expected = dated.groupby(periods).size()
+    else:
+        expected = dated["value"].fillna(0).groupby(periods).sum()
+    binned = series.binned(granularity, measure)
+    assert list(binned.index) == list(expected.index)
+    np.testing.assert_allclose(binned.to_numpy(), expected.to_numpy())
+    if measure == "count":
+        assert binned.dtype == np.int64
+
+
+def test_keep_empty_lists_every_period_of_the_span(rows):
+    binned = TimeSeries(rows["day"]).binned("D", keep_empty=True)
+    first, last = rows["day"].min(), rows["day"].max()
+    assert len(binned) == (last - first).days + 1
+    assert binned.sum() == rows["day"].notna().sum()
+
+
+def test_windows_and_cumulative_match_masks(rows):
+    series = TimeSeries(rows["day"], values=rows["value"])
+    rng = np.random.default_rng(3)
+    for _ in range(50):
+        start = pd.Timestamp("2024-11-01") + pd.Timedelta(days=int(rng.integers(0, 560)))
+        end = start + pd.Timedelta(days=int(rng.integers(0, 120)))
+        mask = (rows["day"] >= start) & (rows["day"] < end + pd.Timedelta(days=1))
+        assert series.window(start, end) == mask.sum()
+        assert series.window(start, end, "value") == pytest.approx(rows.loc[mask, "value"].fillna(0).sum())
+
+    cumulative = series.cumulative()
+    expected = rows.dropna(subset=["day"]).groupby("day").size().cumsum()
+    assert list(cumulative.index) == list(expected.index)
+    assert cumulative.tolist() == expected.tolist()
+
+
+def test_from_table_equals_per_row_series(rows):
+    table = rows.dropna(subset=["day"]).groupby("day").agg(count=("value", "size"), value=("value", "sum")).reset_index()
+    from_rows = TimeSeries(rows["day"], values=rows["value"])
+    from_table = TimeSeries.from_table(table)
+    for granularity in GRANULARITIES:
+        pd.testing.assert_series_equal(from_table.binned(granularity), from_rows.binned(granularity))
+        pd.testing.assert_series_equal(from_table.binned(granularity, "value"), from_rows.binned(granularity, "value"))
+
+
+def test_empty_series():
+    series = TimeSeries(pd.Series([pd.NaT, pd.NaT]))
+    assert series.empty() and series.bounds() is None
+    assert series.window("2025-01-01", "2025-12-31") == 0.0
+    assert series.binned("M").empty and series.cumulative().empty